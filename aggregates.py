@@ -0,0 +1,244 @@
+import json
+import os
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from draw_store import (
+    DrawStore, MISSING_CONCURSO, MISSING_DATE, encode_dezenas, mask_to_numbers, parse_draw_date,
+    frequency_stats_from_counts, companion_stats_from_pairs, average_gap_stats_from_gaps
+)
+from serialization import to_plain
+
+SNAPSHOT_VERSION = 3
+
+
+def _to_json_value(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class LotofacilAggregates:
+    """Estado agregado das estatísticas, atualizado concurso a concurso."""
+
+    def __init__(self):
+        self.watermark = 0
+        self.counts = [0] * 25
+        self.pairs = [[0] * 25 for _ in range(25)]
+        self.last_appearance: List[Optional[int]] = [None] * 25
+        self.gaps: List[List[int]] = [[] for _ in range(25)]
+        self.draws: List[List[int]] = []  # [concurso, máscara, data ordinal]
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def fold(self, results: Iterable[Dict[str, Any]]) -> int:
+        new_results = [
+            r for r in results
+            if 'dezenas' in r and 'concurso' in r and int(r['concurso']) > self.watermark
+        ]
+        new_results.sort(key=lambda x: int(x['concurso']))
+
+        added = 0
+        for result in new_results:
+            concurso = int(result['concurso'])
+            if concurso <= self.watermark:
+                continue  # concurso repetido no mesmo lote
+            self.fold_mask(concurso, encode_dezenas(result['dezenas']), parse_draw_date(result.get('data')))
+            self.last_result = to_plain(result)
+            added += 1
+
+        return added
+
+    def fold_mask(self, concurso: int, mask: int, draw_date: int = MISSING_DATE) -> None:
+        indexes = [n - 1 for n in mask_to_numbers(mask)]
+
+        for i in indexes:
+            self.counts[i] += 1
+            row = self.pairs[i]
+            for j in indexes:
+                if j != i:
+                    row[j] += 1
+
+            if self.last_appearance[i] is not None:
+                self.gaps[i].append(concurso - self.last_appearance[i])
+            self.last_appearance[i] = concurso
+
+        self.draws.append([concurso, mask, draw_date])
+        self.watermark = concurso
+
+    def frequency_stats(self) -> List[Dict[str, Any]]:
+        return frequency_stats_from_counts(self.counts)
+
+    def companion_stats(self, top_numbers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return companion_stats_from_pairs(self.pairs, top_numbers)
+
+    def average_gap_stats(self) -> List[Dict[str, Any]]:
+        return average_gap_stats_from_gaps(self.gaps, self.last_appearance)
+
+    def store(self) -> DrawStore:
+        return DrawStore(
+            np.array([c for c, _, _ in self.draws], dtype=np.int32),
+            np.array([m for _, m, _ in self.draws], dtype=np.uint32),
+            np.array([d for _, _, d in self.draws], dtype=np.int32)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': SNAPSHOT_VERSION,
+            'watermark': self.watermark,
+            'counts': self.counts,
+            'pairs': self.pairs,
+            'last_appearance': self.last_appearance,
+            'gaps': self.gaps,
+            'draws': self.draws,
+            'last_result': self.last_result,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LotofacilAggregates':
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Versão de snapshot não suportada: {data.get('version')}")
+        aggregates = cls()
+        aggregates.watermark = data['watermark']
+        aggregates.counts = data['counts']
+        aggregates.pairs = data['pairs']
+        aggregates.last_appearance = data['last_appearance']
+        aggregates.gaps = data['gaps']
+        aggregates.draws = data['draws']
+        aggregates.last_result = data.get('last_result')
+        return aggregates
+
+
+class StreamingAggregates:
+    """Estatísticas do histórico inteiro somadas página a página durante o scan: cada
+    página é normalizada e incorporada assim que chega, sem guardar os itens. Mesma
+    interface de LotofacilAggregates para as seções do handler."""
+
+    def __init__(self):
+        self.watermark = 0
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._counts = np.zeros(25, dtype=np.int64)
+        self._pairs = np.zeros((25, 25), dtype=np.int64)
+        # Concursos em que cada número saiu, um array por página; ordenados só no final,
+        # já que os segmentos do scan chegam fora de ordem
+        self._appearances: List[List[np.ndarray]] = [[] for _ in range(25)]
+        # Aparições de versões substituídas de um concurso, descontadas no final
+        self._retracted: List[List[int]] = [[] for _ in range(25)]
+        self._pages: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._masks: Dict[int, int] = {}
+        self._store: Optional[DrawStore] = None
+
+    def fold_page(self, items: Iterable[Dict[str, Any]]) -> int:
+        # Devolve quantos itens com dezenas foram incorporados (versões repetidas incluídas)
+        concursos, masks, dates = [], [], []
+        in_page: Dict[int, int] = {}
+        folded = 0
+        for item in items:
+            if 'dezenas' not in item:
+                continue
+            folded += 1
+            concurso = int(item['concurso']) if 'concurso' in item else MISSING_CONCURSO
+            mask = encode_dezenas(item['dezenas'])
+            date = parse_draw_date(item.get('data'))
+            if concurso != MISSING_CONCURSO:
+                # Concurso repetido fica com a última versão, como no DrawStore.from_results
+                if concurso in in_page:
+                    masks[in_page[concurso]], dates[in_page[concurso]] = mask, date
+                    self._masks[concurso] = mask
+                    continue
+                if concurso in self._masks:
+                    self._retract(concurso, self._masks[concurso])
+                in_page[concurso] = len(masks)
+                self._masks[concurso] = mask
+            concursos.append(concurso)
+            masks.append(mask)
+            dates.append(date)
+        if not masks:
+            return 0
+
+        concursos = np.array(concursos, dtype=np.int32)
+        masks = np.array(masks, dtype=np.uint32)
+        matrix = ((masks[:, None] >> np.arange(25, dtype=np.uint32)) & 1).astype(np.int64)
+        self._counts += matrix.sum(axis=0)
+        self._pairs += matrix.T @ matrix
+        valid = concursos != MISSING_CONCURSO
+        for i in range(25):
+            self._appearances[i].append(concursos[valid & (matrix[:, i] == 1)])
+        self._pages.append((concursos, masks, np.array(dates, dtype=np.int32)))
+        self._store = None
+        if valid.any():
+            self.watermark = max(self.watermark, int(concursos[valid].max()))
+        return folded
+
+    def _retract(self, concurso: int, mask: int):
+        # Desfaz a contribuição de uma versão anterior já somada em outra página
+        numbers = mask_to_numbers(mask)
+        indexes = [n - 1 for n in numbers]
+        self._counts[indexes] -= 1
+        self._pairs[np.ix_(indexes, indexes)] -= 1
+        for i in indexes:
+            self._retracted[i].append(concurso)
+
+    @property
+    def counts(self) -> List[int]:
+        return self._counts.tolist()
+
+    @property
+    def pairs(self) -> List[List[int]]:
+        pairs = self._pairs.copy()
+        np.fill_diagonal(pairs, 0)
+        return pairs.tolist()
+
+    def frequency_stats(self) -> List[Dict[str, Any]]:
+        return frequency_stats_from_counts(self.counts)
+
+    def companion_stats(self, top_numbers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return companion_stats_from_pairs(self.pairs, top_numbers)
+
+    def average_gap_stats(self) -> List[Dict[str, Any]]:
+        gaps, last_appearance = [], []
+        for chunks, retracted in zip(self._appearances, self._retracted):
+            values, totals = np.unique(np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32),
+                                       return_counts=True)
+            if retracted:
+                removed, removed_totals = np.unique(retracted, return_counts=True)
+                totals[np.searchsorted(values, removed)] -= removed_totals
+            appearances = values[totals > 0].astype(np.int64)
+            gaps.append(np.diff(appearances).tolist())
+            last_appearance.append(int(appearances[-1]) if len(appearances) else None)
+        return average_gap_stats_from_gaps(gaps, last_appearance)
+
+    def store(self) -> DrawStore:
+        # Concursos, máscaras e datas (12 bytes por concurso) ordenados uma única vez
+        if self._store is None:
+            if not self._pages:
+                return DrawStore(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint32))
+            concursos, masks, dates = (np.concatenate(column) for column in zip(*self._pages))
+            order = np.argsort(concursos, kind='stable')
+            # Entre versões do mesmo concurso (na ordem das páginas) fica a última
+            ordered = concursos[order]
+            keep = np.ones(len(order), dtype=bool)
+            keep[:-1] = (ordered[:-1] != ordered[1:]) | (ordered[:-1] == MISSING_CONCURSO)
+            order = order[keep]
+            self._store = DrawStore(concursos[order], masks[order], dates[order])
+        return self._store
+
+
+def load_snapshot(path: str) -> Optional[LotofacilAggregates]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return LotofacilAggregates.from_dict(json.load(f))
+    except Exception as e:
+        print(f"Snapshot inválido em {path}, recalculando do zero: {str(e)}")
+        return None
+
+
+def save_snapshot(aggregates: LotofacilAggregates, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(aggregates.to_dict(), f, default=_to_json_value)
+    os.replace(tmp_path, path)
@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import ml_pipeline
+import numpy_engine
+from aggregates import LotofacilAggregates
+from draw_store import DrawStore, encode_dezenas
+from entity import LotofacilResultsListEntity
+
+DEFAULT_STRATEGIES = ('simple', 'frequency', 'random', 'ml_DecisionTree', 'ml_KNN', 'ml_SGD')
+DEFAULT_TICKET_PRICE = float(os.getenv('BACKTEST_TICKET_PRICE', '3.0'))
+DEFAULT_RETRAIN_EVERY = 100
+DEFAULT_COMBINATIONS = 5
+
+
+def prize_table(results: Sequence[Dict[str, Any]], concursos: np.ndarray) -> np.ndarray:
+    """Prêmio por acerto (colunas 0..15) de cada concurso, a partir de `premiacoes`"""
+    return LotofacilResultsListEntity.from_items(results).prize_table(concursos)
+
+
+def _simple_predictions(concursos: np.ndarray, masks: np.ndarray, first: int, seed: int, count: int, **_) -> List[List[int]]:
+    # Estatísticas acumuladas concurso a concurso; a média dos intervalos usa somas
+    # correntes em vez de recalcular sobre todos os intervalos a cada passo
+    import lambda_function
+
+    aggregates = LotofacilAggregates()
+    gap_sums = [0] * 25
+    gap_counts = [0] * 25
+    predictions = []
+    for index, (concurso, mask) in enumerate(zip(concursos.tolist(), masks.tolist())):
+        if index >= first:
+            frequency_stats = aggregates.frequency_stats()
+            companion_stats = aggregates.companion_stats(frequency_stats)
+            average_gap_stats = [
+                {'number': str(i + 1).zfill(2), 'avg_gap': gap_sums[i] / gap_counts[i] if gap_counts[i] else 0}
+                for i in range(25) if aggregates.last_appearance[i] is not None
+            ]
+            combinations = lambda_function.predict_next_combinations(
+                frequency_stats, companion_stats, average_gap_stats, count, seed=seed * 1000003 + concurso
+            )
+            predictions.append([encode_dezenas(c) for c in combinations])
+
+        for i in range(25):
+            if mask >> i & 1 and aggregates.last_appearance[i] is not None:
+                gap_sums[i] += concurso - aggregates.last_appearance[i]
+                gap_counts[i] += 1
+        aggregates.fold_mask(concurso, mask)
+    return predictions
+
+
+def _frequency_predictions(concursos: np.ndarray, masks: np.ndarray, first: int, count: int, **_) -> List[List[int]]:
+    # As dezenas mais frequentes nos concursos anteriores a cada alvo (soma prefixada)
+    matrix = DrawStore(concursos, masks).matrix()
+    cumulative = np.zeros((len(matrix) + 1, 25), dtype=np.int32)
+    np.cumsum(matrix, axis=0, out=cumulative[1:])
+    return [
+        [encode_dezenas(c) for c in ml_pipeline.combinations_from_probabilities(cumulative[t].astype(float), count)]
+        for t in range(first, len(matrix))
+    ]
+
+
+def _random_predictions(concursos: np.ndarray, masks: np.ndarray, first: int, seed: int, count: int, **_) -> List[List[int]]:
+    rng = np.random.default_rng(seed)
+    targets = len(masks) - first
+    picks = np.argsort(rng.random((targets, count, 25)), axis=2)[:, :, :15]
+    combinations = np.bitwise_or.reduce(np.left_shift(np.uint32(1), picks.astype(np.uint32)), axis=2)
+    return combinations.tolist()
+
+
+def _ml_predictions(concursos: np.ndarray, masks: np.ndarray, first: int, count: int, model: str,
+                    retrain_every: int, max_training_draws: int, **_) -> List[List[int]]:
+    # As features do concurso t usam apenas concursos anteriores a t, então são
+    # calculadas uma vez; o modelo é retreinado a cada `retrain_every` concursos
+    matrix = DrawStore(concursos, masks).matrix()
+    features = ml_pipeline.build_features(matrix)
+    predictions = []
+    for start in range(first, len(matrix), retrain_every):
+        end = min(len(matrix), start + retrain_every)
+        lower = max(1, start - max_training_draws)
+        estimator = ml_pipeline.make_models([model])[model]
+        estimator.fit(ml_pipeline.long_format(features[lower:start]), matrix[lower:start].reshape(-1).astype(np.int8))
+        probabilities = ml_pipeline.positive_probability(
+            estimator, ml_pipeline.long_format(features[start:end])
+        ).reshape(end - start, 25)
+        # Empates desempatados pela frequência nos concursos anteriores ao bloco, como no train_and_predict
+        frequencies = matrix[:start].sum(axis=0)
+        for row in probabilities:
+            predictions.append([
+                encode_dezenas(c) for c in ml_pipeline.combinations_from_probabilities(row, count, frequencies)
+            ])
+    return predictions
+
+
+STRATEGIES = {
+    'simple': _simple_predictions,
+    'frequency': _frequency_predictions,
+    'random': _random_predictions,
+}
+
+
+def score(predictions: np.ndarray, draws: np.ndarray, prizes: np.ndarray, ticket_price: float) -> Dict[str, Any]:
+    """Acertos de cada combinação (máscaras) contra o concurso sorteado e prêmio correspondente"""
+    hits = numpy_engine.popcount(predictions & draws[:, None]).astype(np.int64)
+    prize = np.take_along_axis(prizes, hits, axis=1)
+    distribution = np.bincount(hits.reshape(-1), minlength=16)
+    tickets = hits.size
+    total_prize = float(prize.sum())
+    cost = tickets * ticket_price
+    return {
+        'draws': int(len(draws)),
+        'combinations': int(tickets),
+        'mean_hits': float(hits.mean()) if tickets else 0.0,
+        'max_hits': int(hits.max()) if tickets else 0,
+        'hit_distribution': {str(h): int(distribution[h]) for h in range(11, 16)},
+        'prize_rate': float((hits >= 11).mean()) if tickets else 0.0,
+        'total_prize': round(total_prize, 2),
+        'expected_prize_per_combination': round(total_prize / tickets, 4) if tickets else 0.0,
+        'roi': round((total_prize - cost) / cost, 4) if cost else 0.0,
+    }
+
+
+def run_strategy(name: str, concursos: np.ndarray, masks: np.ndarray, prizes: np.ndarray, first: int,
+                 options: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if name.startswith('ml_'):
+        predictions = _ml_predictions(concursos, masks, first, model=name[len('ml_'):], **options)
+    else:
+        predictions = STRATEGIES[name](concursos, masks, first, **options)
+    summary = score(np.array(predictions, dtype=np.uint32).reshape(len(masks) - first, -1),
+                    masks[first:], prizes[first:], options['ticket_price'])
+    summary['strategy'] = name
+    summary['elapsed_s'] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def run_backtest(results: Sequence[Dict[str, Any]], start_concurso: Optional[int] = None,
+                 strategies: Sequence[str] = DEFAULT_STRATEGIES, workers: Optional[int] = None,
+                 seed: int = 42, count: int = DEFAULT_COMBINATIONS, retrain_every: int = DEFAULT_RETRAIN_EVERY,
+                 max_training_draws: int = ml_pipeline.ML_MAX_TRAINING_DRAWS,
+                 ticket_price: float = DEFAULT_TICKET_PRICE) -> Dict[str, Any]:
+    """Avalia cada estratégia em todos os concursos a partir de `start_concurso`, usando só os anteriores"""
+    unknown = [s for s in strategies if s not in STRATEGIES and s not in DEFAULT_STRATEGIES]
+    if unknown:
+        raise ValueError(f"Estratégias desconhecidas: {', '.join(unknown)}")
+
+    # Itens convertidos uma vez: o DrawStore e a tabela de prêmios usam as mesmas colunas
+    history = LotofacilResultsListEntity.from_items(results)
+    store = history.store().window(concurso_from=0)
+    if start_concurso is None:
+        start_concurso = int(store.concursos[min(len(store) - 1, ml_pipeline.ML_LOOKBACK)])
+    first = int(np.searchsorted(store.concursos, start_concurso))
+    if first < 1 or first >= len(store):
+        raise ValueError("start_concurso precisa ter ao menos um concurso antes e estar no histórico")
+
+    prizes = history.prize_table(store.concursos)
+    options = {
+        'seed': seed, 'count': count, 'retrain_every': retrain_every,
+        'max_training_draws': max_training_draws, 'ticket_price': ticket_price
+    }
+    args = [(name, store.concursos, store.masks, prizes, first, options) for name in strategies]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(strategies) == 1:
+        summaries = [run_strategy(*arguments) for arguments in args]
+    else:
+        # Uma estratégia por processo: o treino e os laços em Python não disputam o GIL
+        with ProcessPoolExecutor(max_workers=min(workers, len(strategies))) as executor:
+            summaries = list(executor.map(run_strategy, *zip(*args)))
+
+    return {
+        'start_concurso': start_concurso,
+        'end_concurso': int(store.concursos[-1]),
+        'ticket_price': ticket_price,
+        'strategies': {summary.pop('strategy'): summary for summary in summaries}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest walk-forward das estratégias de previsão")
+    parser.add_argument('--start', type=int, default=None, help="Primeiro concurso avaliado")
+    parser.add_argument('--strategies', nargs='+', default=list(DEFAULT_STRATEGIES))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--combinations', type=int, default=DEFAULT_COMBINATIONS)
+    parser.add_argument('--retrain-every', type=int, default=DEFAULT_RETRAIN_EVERY)
+    parser.add_argument('--ticket-price', type=float, default=DEFAULT_TICKET_PRICE)
+    parser.add_argument('--synthetic', type=int, default=None, help="Usa N concursos sintéticos em vez do DynamoDB")
+    parser.add_argument('--output', default=None, help="Grava o resultado em JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from synthetic_draws import generate_draws
+        results = generate_draws(args.synthetic, seed=args.seed)
+    else:
+        import lambda_function
+        # O scan completo traz as premiações usadas no cálculo do prêmio esperado
+        results = lambda_function.get_lotofacil_results(projection=False)
+
+    started = time.perf_counter()
+    report = run_backtest(
+        results, args.start, args.strategies, args.workers, args.seed,
+        args.combinations, args.retrain_every, ticket_price=args.ticket_price
+    )
+    report['elapsed_s'] = round(time.perf_counter() - started, 3)
+
+    for name, summary in report['strategies'].items():
+        print(f"{name:<16} acertos médios {summary['mean_hits']:.3f}  "
+              f"11-15: {summary['hit_distribution']}  prêmio/aposta R$ {summary['expected_prize_per_combination']:.2f}  "
+              f"({summary['elapsed_s']:.1f}s)")
+    print(f"Tempo total: {report['elapsed_s']:.1f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
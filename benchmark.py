@@ -0,0 +1,148 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import lambda_function
+from draw_store import DrawStore
+from synthetic_draws import generate_draws
+
+DEFAULT_SIZES = (3000, 30000, 300000)
+
+
+def _measure(function, repeat: int):
+    """Mede tempo (sem tracemalloc) e depois pico de memória e blocos retidos em uma execução rastreada"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+    del result
+
+    return {
+        'wall_time_s': min(timings),
+        'wall_time_median_s': sorted(timings)[len(timings) // 2],
+        'peak_memory_bytes': peak,
+        'retained_blocks': retained_blocks
+    }
+
+
+def benchmark_size(size: int, seed: int, repeat: int, include_ml: bool):
+    results = generate_draws(size, seed=seed)
+    store = DrawStore.from_results(results)
+    frequency_stats = lambda_function.count_number_frequencies(store)
+    companion_stats = lambda_function.find_most_frequent_companions(store, frequency_stats)
+    average_gap_stats = lambda_function.calculate_average_gap(store)
+
+    cases = {
+        'normalize_draw_store': lambda: DrawStore.from_results(results),
+        'count_number_frequencies': lambda: lambda_function.count_number_frequencies(results),
+        'find_most_frequent_companions': lambda: lambda_function.find_most_frequent_companions(results, frequency_stats),
+        'calculate_average_gap': lambda: lambda_function.calculate_average_gap(results),
+        'count_number_frequencies[store]': lambda: lambda_function.count_number_frequencies(store),
+        'find_most_frequent_companions[store]': lambda: lambda_function.find_most_frequent_companions(store, frequency_stats),
+        'calculate_average_gap[store]': lambda: lambda_function.calculate_average_gap(store),
+        'predict_next_combinations': lambda: lambda_function.predict_next_combinations(frequency_stats, companion_stats, average_gap_stats),
+    }
+    if include_ml:
+        # Importa o scikit-learn antes para não medir o custo do import
+        import sklearn.model_selection, sklearn.neighbors, sklearn.tree  # noqa: F401
+        cases['train_and_predict_combinations'] = lambda: lambda_function.train_and_predict_combinations(store)
+
+    report = {}
+    for name, function in cases.items():
+        # O treino é caro demais para repetir nos tamanhos grandes
+        runs = 1 if name == 'train_and_predict_combinations' else repeat
+        report[name] = _measure(function, runs)
+        print(f"  {name:<40} {report[name]['wall_time_s'] * 1000:>10.1f} ms  "
+              f"pico {report[name]['peak_memory_bytes'] / 1024 / 1024:>8.1f} MiB")
+    return report
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def compare(current, baseline_path: str, threshold: float, min_ms: float) -> bool:
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    ok = True
+    print(f"\n=== COMPARAÇÃO COM {baseline.get('commit')} ===")
+    for size, functions in current['results'].items():
+        for name, metrics in functions.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if not previous or not previous['wall_time_s']:
+                continue
+            ratio = metrics['wall_time_s'] / previous['wall_time_s']
+            flag = ''
+            # Diferenças abaixo de min_ms são ruído de medição
+            if ratio > 1 + threshold and (metrics['wall_time_s'] - previous['wall_time_s']) * 1000 > min_ms:
+                flag = '  ❌ regressão'
+                ok = False
+            print(f"  {size:>7} {name:<40} {ratio:>6.2f}x{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline das análises com concursos sintéticos")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--engine', choices=('python', 'numpy'), default=lambda_function.ANALYSIS_ENGINE)
+    parser.add_argument('--skip-ml', action='store_true', help="Não mede train_and_predict_combinations")
+    parser.add_argument('--output', default=None, help="Arquivo JSON (padrão: bench_results/<commit>-<engine>.json)")
+    parser.add_argument('--compare', default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Tolerância de regressão no tempo (0.2 = 20%%)")
+    parser.add_argument('--min-ms', type=float, default=1.0, help="Diferença mínima (ms) para contar como regressão")
+    args = parser.parse_args()
+
+    lambda_function.ANALYSIS_ENGINE = args.engine
+    commit = _git_commit()
+    report = {
+        'commit': commit,
+        'engine': args.engine,
+        'seed': args.seed,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': {}
+    }
+
+    for size in args.sizes:
+        print(f"\n=== {size} CONCURSOS (motor {args.engine}) ===")
+        report['results'][str(size)] = benchmark_size(size, args.seed, args.repeat, not args.skip_ml)
+
+    output = args.output or os.path.join('bench_results', f"{commit}-{args.engine}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados gravados em {output}")
+
+    if args.compare and not compare(report, args.compare, args.threshold, args.min_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
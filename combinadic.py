@@ -0,0 +1,125 @@
+import math
+from typing import Any, Dict, Iterable, List
+import numpy as np
+from draw_store import encode_dezenas
+from numpy_engine import popcount
+
+# Índice combinatório (combinadic, ordem colex): a combinação c1 < c2 < ... < c15
+# (posições 0..24) tem posto C(c1, 1) + C(c2, 2) + ... + C(c15, 15), de 0 a C(25, 15) - 1
+UNIVERSE = 25
+DRAW_SIZE = 15
+TOTAL_COMBINATIONS = math.comb(UNIVERSE, DRAW_SIZE)
+
+# Acertos (combinações x concursos) calculados por bloco em DrawIndex.closest
+CLOSEST_BLOCK_SIZE = 1 << 20
+NO_MATCH = np.iinfo(np.int64).min
+
+# BINOMIAL[n, k] = C(n, k)
+BINOMIAL = np.array([[math.comb(n, k) for k in range(DRAW_SIZE + 1)] for n in range(UNIVERSE + 1)], dtype=np.int64)
+
+
+def rank_masks(masks: np.ndarray) -> np.ndarray:
+    """Posto de cada máscara de 15 bits"""
+    masks = np.asarray(masks, dtype=np.uint32)
+    ranks = np.zeros(masks.shape, dtype=np.int64)
+    seen = np.zeros(masks.shape, dtype=np.int64)
+    for position in range(UNIVERSE):
+        bit = ((masks >> np.uint32(position)) & np.uint32(1)).astype(bool)
+        seen += bit
+        ranks += np.where(bit, BINOMIAL[position][np.minimum(seen, DRAW_SIZE)], 0)
+    return ranks
+
+
+def unrank_masks(ranks: np.ndarray) -> np.ndarray:
+    """Máscara de cada posto: para k = 15..1, a maior posição c com C(c, k) <= resto"""
+    remaining = np.array(ranks, dtype=np.int64)
+    masks = np.zeros(remaining.shape, dtype=np.uint32)
+    for k in range(DRAW_SIZE, 0, -1):
+        positions = np.searchsorted(BINOMIAL[:, k], remaining, side='right') - 1
+        remaining -= BINOMIAL[positions, k]
+        masks |= np.left_shift(np.uint32(1), positions.astype(np.uint32))
+    return masks
+
+
+def mask_range(start: int, stop: int) -> np.ndarray:
+    """Máscaras dos postos start..stop-1, em ordem"""
+    return unrank_masks(np.arange(start, stop, dtype=np.int64))
+
+
+class DrawIndex:
+    """Concursos indexados pelo posto da combinação sorteada: bitset com um bit por
+    combinação possível (~400 KB) e postos ordenados para achar os concursos."""
+
+    __slots__ = ('ranks', 'concursos', 'masks', 'bitset')
+
+    def __init__(self, concursos: np.ndarray, masks: np.ndarray):
+        ranks = rank_masks(masks)
+        order = np.argsort(ranks, kind='stable')
+        self.ranks = ranks[order]
+        self.concursos = np.asarray(concursos)[order]
+        self.masks = np.asarray(masks, dtype=np.uint32)[order]
+        self.bitset = np.zeros((TOTAL_COMBINATIONS + 7) // 8, dtype=np.uint8)
+        np.bitwise_or.at(self.bitset, self.ranks >> 3, np.left_shift(np.uint8(1), (self.ranks & 7).astype(np.uint8)))
+
+    @classmethod
+    def from_store(cls, store) -> 'DrawIndex':
+        # Só sorteios com 15 dezenas têm posto
+        valid = popcount(store.masks) == DRAW_SIZE
+        return cls(store.concursos[valid], store.masks[valid])
+
+    def __len__(self) -> int:
+        return len(self.ranks)
+
+    def contains(self, masks: np.ndarray) -> np.ndarray:
+        """Se cada combinação já foi sorteada (O(1) por combinação)"""
+        masks = np.asarray(masks, dtype=np.uint32)
+        valid = popcount(masks) == DRAW_SIZE
+        ranks = rank_masks(np.where(valid, masks, 0))
+        return valid & (self.bitset[ranks >> 3] >> (ranks & 7).astype(np.uint8) & 1).astype(bool)
+
+    def concursos_for(self, mask: int) -> List[int]:
+        """Concursos em que a combinação saiu (busca binária nos postos)"""
+        value = int(rank_masks(np.array([mask], dtype=np.uint32))[0])
+        start, stop = np.searchsorted(self.ranks, [value, value + 1])
+        return sorted(int(c) for c in self.concursos[start:stop])
+
+    def closest(self, masks: np.ndarray, limit: int = 5) -> List[Dict[str, Any]]:
+        """Maior número de acertos de cada combinação em um concurso passado e os
+        `limit` concursos mais recentes com esse número de acertos"""
+        masks = np.asarray(masks, dtype=np.uint32)
+        if not len(self) or not len(masks):
+            return [{'hits': 0, 'concursos': []} for _ in range(len(masks))]
+        draws = len(self)
+        limit = max(0, min(limit, draws))
+        concursos = self.concursos.astype(np.int64)
+        # Blocos de combinações com ~CLOSEST_BLOCK_SIZE acertos calculados por vez, como no ranking
+        chunk_size = max(1, CLOSEST_BLOCK_SIZE // draws)
+        matches = []
+        for start in range(0, len(masks), chunk_size):
+            hits = popcount(masks[start:start + chunk_size, None] & self.masks[None, :])
+            best = hits.max(axis=1)
+            # Concursos com o melhor número de acertos; os demais viram NO_MATCH
+            keyed = np.where(hits == best[:, None], concursos[None, :], NO_MATCH)
+            del hits
+            if limit == 0:
+                keyed = keyed[:, :0]
+            elif limit < draws:
+                keyed = np.take_along_axis(keyed, np.argpartition(keyed, draws - limit, axis=1)[:, draws - limit:], axis=1)
+            keyed = np.sort(keyed, axis=1)[:, ::-1]
+            for value, row in zip(best.tolist(), keyed.tolist()):
+                matches.append({'hits': int(value), 'concursos': [c for c in row if c != NO_MATCH]})
+        return matches
+
+    def annotate(self, combinations: Iterable[Iterable[Any]], limit: int = 5) -> List[Dict[str, Any]]:
+        """Para cada combinação (dezenas): se já foi sorteada (e em quais concursos) e o concurso mais parecido"""
+        combinations = [sorted(str(int(n)).zfill(2) for n in c) for c in combinations]
+        masks = np.array([encode_dezenas(c) for c in combinations], dtype=np.uint32)
+        drawn = self.contains(masks) if len(masks) else np.zeros(0, dtype=bool)
+        return [
+            {
+                'dezenas': dezenas, 'drawn': bool(was_drawn),
+                'drawn_concursos': self.concursos_for(int(mask)) if was_drawn else [],
+                'closest_hits': match['hits'], 'closest_concursos': match['concursos']
+            }
+            for dezenas, mask, was_drawn, match in zip(combinations, masks, drawn, self.closest(masks, limit))
+        ]
@@ -0,0 +1,107 @@
+import os
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from combinadic import TOTAL_COMBINATIONS
+from draw_store import NUMBERS, mask_to_dezenas
+from numpy_engine import popcount
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('COMBINATION_CHUNK_SIZE', '65536'))
+
+# Peso de cada score na probabilidade de um número ser sorteado na combinação;
+# o piso mantém todos os números possíveis
+FREQUENCY_WEIGHT = 1.0
+GAP_WEIGHT = 1.0
+COMPANION_WEIGHT = 1.0
+MIN_WEIGHT = 0.05
+
+# Rodadas seguidas sem combinações novas antes de desistir (pesos muito concentrados)
+MAX_STALLED_ROUNDS = 10
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    span = values.max() - values.min()
+    return (values - values.min()) / span if span else np.zeros_like(values)
+
+
+def number_weights(frequency_stats: List[Dict[str, Any]], companion_stats: List[Dict[str, Any]],
+                   average_gap_stats: List[Dict[str, Any]]) -> np.ndarray:
+    """Peso de cada número (índice 0 = '01') a partir das estatísticas das análises"""
+    index = {number: i for i, number in enumerate(NUMBERS)}
+
+    frequency = np.zeros(25)
+    for item in frequency_stats:
+        frequency[index[item['number']]] = item['quantity']
+
+    # Intervalo médio menor = número que volta mais rápido
+    gaps = np.zeros(25)
+    known = np.zeros(25, dtype=bool)
+    for item in average_gap_stats:
+        gaps[index[item['number']]] = item['avg_gap']
+        known[index[item['number']]] = True
+    gap_score = np.zeros(25)
+    if known.any():
+        gap_score[known] = 1 - _normalize(gaps[known])
+
+    companion = np.zeros(25)
+    for item in companion_stats:
+        for mate in item['most_frequent']:
+            companion[index[mate['number']]] += mate['quantity']
+
+    score = (
+        FREQUENCY_WEIGHT * _normalize(frequency)
+        + GAP_WEIGHT * gap_score
+        + COMPANION_WEIGHT * _normalize(companion)
+    ) / (FREQUENCY_WEIGHT + GAP_WEIGHT + COMPANION_WEIGHT)
+    return MIN_WEIGHT + score
+
+
+def sample_masks(rng: np.random.Generator, weights: np.ndarray, size: int) -> np.ndarray:
+    """`size` combinações de 15 números por amostragem ponderada sem reposição
+    (chaves log(U) / w de Efraimidis-Spirakis: as 15 maiores de cada linha)"""
+    keys = np.log(rng.random((size, 25))) / weights
+    picks = np.argpartition(-keys, 15, axis=1)[:, :15]
+    return np.left_shift(np.uint32(1), picks.astype(np.uint32)).sum(axis=1, dtype=np.uint32)
+
+
+def iter_combinations(weights: np.ndarray, count: int, seed: Optional[int] = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      exclude: Optional[np.ndarray] = None) -> Iterator[np.ndarray]:
+    """Gera até `count` combinações distintas (máscaras uint32) em blocos, sem materializar a lista inteira;
+    as máscaras de `exclude` (por exemplo, os concursos já sorteados) nunca são geradas"""
+    rng = np.random.default_rng(seed)
+    weights = np.asarray(weights, dtype=np.float64)
+    # Bitset indexado pela máscara (2^25 bits = 4 MiB) para descartar repetidas em O(1)
+    seen = np.zeros(1 << 22, dtype=np.uint8)
+    excluded = 0
+    if exclude is not None and len(exclude):
+        exclude = np.unique(np.asarray(exclude, dtype=np.uint32))
+        exclude = exclude[popcount(exclude) == 15]
+        np.bitwise_or.at(seen, exclude >> 3, np.uint8(1) << (exclude & 7).astype(np.uint8))
+        excluded = len(exclude)
+    count = min(count, TOTAL_COMBINATIONS - excluded)
+    produced = 0
+    stalled = 0
+
+    while produced < count and stalled < MAX_STALLED_ROUNDS:
+        masks = sample_masks(rng, weights, min(chunk_size, max(count - produced, 16)))
+        # Repetidas dentro do bloco: mantém a primeira ocorrência, na ordem de geração
+        _, first = np.unique(masks, return_index=True)
+        masks = masks[np.sort(first)]
+        new = (seen[masks >> 3] & (np.uint8(1) << (masks & 7).astype(np.uint8))) == 0
+        masks = masks[new][:count - produced]
+        if not len(masks):
+            stalled += 1
+            continue
+        stalled = 0
+        np.bitwise_or.at(seen, masks >> 3, np.uint8(1) << (masks & 7).astype(np.uint8))
+        produced += len(masks)
+        yield masks
+
+
+def generate_combinations(weights: np.ndarray, count: int, seed: Optional[int] = None,
+                          exclude: Optional[np.ndarray] = None) -> List[List[str]]:
+    """Lista de combinações ('dezenas' ordenadas) para a resposta da análise"""
+    return [
+        mask_to_dezenas(mask)
+        for masks in iter_combinations(weights, count, seed, exclude=exclude) for mask in masks.tolist()
+    ]
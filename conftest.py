@@ -0,0 +1,51 @@
+import os
+import random
+from contextlib import contextmanager
+import boto3
+import lambda_function
+
+TABLE_NAME = 'fezinhai_lotofacil_concursos_test'
+
+# Globais do lambda_function trocados pelos testes com tabela sintética
+PATCHED_GLOBALS = ('dynamodb', 'table', 'latest_concurso_hint')
+
+
+def create_synthetic_table(item_count, seed=3):
+    """Cria uma tabela DynamoDB local (moto) com concursos sintéticos"""
+    resource = boto3.resource('dynamodb', region_name='us-east-1')
+    test_table = resource.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{'AttributeName': 'concurso', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'concurso', 'AttributeType': 'N'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    rng = random.Random(seed)
+    with test_table.batch_writer() as batch:
+        for concurso in range(1, item_count + 1):
+            batch.put_item(Item={
+                'concurso': concurso,
+                'dezenas': sorted(str(n).zfill(2) for n in rng.sample(range(1, 26), 15)),
+                'data': f"{concurso % 28 + 1:02d}/01/2020",
+                'acumulou': concurso % 5 == 0,
+                'timeCoracao': 'FLAMENGO/RJ'
+            })
+    return resource, test_table
+
+
+@contextmanager
+def synthetic_lambda_table(item_count, seed=3):
+    """Liga o lambda_function a uma tabela sintética (dentro de um mock_aws) e restaura
+    os globais e o cache em memória na saída, mesmo se o teste falhar"""
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    saved = {name: getattr(lambda_function, name) for name in PATCHED_GLOBALS}
+    lambda_function.warm_cache.clear()
+    try:
+        resource, test_table = create_synthetic_table(item_count, seed)
+        lambda_function.dynamodb = resource
+        lambda_function.table = test_table
+        lambda_function.latest_concurso_hint = None
+        yield resource, test_table
+    finally:
+        for name, value in saved.items():
+            setattr(lambda_function, name, value)
+        lambda_function.warm_cache.clear()
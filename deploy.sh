@@ -25,6 +25,14 @@ fi
 # Antes de executar este script, certifique-se de que o AWS CLI está configurado
 # com as credenciais corretas para acessar o DynamoDB e gerenciar funções Lambda
 
+# Runtime do Lambda: o código usa recursos do Python 3.10+ (dataclasses com slots) e as
+# dependências são instaladas com o Python local, que precisa ser a mesma versão
+LAMBDA_RUNTIME=python3.11
+if ! python3 -c 'import sys; sys.exit(sys.version_info[:2] != (3, 11))'; then
+    echo "Use Python 3.11 para gerar o pacote (runtime $LAMBDA_RUNTIME)."
+    exit 1
+fi
+
 # Create a deployment package
 echo "Creating deployment package..."
 
@@ -33,7 +41,7 @@ mkdir -p deployment
 rm -rf deployment/*
 
 # Copy the necessary files
-cp lambda_function.py entity.py requirements.txt .env deployment/
+cp lambda_function.py games.py entity.py aggregates.py draw_store.py draw_cache.py numpy_engine.py ml_pipeline.py model_store.py warm_cache.py metrics.py push_state.py serialization.py combinadic.py combination_generator.py ticket_ranking.py outbox.py outbox_worker.py requirements.txt .env deployment/
 
 # Change to the deployment directory
 cd deployment
@@ -51,4 +59,5 @@ cd ..
 echo "Deployment package created as function.zip"
 
 echo "To deploy, run:"
-echo "aws lambda update-function-code --function-name fezinhai-analisis-lambda --zip-file fileb://function.zip" 
\ No newline at end of file
+echo "aws lambda update-function-code --function-name fezinhai-analisis-lambda --zip-file fileb://function.zip"
+echo "aws lambda update-function-configuration --function-name fezinhai-analisis-lambda --runtime $LAMBDA_RUNTIME"
\ No newline at end of file
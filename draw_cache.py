@@ -0,0 +1,50 @@
+import hashlib
+import os
+from typing import Optional
+import numpy as np
+from draw_store import DrawStore
+
+# Um registro de 12 bytes por concurso, legível via memory-map
+CACHE_DTYPE = np.dtype([('concurso', '<i4'), ('mask', '<u4'), ('data', '<i4')])
+
+
+def load_draw_cache(path: str) -> Optional[DrawStore]:
+    if not os.path.exists(path):
+        return None
+    try:
+        records = np.load(path, mmap_mode='r')
+        if records.dtype != CACHE_DTYPE:
+            print(f"Cache de concursos com formato inesperado em {path}, ignorando")
+            return None
+        return DrawStore(np.array(records['concurso']), np.array(records['mask']), np.array(records['data']))
+    except Exception as e:
+        print(f"Erro ao ler cache de concursos em {path}: {str(e)}")
+        return None
+
+
+def save_draw_cache(store: DrawStore, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    records = np.empty(len(store), dtype=CACHE_DTYPE)
+    records['concurso'] = store.concursos
+    records['mask'] = store.masks
+    records['data'] = store.dates
+    # np.save acrescenta '.npy' a nomes sem extensão, então gravamos pelo handle
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, records)
+    os.replace(tmp_path, path)
+
+
+def draw_checksum(store: DrawStore, max_concurso: Optional[int] = None) -> str:
+    concursos = store.concursos
+    masks = store.masks
+    if max_concurso is not None:
+        keep = concursos <= max_concurso
+        concursos = concursos[keep]
+        masks = masks[keep]
+    digest = hashlib.sha256()
+    digest.update(concursos.astype('<i4').tobytes())
+    digest.update(masks.astype('<u4').tobytes())
+    return digest.hexdigest()
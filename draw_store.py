@@ -0,0 +1,318 @@
+from datetime import date, datetime
+from statistics import mean, median
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+
+# Lotofácil: 25 dezenas, 15 sorteadas; os demais jogos informam o universo (games.py)
+UNIVERSE = 25
+DRAW_SIZE = 15
+
+
+def numbers_for(universe: int) -> List[str]:
+    return [str(i).zfill(2) for i in range(1, universe + 1)]
+
+
+def mask_dtype(universe: int):
+    # Até 32 números cabem em uint32, até 64 em uint64; acima disso, inteiros do Python (object)
+    if universe <= 32:
+        return np.uint32
+    if universe <= 64:
+        return np.uint64
+    return object
+
+
+NUMBERS = numbers_for(UNIVERSE)
+
+# Concursos sem o atributo 'concurso' entram só nas contagens, nunca nos intervalos
+MISSING_CONCURSO = -1
+
+# Datas guardadas como ordinal (date.toordinal()); 0 quando ausente ou inválida
+MISSING_DATE = 0
+
+DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S')
+
+
+def normalize_dezenas(dezenas: Iterable[Any], universe: int = UNIVERSE) -> List[int]:
+    # DynamoDB devolve as dezenas como str ('01'), int ou Decimal
+    normalized = []
+    for n in dezenas:
+        try:
+            value = int(n)
+        except (TypeError, ValueError):
+            continue
+        if 1 <= value <= universe and value not in normalized:
+            normalized.append(value)
+    return normalized
+
+
+def encode_dezenas(dezenas: Iterable[Any], universe: int = UNIVERSE) -> int:
+    mask = 0
+    for n in normalize_dezenas(dezenas, universe):
+        mask |= 1 << (n - 1)
+    return mask
+
+
+def mask_to_numbers(mask: int) -> List[int]:
+    numbers = []
+    while mask:
+        low = mask & -mask
+        numbers.append(low.bit_length())
+        mask ^= low
+    return numbers
+
+
+def mask_to_dezenas(mask: int) -> List[str]:
+    return [str(n).zfill(2) for n in mask_to_numbers(mask)]
+
+
+def parse_draw_date(value: Any) -> int:
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if not isinstance(value, str):
+        return MISSING_DATE
+    text = value.strip()[:19]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().toordinal()
+        except ValueError:
+            continue
+    return MISSING_DATE
+
+
+class DrawStore:
+    """Histórico de concursos com cada sorteio codificado como máscara de `universe` bits
+    (25 na Lotofácil)."""
+
+    __slots__ = ('concursos', 'masks', 'dates', 'universe', '_matrix')
+
+    def __init__(self, concursos: np.ndarray, masks: np.ndarray, dates: Optional[np.ndarray] = None,
+                 universe: int = UNIVERSE):
+        self.concursos = concursos
+        self.masks = masks
+        self.dates = dates if dates is not None else np.full(len(masks), MISSING_DATE, dtype=np.int32)
+        self.universe = universe
+        self._matrix = None
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, Any]], universe: int = UNIVERSE) -> 'DrawStore':
+        by_concurso = {}
+        without_concurso = []
+        for result in results:
+            if 'dezenas' not in result:
+                continue
+            draw = (encode_dezenas(result['dezenas'], universe), parse_draw_date(result.get('data')))
+            if 'concurso' in result:
+                by_concurso[int(result['concurso'])] = draw
+            else:
+                without_concurso.append(draw)
+
+        ordered = sorted(by_concurso.items())
+        concursos = [MISSING_CONCURSO] * len(without_concurso) + [c for c, _ in ordered]
+        draws = without_concurso + [d for _, d in ordered]
+        return cls(
+            np.array(concursos, dtype=np.int32),
+            np.array([m for m, _ in draws], dtype=mask_dtype(universe)),
+            np.array([d for _, d in draws], dtype=np.int32),
+            universe
+        )
+
+    @classmethod
+    def coerce(cls, results: Union['DrawStore', Iterable[Dict[str, Any]]]) -> 'DrawStore':
+        if isinstance(results, DrawStore):
+            return results
+        return cls.from_results(results)
+
+    def merge(self, other: 'DrawStore') -> 'DrawStore':
+        # Concursos repetidos ficam com a versão de 'other'
+        concursos = np.concatenate([self.concursos, other.concursos])
+        masks = np.concatenate([self.masks, other.masks])
+        dates = np.concatenate([self.dates, other.dates])
+        # np.unique devolve a primeira ocorrência; invertendo, fica a última
+        _, reversed_index = np.unique(concursos[::-1], return_index=True)
+        keep = len(concursos) - 1 - reversed_index
+        return DrawStore(concursos[keep], masks[keep], dates[keep], self.universe)
+
+    def window(self, concurso_from: Optional[int] = None, concurso_to: Optional[int] = None,
+               last_n: Optional[int] = None, date_from: Optional[int] = None,
+               date_to: Optional[int] = None) -> 'DrawStore':
+        keep = np.ones(len(self), dtype=bool)
+        if concurso_from is not None:
+            keep &= self.concursos >= concurso_from
+        if concurso_to is not None:
+            keep &= self.concursos <= concurso_to
+        if date_from is not None:
+            keep &= self.dates >= date_from
+        if date_to is not None:
+            keep &= (self.dates <= date_to) & (self.dates != MISSING_DATE)
+        if last_n is not None:
+            # Últimos N concursos dentro dos demais filtros
+            selected = np.flatnonzero(keep)
+            keep[selected[:max(0, len(selected) - last_n)]] = False
+        return DrawStore(self.concursos[keep], self.masks[keep], self.dates[keep], self.universe)
+
+    def rolling_frequencies(self, window: int) -> np.ndarray:
+        # Soma prefixada: contagem na janela [t - window + 1, t] = C[t + 1] - C[t + 1 - window],
+        # calculada para todos os concursos em uma única passada
+        cumulative = np.zeros((len(self) + 1, self.universe), dtype=np.int32)
+        np.cumsum(self.matrix(), axis=0, out=cumulative[1:])
+        end = np.arange(1, len(self) + 1)
+        start = np.maximum(end - window, 0)
+        return cumulative[end] - cumulative[start]
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def matrix(self) -> np.ndarray:
+        # Matriz concursos x universo (M[d, i] é True quando o número i+1 saiu no concurso d),
+        # construída uma vez e reaproveitada pelo motor vetorizado
+        if self._matrix is None:
+            if self.masks.dtype == object:
+                matrix = np.zeros((len(self), self.universe), dtype=bool)
+                for row, mask in enumerate(self.masks.tolist()):
+                    matrix[row, [n - 1 for n in mask_to_numbers(mask)]] = True
+                self._matrix = matrix
+            else:
+                bits = np.arange(self.universe, dtype=self.masks.dtype)
+                self._matrix = ((self.masks[:, None] >> bits) & 1).astype(bool)
+        return self._matrix
+
+    def frequencies(self) -> List[int]:
+        counts = [0] * self.universe
+        for mask in self.masks.tolist():
+            while mask:
+                low = mask & -mask
+                counts[low.bit_length() - 1] += 1
+                mask ^= low
+        return counts
+
+    def pair_counts(self) -> List[List[int]]:
+        pairs = [[0] * self.universe for _ in range(self.universe)]
+        for mask in self.masks.tolist():
+            indexes = [n - 1 for n in mask_to_numbers(mask)]
+            for i in indexes:
+                row = pairs[i]
+                for j in indexes:
+                    row[j] += 1
+        return pairs
+
+    def triple_counts(self, pairs: List[Tuple[int, int]]) -> List[List[int]]:
+        # Para cada par (i, j), quantas vezes cada terceiro número saiu junto com os dois
+        pair_masks = [(1 << i) | (1 << j) for i, j in pairs]
+        triples = [[0] * self.universe for _ in pairs]
+        for mask in self.masks.tolist():
+            for p, pair_mask in enumerate(pair_masks):
+                if mask & pair_mask != pair_mask:
+                    continue
+                row = triples[p]
+                others = mask ^ pair_mask
+                while others:
+                    low = others & -others
+                    row[low.bit_length() - 1] += 1
+                    others ^= low
+        return triples
+
+    def gaps(self) -> Tuple[List[List[int]], List[Optional[int]]]:
+        last_appearance: List[Optional[int]] = [None] * self.universe
+        gaps: List[List[int]] = [[] for _ in range(self.universe)]
+        for concurso, mask in zip(self.concursos.tolist(), self.masks.tolist()):
+            if concurso == MISSING_CONCURSO:
+                continue
+            while mask:
+                low = mask & -mask
+                i = low.bit_length() - 1
+                if last_appearance[i] is not None:
+                    gaps[i].append(concurso - last_appearance[i])
+                last_appearance[i] = concurso
+                mask ^= low
+        return gaps, last_appearance
+
+
+def frequency_stats_from_counts(counts: List[int]) -> List[Dict[str, Any]]:
+    formatted_counts = [
+        {"number": number, "quantity": counts[i]}
+        for i, number in enumerate(numbers_for(len(counts)))
+    ]
+    return sorted(formatted_counts, key=lambda x: x["quantity"], reverse=True)
+
+
+def companion_stats_from_pairs(pairs: List[List[int]], top_numbers: List[Dict[str, Any]],
+                               draw_size: int = DRAW_SIZE) -> List[Dict[str, Any]]:
+    # Os `draw_size` números mais frequentes, cada um com até `draw_size - 1` companheiros
+    numbers = numbers_for(len(pairs))
+    companions_result = []
+    for number_data in top_numbers[:draw_size]:
+        number = number_data["number"]
+        row = pairs[int(number) - 1]
+
+        top_companions = sorted(
+            [
+                {"number": companion, "quantity": row[j]}
+                for j, companion in enumerate(numbers)
+                if companion != number and row[j] > 0
+            ],
+            key=lambda x: x["quantity"],
+            reverse=True
+        )
+
+        companions_result.append({
+            "number": number,
+            "most_frequent": top_companions[:draw_size - 1]
+        })
+    return companions_result
+
+
+def top_pairs(pairs: List[List[int]], k: int) -> List[Tuple[int, int]]:
+    size = len(pairs)
+    candidates = [(pairs[i][j], i, j) for i in range(size) for j in range(i + 1, size)]
+    candidates.sort(key=lambda x: (-x[0], x[1], x[2]))
+    return [(i, j) for _, i, j in candidates[:k]]
+
+
+def companion_matrix_from_pairs(pairs: List[List[int]], counts: List[int],
+                                triples: Optional[List[Tuple[Tuple[int, int], List[int]]]] = None) -> Dict[str, Any]:
+    # Matriz simétrica; a diagonal traz a frequência do próprio número
+    numbers = numbers_for(len(pairs))
+    matrix = [list(row) for row in pairs]
+    for i in range(len(pairs)):
+        matrix[i][i] = counts[i]
+
+    section = {'numbers': numbers, 'matrix': matrix}
+    if triples is not None:
+        section['triples'] = [
+            {
+                'pair': [numbers[i], numbers[j]],
+                'quantity': pairs[i][j],
+                'most_frequent': sorted(
+                    [{'number': numbers[k], 'quantity': c} for k, c in enumerate(row) if c > 0],
+                    key=lambda x: x['quantity'],
+                    reverse=True
+                )
+            }
+            for (i, j), row in triples
+        ]
+    return section
+
+
+def average_gap_stats_from_gaps(gaps: List[List[int]], last_appearance: List[Optional[int]]) -> List[Dict[str, Any]]:
+    avg_gaps = []
+    for i, num_str in enumerate(numbers_for(len(gaps))):
+        number_gaps = gaps[i]
+        if number_gaps:
+            avg_gap = mean(number_gaps)
+            med_gap = median(number_gaps)
+            min_gap = min(number_gaps)
+            max_gap = max(number_gaps)
+        else:
+            avg_gap = med_gap = min_gap = max_gap = 0
+
+        avg_gaps.append({
+            "number": num_str,
+            "avg_gap": round(avg_gap, 2),  # Arredondar para 2 casas decimais
+            "median_gap": med_gap,
+            "min_gap": min_gap,
+            "max_gap": max_gap,
+            "total_appearances": len(number_gaps) + 1 if last_appearance[i] is not None else 0
+        })
+    return sorted(avg_gaps, key=lambda x: x["avg_gap"])
@@ -1,13 +1,46 @@
-from dataclasses import dataclass
-from typing import List
-from datetime import datetime
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+import numpy as np
+from draw_store import (
+    DrawStore, MISSING_CONCURSO, MISSING_DATE, UNIVERSE, encode_dezenas, mask_to_dezenas, mask_to_numbers,
+    parse_draw_date
+)
 
-@dataclass
+# Entidades com __slots__ criadas uma vez a partir dos itens do DynamoDB: Decimals
+# convertidos, dezenas como máscara de 25 bits e data já interpretada
+
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _date(ordinal: int) -> Optional[date]:
+    return date.fromordinal(ordinal) if ordinal != MISSING_DATE else None
+
+
+@dataclass(slots=True)
 class Premiacao:
     vencedores: int
     premio: float
 
-@dataclass
+    @classmethod
+    def from_item(cls, item: Optional[Mapping[str, Any]]) -> 'Premiacao':
+        item = item or {}
+        return cls(_int(item.get('vencedores')), _float(item.get('premio')))
+
+
+@dataclass(slots=True)
 class LotofacilPremiacao:
     quinze: Premiacao
     quatorze: Premiacao
@@ -15,19 +48,134 @@ class LotofacilPremiacao:
     doze: Premiacao
     onze: Premiacao
 
-@dataclass
+    @classmethod
+    def from_item(cls, item: Optional[Mapping[str, Any]]) -> 'LotofacilPremiacao':
+        item = item or {}
+        return cls(*(Premiacao.from_item(item.get(tier)) for tier in PRIZE_TIERS))
+
+
+# Faixas na ordem dos campos (quinze..onze) e acertos de cada uma
+PRIZE_TIERS = tuple(field.name for field in fields(LotofacilPremiacao))
+PRIZE_HITS = tuple(range(15, 15 - len(PRIZE_TIERS), -1))
+
+
+@dataclass(slots=True)
 class LotofacilResultEntity:
     concurso: int
-    data: datetime
-    dezenas: List[str]
+    data: Optional[date]
+    mask: int
     premiacoes: LotofacilPremiacao
-    acumulou: bool
-    acumuladaProxConcurso: float
-    dataProxConcurso: str
-    proxConcurso: int
-    timeCoracao: str
-    mesSorte: str
-
-@dataclass
+    acumulou: bool = False
+    acumuladaProxConcurso: float = 0.0
+    dataProxConcurso: Optional[date] = None
+    proxConcurso: int = 0
+    timeCoracao: str = ''
+    mesSorte: str = ''
+
+    @classmethod
+    def from_item(cls, item: Mapping[str, Any]) -> 'LotofacilResultEntity':
+        """Converte um item do DynamoDB (Decimals, dezenas em str/int/Decimal, datas em texto)"""
+        return cls(
+            concurso=_int(item.get('concurso'), MISSING_CONCURSO),
+            data=_date(parse_draw_date(item.get('data'))),
+            mask=encode_dezenas(item.get('dezenas') or []),
+            premiacoes=LotofacilPremiacao.from_item(item.get('premiacoes')),
+            acumulou=bool(item.get('acumulou', False)),
+            acumuladaProxConcurso=_float(item.get('acumuladaProxConcurso')),
+            dataProxConcurso=_date(parse_draw_date(item.get('dataProxConcurso'))),
+            proxConcurso=_int(item.get('proxConcurso')),
+            timeCoracao=str(item.get('timeCoracao') or ''),
+            mesSorte=str(item.get('mesSorte') or '')
+        )
+
+    @property
+    def numbers(self) -> Tuple[int, ...]:
+        return tuple(mask_to_numbers(self.mask))
+
+    @property
+    def dezenas(self) -> List[str]:
+        return mask_to_dezenas(self.mask)
+
+
 class LotofacilResultsListEntity:
-    results: List[LotofacilResultEntity] 
\ No newline at end of file
+    """Histórico inteiro em colunas NumPy (uma linha por concurso, ordenado por concurso).
+    `store()` devolve um DrawStore sobre os mesmos arrays, sem cópia."""
+
+    __slots__ = ('concursos', 'masks', 'dates', 'premios', 'vencedores', 'acumulou')
+
+    def __init__(self, concursos: np.ndarray, masks: np.ndarray, dates: np.ndarray,
+                 premios: np.ndarray, vencedores: np.ndarray, acumulou: np.ndarray):
+        self.concursos = concursos
+        self.masks = masks
+        self.dates = dates
+        # Colunas na ordem de PRIZE_TIERS (quinze..onze)
+        self.premios = premios
+        self.vencedores = vencedores
+        self.acumulou = acumulou
+
+    @classmethod
+    def from_items(cls, items: Iterable[Mapping[str, Any]]) -> 'LotofacilResultsListEntity':
+        # Mesma regra do DrawStore: concurso repetido fica com o último item, itens sem
+        # 'concurso' vêm antes e itens sem 'dezenas' são ignorados
+        return cls.from_entities(
+            LotofacilResultEntity.from_item(item) for item in items if 'dezenas' in item
+        )
+
+    @classmethod
+    def from_entities(cls, entities: Iterable[LotofacilResultEntity]) -> 'LotofacilResultsListEntity':
+        by_concurso = {}
+        without_concurso = []
+        for entity in entities:
+            if entity.concurso == MISSING_CONCURSO:
+                without_concurso.append(entity)
+            else:
+                by_concurso[entity.concurso] = entity
+        ordered = without_concurso + [by_concurso[c] for c in sorted(by_concurso)]
+
+        tiers = [[getattr(e.premiacoes, tier) for tier in PRIZE_TIERS] for e in ordered]
+        return cls(
+            np.array([e.concurso for e in ordered], dtype=np.int32),
+            np.array([e.mask for e in ordered], dtype=np.uint32),
+            np.array([e.data.toordinal() if e.data else MISSING_DATE for e in ordered], dtype=np.int32),
+            np.array([[p.premio for p in row] for row in tiers], dtype=np.float64).reshape(-1, len(PRIZE_TIERS)),
+            np.array([[p.vencedores for p in row] for row in tiers], dtype=np.int64).reshape(-1, len(PRIZE_TIERS)),
+            np.array([e.acumulou for e in ordered], dtype=bool)
+        )
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def __getitem__(self, index: int) -> LotofacilResultEntity:
+        premiacoes = LotofacilPremiacao(*(
+            Premiacao(int(v), float(p)) for v, p in zip(self.vencedores[index], self.premios[index])
+        ))
+        return LotofacilResultEntity(
+            int(self.concursos[index]), _date(int(self.dates[index])), int(self.masks[index]),
+            premiacoes, bool(self.acumulou[index])
+        )
+
+    def __iter__(self) -> Iterator[LotofacilResultEntity]:
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def results(self) -> List[LotofacilResultEntity]:
+        return list(self)
+
+    def store(self) -> DrawStore:
+        return DrawStore(self.concursos, self.masks, self.dates, UNIVERSE)
+
+    def prize_table(self, concursos: Optional[np.ndarray] = None) -> np.ndarray:
+        """Prêmio por acerto (colunas 0..15); com `concursos`, uma linha para cada um deles
+        (zeros para concursos fora do histórico)"""
+        table = np.zeros((len(self), 16), dtype=np.float64)
+        table[:, list(PRIZE_HITS)] = self.premios
+        if concursos is None:
+            return table
+        concursos = np.asarray(concursos)
+        keyed = self.concursos != MISSING_CONCURSO
+        known, rows = self.concursos[keyed], np.flatnonzero(keyed)
+        positions = np.clip(np.searchsorted(known, concursos), 0, max(len(known) - 1, 0))
+        found = (known[positions] == concursos) if len(known) else np.zeros(len(concursos), dtype=bool)
+        prizes = np.zeros((len(concursos), 16), dtype=np.float64)
+        prizes[found] = table[rows[positions[found]]]
+        return prizes
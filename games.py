@@ -0,0 +1,36 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List
+from draw_store import numbers_for
+
+
+@dataclass(frozen=True)
+class Game:
+    """Jogo analisado: quantidade de dezenas possíveis, dezenas por sorteio e tabela no DynamoDB."""
+    key: str
+    name: str
+    universe: int
+    draw_size: int
+    table_name: str
+
+    @property
+    def numbers(self) -> List[str]:
+        return numbers_for(self.universe)
+
+
+DEFAULT_GAME = 'lotofacil'
+
+GAMES: Dict[str, Game] = {
+    game.key: game for game in (
+        Game('lotofacil', 'Lotofácil', 25, 15, os.getenv('DYNAMODB_TABLE_NAME', 'fezinhai_lotofacil_concursos')),
+        Game('megasena', 'Mega-Sena', 60, 6, os.getenv('MEGASENA_TABLE_NAME', 'fezinhai_megasena_concursos')),
+        Game('quina', 'Quina', 80, 5, os.getenv('QUINA_TABLE_NAME', 'fezinhai_quina_concursos')),
+    )
+}
+
+
+def get_game(key: str) -> Game:
+    game = GAMES.get(str(key).lower())
+    if game is None:
+        raise ValueError(f"Jogo desconhecido: {key}")
+    return game
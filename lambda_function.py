@@ -1,26 +1,135 @@
-import boto3
+import base64
+import gzip
 import json
 import os
-from decimal import Decimal
-from typing import List, Dict, Any, TypedDict
-from entity import LotofacilResultEntity
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple, TypedDict, Union
+from entity import LotofacilResultsListEntity
+from aggregates import LotofacilAggregates, StreamingAggregates, load_snapshot, save_snapshot
+from combinadic import DrawIndex
+from combination_generator import TOTAL_COMBINATIONS, generate_combinations, number_weights
+from games import DEFAULT_GAME, Game, get_game
+from draw_cache import load_draw_cache, save_draw_cache, draw_checksum
+from model_store import ModelArtifacts, open_model_store
+from outbox import open_outbox
+from ticket_ranking import RankingCache, SCORING_CACHE_SIZE, SCORING_TOP_K, top_combinations
+from push_state import load_push_state, save_push_state, section_hash
+from serialization import dumps, join_objects, to_columnar, to_plain
+from draw_store import (
+    DrawStore, DRAW_SIZE, MISSING_DATE, numbers_for, parse_draw_date, top_pairs,
+    frequency_stats_from_counts, companion_stats_from_pairs, companion_matrix_from_pairs, average_gap_stats_from_gaps
+)
+import metrics
+import ml_pipeline
+import numpy_engine
+from warm_cache import WarmCache
 from dotenv import load_dotenv
-from statistics import mean, median
-from sklearn.model_selection import train_test_split
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.neighbors import KNeighborsClassifier
-import requests
 
 load_dotenv()
 
-dynamodb = boto3.resource(
-    'dynamodb',
-    region_name=os.getenv('AWS_REGION', 'us-east-1'),
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-)
+# boto3, requests e scikit-learn são importados sob demanda para reduzir o cold start;
+# o resource e a tabela são criados no primeiro uso e reaproveitados pelo container
+dynamodb = None
+table = None
+
+def get_dynamodb():
+    global dynamodb
+    if dynamodb is None:
+        import boto3
+        dynamodb = boto3.resource(
+            'dynamodb',
+            region_name=os.getenv('AWS_REGION', 'us-east-1'),
+            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+        )
+    return dynamodb
+
+def get_table():
+    global table
+    if table is None:
+        table = get_dynamodb().Table(os.getenv('DYNAMODB_TABLE_NAME', 'fezinhai_lotofacil_concursos'))
+    return table
+
+# Número de segmentos do scan paralelo (1 = scan sequencial)
+SCAN_SEGMENTS = int(os.getenv('DYNAMODB_SCAN_SEGMENTS', '4'))
+# Atributos usados pelas análises; o item completo só é lido para o último concurso
+ANALYSIS_ATTRIBUTES = ('concurso', 'dezenas', 'data')
+# Modo streaming: páginas do scan lidas à frente enquanto a anterior é incorporada
+SCAN_PREFETCH_PAGES = int(os.getenv('SCAN_PREFETCH_PAGES', '2'))
+
+STATS_SNAPSHOT_PATH = os.getenv('STATS_SNAPSHOT_PATH', '/tmp/fezinhai_stats_snapshot.json')
+INCREMENTAL_BATCH_SIZE = int(os.getenv('INCREMENTAL_BATCH_SIZE', '25'))
+# Lotes seguidos sem nenhum concurso que encerram a busca por chaves (lacunas menores passam)
+INCREMENTAL_MAX_EMPTY_BATCHES = int(os.getenv('INCREMENTAL_MAX_EMPTY_BATCHES', '1'))
+
+# Cache local dos concursos (vazio = desativado) e modo de validação: off, count ou checksum
+DRAW_CACHE_PATH = os.getenv('DRAW_CACHE_PATH', '')
+DRAW_CACHE_VALIDATE = os.getenv('DRAW_CACHE_VALIDATE', 'off').lower()
+
+# Análises mantidas em memória entre invocações quentes do mesmo container
+WARM_CACHE_TTL_SECONDS = float(os.getenv('WARM_CACHE_TTL_SECONDS', '3600'))
+WARM_CACHE_MAX_ENTRIES = int(os.getenv('WARM_CACHE_MAX_ENTRIES', '4'))
+WARM_CACHE_RESEND = os.getenv('WARM_CACHE_RESEND', 'false').lower() == 'true'
+
+warm_cache = WarmCache(WARM_CACHE_TTL_SECONDS, WARM_CACHE_MAX_ENTRIES)
+
+# Último concurso conhecido pelo container, ponto de partida para descobrir concursos novos
+latest_concurso_hint: Optional[int] = None
+
+# Janela padrão (em concursos) das séries móveis
+DEFAULT_ROLLING_WINDOW = int(os.getenv('ROLLING_WINDOW', '100'))
+
+# 'python' (laços de bits) ou 'numpy' (vetorizado), para comparação A/B
+ANALYSIS_ENGINE = os.getenv('ANALYSIS_ENGINE', 'python').lower()
+
+# Combinações da previsão heurística: padrão e máximo por requisição. Cada combinação ocupa
+# ~80 bytes no JSON (~190 com prediction_history); 10 mil cabem no limite de 6 MB da resposta do Lambda
+DEFAULT_COMBINATION_COUNT = int(os.getenv('COMBINATION_COUNT', '10'))
+MAX_COMBINATION_COUNT = min(int(os.getenv('MAX_COMBINATION_COUNT', '10000')), TOTAL_COMBINATIONS)
+# Não gera na previsão heurística combinações que já foram sorteadas
+EXCLUDE_DRAWN_COMBINATIONS = os.getenv('EXCLUDE_DRAWN_COMBINATIONS', 'true').lower() == 'true'
+# Concursos mais recentes listados para a combinação mais parecida de cada previsão
+CLOSEST_DRAWS_LIMIT = int(os.getenv('CLOSEST_DRAWS_LIMIT', '5'))
+
+# Artefatos dos modelos treinados: diretório local ou s3://bucket/prefixo (vazio = sem persistência)
+MODEL_ARTIFACT_URL = os.getenv('MODEL_ARTIFACT_URL', '/tmp/fezinhai_models')
+model_artifacts = None
+ranking_cache = None
+
+# Cliente HTTP da API: timeouts (segundos), tentativas com backoff exponencial e pool de conexões
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', '3.05'))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', '30'))
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', '3'))
+API_RETRY_BACKOFF = float(os.getenv('API_RETRY_BACKOFF', '0.5'))
+API_RETRY_STATUSES = tuple(int(code) for code in os.getenv('API_RETRY_STATUSES', '429,502,503,504').split(',') if code)
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', '4'))
+# Token reaproveitado até faltar API_TOKEN_REFRESH_MARGIN segundos para o 'exp' do JWT;
+# API_TOKEN_DEFAULT_TTL vale para tokens sem 'exp'
+API_TOKEN_REFRESH_MARGIN = float(os.getenv('API_TOKEN_REFRESH_MARGIN', '60'))
+API_TOKEN_DEFAULT_TTL = float(os.getenv('API_TOKEN_DEFAULT_TTL', '300'))
 
-table = dynamodb.Table(os.getenv('DYNAMODB_TABLE_NAME', 'fezinhai_lotofacil_concursos'))
+# Compressão do corpo enviado (gzip ou none) e modo de envio: full (todas as seções)
+# ou delta (só as seções que mudaram desde o último envio bem-sucedido)
+API_COMPRESSION = os.getenv('API_COMPRESSION', 'gzip').lower()
+API_GZIP_LEVEL = int(os.getenv('API_GZIP_LEVEL', '6'))
+API_PUSH_MODE = os.getenv('API_PUSH_MODE', 'full').lower()
+# Estado do modo delta: arquivo local ou, se definida, tabela DynamoDB com chave de partição 'id'
+PUSH_STATE_PATH = os.getenv('PUSH_STATE_PATH', '/tmp/fezinhai_push_state.json')
+PUSH_STATE_TABLE = os.getenv('PUSH_STATE_TABLE', '')
+
+# 'sync' envia durante a invocação; 'outbox' só enfileira e o envio fica com o outbox_worker
+API_DISPATCH_MODE = os.getenv('API_DISPATCH_MODE', 'sync').lower()
+# URL de uma fila SQS ou diretório local da fila de envio
+OUTBOX_URL = os.getenv('OUTBOX_URL', '/tmp/fezinhai_outbox')
+OUTBOX_VISIBILITY_TIMEOUT = float(os.getenv('OUTBOX_VISIBILITY_TIMEOUT', '300'))
+
+http_session = None
+cached_access_token: Optional[str] = None
+cached_token_expires_at = 0.0
 
 class NumberCount(TypedDict):
     number: str
@@ -30,21 +139,113 @@ class NumberWithCompanions(TypedDict):
     number: str
     most_frequent: List[NumberCount]
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+def _projection_kwargs(attributes: Sequence[str] = ANALYSIS_ATTRIBUTES) -> Dict[str, Any]:
+    # 'data' é palavra reservada no DynamoDB
+    return {
+        'ProjectionExpression': ', '.join(f'#{attr}' for attr in attributes),
+        'ExpressionAttributeNames': {f'#{attr}': attr for attr in attributes}
+    }
+
+def _scan_pages(segment: int, total_segments: int, projection: bool,
+               attributes: Sequence[str] = ANALYSIS_ATTRIBUTES,
+               table_name: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    # O client é thread-safe, ao contrário do resource; o client do resource
+    # já converte os itens para tipos Python
+    if table_name is None:
+        table = get_table()
+        client, table_name = table.meta.client, table.name
+    else:
+        client = get_dynamodb().meta.client
+    scan_kwargs = {'TableName': table_name, 'ReturnConsumedCapacity': 'TOTAL'}
+    if total_segments > 1:
+        scan_kwargs['Segment'] = segment
+        scan_kwargs['TotalSegments'] = total_segments
+    if projection:
+        scan_kwargs.update(_projection_kwargs(attributes))
+
+    while True:
+        response = client.scan(**scan_kwargs)
+        page = response.get('Items', [])
+        metrics.current().increment('scan_pages')
+        metrics.current().increment('items_read', len(page))
+        metrics.record_consumed_capacity(response)
+        yield page
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _scan_segment(segment: int, total_segments: int, projection: bool,
+                  attributes: Sequence[str] = ANALYSIS_ATTRIBUTES,
+                  table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    items = []
+    for page in _scan_pages(segment, total_segments, projection, attributes, table_name):
+        items.extend(page)
+    return items
 
-def get_lotofacil_results() -> List[Dict[str, Any]]:
+def iter_lotofacil_pages(segments: Optional[int] = None, projection: bool = False,
+                         attributes: Sequence[str] = ANALYSIS_ATTRIBUTES) -> Iterator[List[Dict[str, Any]]]:
+    # Páginas na ordem em que chegam: cada segmento é lido em uma thread e as páginas
+    # passam por uma fila limitada, então quem consome processa uma página enquanto
+    # as próximas são lidas e no máximo SCAN_PREFETCH_PAGES (mais uma por segmento) ficam em memória
+    total_segments = max(1, segments if segments is not None else SCAN_SEGMENTS)
+    pages = queue.Queue(maxsize=max(1, SCAN_PREFETCH_PAGES))
+    stop = threading.Event()
+    finished = object()
+
+    def put(value) -> None:
+        while not stop.is_set():
+            try:
+                pages.put(value, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce(segment: int) -> None:
+        try:
+            for page in _scan_pages(segment, total_segments, projection, attributes):
+                put(page)
+                if stop.is_set():
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(finished)
+
+    threads = [threading.Thread(target=produce, args=(segment,), daemon=True) for segment in range(total_segments)]
+    for thread in threads:
+        thread.start()
     try:
-        items = []
-        response = table.scan()
-        items.extend(response.get('Items', []))
-        
-        while 'LastEvaluatedKey' in response:
-            response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            items.extend(response.get('Items', []))
+        remaining = total_segments
+        while remaining:
+            value = pages.get()
+            if value is finished:
+                remaining -= 1
+            elif isinstance(value, Exception):
+                raise value
+            else:
+                yield value
+    finally:
+        # Consumidor interrompido (erro ou generator fechado): as threads param na próxima página
+        stop.set()
+
+def get_lotofacil_results(segments: Optional[int] = None, projection: bool = False,
+                          attributes: Sequence[str] = ANALYSIS_ATTRIBUTES,
+                          table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    # table_name lê a tabela de outro jogo (games.py); sem ele, a da Lotofácil
+    try:
+        total_segments = max(1, segments if segments is not None else SCAN_SEGMENTS)
+
+        if total_segments == 1:
+            items = _scan_segment(0, 1, projection, attributes, table_name)
+        else:
+            items = []
+            with ThreadPoolExecutor(max_workers=total_segments) as executor:
+                futures = [
+                    executor.submit(_scan_segment, segment, total_segments, projection, attributes, table_name)
+                    for segment in range(total_segments)
+                ]
+                for future in futures:
+                    items.extend(future.result())
         
         unique_items = {item['concurso']: item for item in items}.values()
         
@@ -55,201 +256,379 @@ def get_lotofacil_results() -> List[Dict[str, Any]]:
         traceback.print_exc()
         return []
 
-def count_number_frequencies(results: List[Dict[str, Any]]) -> List[NumberCount]:
+def get_lotofacil_result(concurso: int, table_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    if table_name is None:
+        response = get_table().get_item(Key={'concurso': concurso}, ReturnConsumedCapacity='TOTAL')
+    else:
+        # Client compartilhado entre as threads do lote
+        response = get_dynamodb().meta.client.get_item(
+            TableName=table_name, Key={'concurso': concurso}, ReturnConsumedCapacity='TOTAL'
+        )
+    metrics.current().increment('get_item_requests')
+    metrics.record_consumed_capacity(response)
+    # Decimals do DynamoDB convertidos uma única vez, na leitura
+    item = response.get('Item')
+    return to_plain(item) if item is not None else None
+
+def get_lotofacil_results_after(watermark: int, projection: bool = False) -> List[Dict[str, Any]]:
+    # 'concurso' é a chave da tabela e os concursos são sequenciais, então buscamos
+    # diretamente as chaves seguintes ao watermark em vez de varrer a tabela inteira.
+    # Um concurso faltando não encerra a busca: ela só para depois de
+    # INCREMENTAL_MAX_EMPTY_BATCHES lotes seguidos sem nenhum item.
+    table = get_table()
+    items = []
+    next_concurso = watermark + 1
+    batch_size = max(1, min(INCREMENTAL_BATCH_SIZE, 100))
+    empty_batches = 0
+
+    while True:
+        keys = [{'concurso': n} for n in range(next_concurso, next_concurso + batch_size)]
+        request = {table.name: {'Keys': keys}}
+        if projection:
+            request[table.name].update(_projection_kwargs())
+        batch_items = []
+
+        while request:
+            response = get_dynamodb().batch_get_item(RequestItems=request, ReturnConsumedCapacity='TOTAL')
+            page = response.get('Responses', {}).get(table.name, [])
+            batch_items.extend(page)
+            metrics.current().increment('batch_get_requests')
+            metrics.current().increment('items_read', len(page))
+            metrics.record_consumed_capacity(response)
+            request = response.get('UnprocessedKeys') or None
+
+        items.extend(batch_items)
+        empty_batches = 0 if batch_items else empty_batches + 1
+        if empty_batches >= max(1, INCREMENTAL_MAX_EMPTY_BATCHES):
+            break
+        next_concurso += batch_size
+
+    return list({item['concurso']: item for item in items}.values())
+
+def get_incremental_aggregates() -> LotofacilAggregates:
+    aggregates = load_snapshot(STATS_SNAPSHOT_PATH)
+    projected = aggregates is None
+
+    if aggregates is None:
+        print("Snapshot não encontrado, carregando histórico completo...")
+        aggregates = LotofacilAggregates()
+        with metrics.current().stage('scan'):
+            new_results = get_lotofacil_results(projection=True)
+    else:
+        print(f"Snapshot carregado até o concurso {aggregates.watermark}")
+        with metrics.current().stage('scan'):
+            new_results = get_lotofacil_results_after(aggregates.watermark)
+
+    with metrics.current().stage('normalization'):
+        added = aggregates.fold(new_results)
+    print(f"Concursos novos incorporados: {added}")
+
+    if added and projected:
+        # O scan completo só traz os atributos das análises
+        aggregates.last_result = get_lotofacil_result(aggregates.watermark) or aggregates.last_result
+
+    if added:
+        try:
+            save_snapshot(aggregates, STATS_SNAPSHOT_PATH)
+        except Exception as e:
+            print(f"Erro ao salvar snapshot: {str(e)}")
+
+    return aggregates
+
+def get_streaming_aggregates() -> StreamingAggregates:
+    # Cada página é incorporada assim que chega; os itens não ficam em memória
+    aggregates = StreamingAggregates()
+    with metrics.current().stage('scan'):
+        for page in iter_lotofacil_pages(projection=True):
+            aggregates.fold_page(page)
+    if aggregates.watermark:
+        # O scan só traz os atributos das análises
+        aggregates.last_result = get_lotofacil_result(aggregates.watermark)
+    return aggregates
+
+def count_lotofacil_results(max_concurso: int) -> int:
+    table = get_table()
+    scan_kwargs = {
+        'TableName': table.name,
+        'Select': 'COUNT',
+        'FilterExpression': '#concurso <= :max_concurso',
+        'ExpressionAttributeNames': {'#concurso': 'concurso'},
+        'ExpressionAttributeValues': {':max_concurso': max_concurso},
+        'ReturnConsumedCapacity': 'TOTAL'
+    }
+    total = 0
+    while True:
+        response = table.meta.client.scan(**scan_kwargs)
+        total += response.get('Count', 0)
+        metrics.current().increment('scan_pages')
+        metrics.record_consumed_capacity(response)
+        if 'LastEvaluatedKey' not in response:
+            return total
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _scan_draw_store() -> DrawStore:
+    with metrics.current().stage('scan'):
+        results = get_lotofacil_results(projection=True)
+    with metrics.current().stage('normalization'):
+        return LotofacilResultsListEntity.from_items(results).store()
+
+def load_draw_store() -> DrawStore:
+    if not DRAW_CACHE_PATH:
+        return _scan_draw_store()
+
+    cached = load_draw_cache(DRAW_CACHE_PATH)
+    full_store = None
+
+    if cached is not None and len(cached) and DRAW_CACHE_VALIDATE != 'off':
+        max_concurso = int(cached.concursos[-1])
+        if DRAW_CACHE_VALIDATE == 'checksum':
+            full_store = _scan_draw_store()
+            valid = draw_checksum(full_store, max_concurso) == draw_checksum(cached)
+        else:
+            valid = count_lotofacil_results(max_concurso) == len(cached)
+
+        if not valid:
+            print("Cache de concursos divergente da tabela, recarregando histórico completo...")
+            cached = None
+
+    if full_store is not None:
+        store = full_store
+    elif cached is None or not len(cached):
+        print("Sem cache de concursos válido, carregando histórico completo...")
+        store = _scan_draw_store()
+    else:
+        new_results = get_lotofacil_results_after(int(cached.concursos[-1]), projection=True)
+        print(f"Cache de concursos até {int(cached.concursos[-1])}, {len(new_results)} novos")
+        if not new_results:
+            return cached
+        store = cached.merge(LotofacilResultsListEntity.from_items(new_results).store())
+
+    if len(store):
+        try:
+            save_draw_cache(store, DRAW_CACHE_PATH)
+        except Exception as e:
+            print(f"Erro ao salvar cache de concursos: {str(e)}")
+    return store
+
+def apply_window(results: Union[DrawStore, List[Dict[str, Any]]], last_n: Optional[int] = None,
+                 concurso_range: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                 date_range: Optional[Tuple[Any, Any]] = None) -> DrawStore:
+    store = DrawStore.coerce(results)
+    if last_n is None and concurso_range is None and date_range is None:
+        return store
+    concurso_from, concurso_to = concurso_range or (None, None)
+    date_from, date_to = date_range or (None, None)
+    return store.window(
+        concurso_from, concurso_to, last_n=last_n,
+        date_from=_parse_date(date_from) if date_from is not None else None,
+        date_to=_parse_date(date_to) if date_to is not None else None
+    )
+
+def count_number_frequencies(results: Union[DrawStore, List[Dict[str, Any]]], **window) -> List[NumberCount]:
     try:
-        number_counts = {str(i).zfill(2): 0 for i in range(1, 26)}
-        
-        for result in results:
-            if 'dezenas' in result:
-                dezenas = result['dezenas']
-                for number in dezenas:
-                    if isinstance(number, int):
-                        number = str(number).zfill(2)
-                    elif isinstance(number, str) and len(number) == 1:
-                        number = number.zfill(2)
-                        
-                    if number in number_counts:
-                        number_counts[number] = number_counts.get(number, 0) + 1
-        
-        formatted_counts = [
-            {"number": number, "quantity": count} 
-            for number, count in number_counts.items()
-        ]
-        
-        result = sorted(formatted_counts, key=lambda x: x["quantity"], reverse=True)
-        return result
+        store = apply_window(results, **window)
+        if ANALYSIS_ENGINE == 'numpy':
+            return frequency_stats_from_counts(numpy_engine.frequencies(store))
+        return frequency_stats_from_counts(store.frequencies())
     except Exception as e:
         print(f"Erro ao contar frequências: {str(e)}")
         import traceback
         traceback.print_exc()
         return []
 
-def find_most_frequent_companions(results: List[Dict[str, Any]], top_numbers: List[NumberCount]) -> List[NumberWithCompanions]:
+def find_most_frequent_companions(results: Union[DrawStore, List[Dict[str, Any]]], top_numbers: List[NumberCount],
+                                  draw_size: int = DRAW_SIZE, **window) -> List[NumberWithCompanions]:
     try:
-        companions_result = []
-        
-        numbers_to_process = min(15, len(top_numbers))
-        
-        for number_data in top_numbers[:numbers_to_process]:
-            number = number_data["number"]
-            
-            companion_counts = {str(i).zfill(2): 0 for i in range(1, 26) if str(i).zfill(2) != number}
-            
-            for result in results:
-                if 'dezenas' not in result:
-                    continue
-                    
-                dezenas = result['dezenas']
-                normalized_dezenas = []
-                for n in dezenas:
-                    if isinstance(n, int):
-                        normalized_dezenas.append(str(n).zfill(2))
-                    elif isinstance(n, str):
-                        normalized_dezenas.append(n.zfill(2) if len(n) == 1 else n)
-                
-                if number in normalized_dezenas:
-                    for companion in normalized_dezenas:
-                        if companion != number and companion in companion_counts:
-                            companion_counts[companion] = companion_counts.get(companion, 0) + 1
-            
-            top_companions = sorted(
-                [{"number": n, "quantity": c} for n, c in companion_counts.items() if c > 0],
-                key=lambda x: x["quantity"],
-                reverse=True
-            )
-            
-            max_companions = min(14, len(top_companions))
-            top_companions = top_companions[:max_companions]
-            
-            companions_result.append({
-                "number": number,
-                "most_frequent": top_companions
-            })
-        
-        return companions_result
+        store = apply_window(results, **window)
+        return companion_stats_from_pairs(_pair_counts(store), top_numbers, draw_size)
     except Exception as e:
         print(f"Erro ao encontrar companheiros: {str(e)}")
         import traceback
         traceback.print_exc()
         return []
 
-def calculate_average_gap(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _pair_counts(store: DrawStore) -> List[List[int]]:
+    if ANALYSIS_ENGINE == 'numpy':
+        return numpy_engine.pair_counts(store)
+    return store.pair_counts()
+
+def companion_triples(store: DrawStore, pairs: List[List[int]], top_k: int) -> List[Tuple[Tuple[int, int], List[int]]]:
+    selected = top_pairs(pairs, top_k)
+    if ANALYSIS_ENGINE == 'numpy':
+        counts = numpy_engine.triple_counts(store, selected)
+    else:
+        counts = store.triple_counts(selected)
+    return list(zip(selected, counts))
+
+def calculate_companion_matrix(results: Union[DrawStore, List[Dict[str, Any]]], triple_top_k: int = 0, **window) -> Dict[str, Any]:
     try:
-        sorted_results = sorted(results, key=lambda x: x.get('concurso', 0))
-        
-        last_appearance = {str(i).zfill(2): None for i in range(1, 26)}
-        gaps = {str(i).zfill(2): [] for i in range(1, 26)}
-        
-        for result in sorted_results:
-            if 'dezenas' not in result or 'concurso' not in result:
-                print(f"Resultado sem dezenas ou concurso: {result.keys()}")
-                continue
-                
-            concurso = result['concurso']
-            dezenas = result['dezenas']
-            
-            for num in range(1, 26):
-                num_str = str(num).zfill(2)
-                
-                if num_str in dezenas:
-                    if last_appearance[num_str] is not None:
-                        gap = concurso - last_appearance[num_str]
-                        gaps[num_str].append(gap)
-                    
-                    last_appearance[num_str] = concurso
-        
-        avg_gaps = []
-        for num in range(1, 26):
-            num_str = str(num).zfill(2)
-            
-            if len(gaps[num_str]) > 0:
-                avg_gap = mean(gaps[num_str])
-                med_gap = median(gaps[num_str])
-                min_gap = min(gaps[num_str])
-                max_gap = max(gaps[num_str])
-            else:
-                avg_gap = 0
-                med_gap = 0
-                min_gap = 0
-                max_gap = 0
-                
-            avg_gaps.append({
-                "number": num_str,
-                "avg_gap": round(avg_gap, 2),  # Arredondar para 2 casas decimais
-                "median_gap": med_gap,
-                "min_gap": min_gap,
-                "max_gap": max_gap,
-                "total_appearances": len(gaps[num_str]) + 1 if last_appearance[num_str] is not None else 0
-            })
-        
-        result = sorted(avg_gaps, key=lambda x: x["avg_gap"])
-        return result
+        store = apply_window(results, **window)
+        pairs = _pair_counts(store)
+        counts = [pairs[i][i] for i in range(len(pairs))]
+        triples = companion_triples(store, pairs, triple_top_k) if triple_top_k > 0 else None
+        return companion_matrix_from_pairs(pairs, counts, triples)
+    except Exception as e:
+        print(f"Erro ao calcular matriz de companheiros: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {}
+
+def calculate_average_gap(results: Union[DrawStore, List[Dict[str, Any]]], **window) -> List[Dict[str, Any]]:
+    try:
+        store = apply_window(results, **window)
+        if ANALYSIS_ENGINE == 'numpy':
+            gaps, last_appearance = numpy_engine.gaps(store)
+        else:
+            gaps, last_appearance = store.gaps()
+        return average_gap_stats_from_gaps(gaps, last_appearance)
     except Exception as e:
         print(f"Erro ao calcular average_gap: {str(e)}")
         import traceback
         traceback.print_exc()
         return []
 
-def predict_next_combinations(frequency_stats: List[NumberCount], companion_stats: List[NumberWithCompanions], average_gap_stats: List[Dict[str, Any]]) -> List[List[str]]:
-    import random
-    
-    possible_combinations = []
-    
-    top_numbers = [num['number'] for num in frequency_stats[:10]]
-    top_gap_numbers = [num['number'] for num in sorted(average_gap_stats, key=lambda x: x['avg_gap'])[:5]]
-    combined_top_numbers = list(set(top_numbers + top_gap_numbers))
-    
-    for _ in range(10):
-        combination = set(combined_top_numbers)
-        
-        for number in combined_top_numbers:
-            companions = next((comp['most_frequent'] for comp in companion_stats if comp['number'] == number), [])
-            companions = [comp['number'] for comp in companions]
-            
-            while len(combination) < 15 and companions:
-                companion = random.choice(companions)
-                combination.add(companion)
-                companions.remove(companion)
-        
-        while len(combination) < 15:
-            random_number = str(random.randint(1, 25)).zfill(2)
-            combination.add(random_number)
-        
-        possible_combinations.append(sorted(combination))
-    
-    return possible_combinations
+def calculate_rolling_frequencies(results: Union[DrawStore, List[Dict[str, Any]]], window: int = DEFAULT_ROLLING_WINDOW) -> Dict[str, Any]:
+    try:
+        store = DrawStore.coerce(results)
+        valid = store.window(concurso_from=0)
+        rolling = valid.rolling_frequencies(window)
+        return {
+            'window': window,
+            'concursos': valid.concursos.tolist(),
+            'frequencies': {number: rolling[:, i].tolist() for i, number in enumerate(numbers_for(valid.universe))}
+        }
+    except Exception as e:
+        print(f"Erro ao calcular frequências móveis: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {}
 
-def train_and_predict_combinations(results: List[Dict[str, Any]]) -> Dict[str, List[List[str]]]:
-    X = []  # Características
-    y = []  # Rótulos
-    
-    for result in results:
-        if 'dezenas' in result:
-            dezenas = result['dezenas']
-            X.append([int(num) for num in dezenas])
-            y.append(1)  # Rótulo fictício, pois estamos prevendo combinações
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    dt_model = DecisionTreeClassifier()
-    dt_model.fit(X_train, y_train)
-    
-    knn_model = KNeighborsClassifier(n_neighbors=3)
-    knn_model.fit(X_train, y_train)
-    
-    dt_predictions = dt_model.predict(X_test[:5])  # Prever 5 combinações
-    knn_predictions = knn_model.predict(X_test[:5])  # Prever 5 combinações
-    
-    dt_combinations = [sorted([str(num).zfill(2) for num in X_test[i]]) for i in range(len(dt_predictions))]
-    knn_combinations = [sorted([str(num).zfill(2) for num in X_test[i]]) for i in range(len(knn_predictions))]
-    
-    return {
-        'DecisionTree': dt_combinations,
-        'KNN': knn_combinations
-    }
+def predict_next_combinations(frequency_stats: List[NumberCount], companion_stats: List[NumberWithCompanions],
+                              average_gap_stats: List[Dict[str, Any]], count: int = DEFAULT_COMBINATION_COUNT,
+                              seed: Optional[int] = None, exclude: Optional[Any] = None) -> List[List[str]]:
+    # Amostragem ponderada sem reposição (pesos de frequência, intervalo e companheiros),
+    # vetorizada e sem combinações repetidas; com `seed` o resultado é reprodutível.
+    # `exclude` são as máscaras que não podem ser geradas (concursos já sorteados)
+    weights = number_weights(frequency_stats, companion_stats, average_gap_stats)
+    return generate_combinations(weights, count, seed, exclude)
+
+def annotate_predictions(index: DrawIndex, computed: Dict[str, Any]) -> Dict[str, Any]:
+    # Cada previsão calculada nesta requisição com a indicação de já ter sido sorteada
+    # e o concurso passado mais parecido (maior número de acertos)
+    try:
+        history = {}
+        if 'simple_predictions' in computed:
+            history['simple_predictions'] = index.annotate(computed['simple_predictions'], CLOSEST_DRAWS_LIMIT)
+        if 'trained_predictions' in computed:
+            history['trained_predictions'] = {
+                name: index.annotate(combinations, CLOSEST_DRAWS_LIMIT)
+                for name, combinations in computed['trained_predictions'].items()
+            }
+        if 'ranked_combinations' in computed:
+            history['ranked_combinations'] = index.annotate(
+                [item['dezenas'] for item in computed['ranked_combinations']], CLOSEST_DRAWS_LIMIT
+            )
+        return history
+    except Exception as e:
+        print(f"Erro ao comparar previsões com o histórico: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {}
 
+def get_model_artifacts() -> Optional[ModelArtifacts]:
+    global model_artifacts
+    if model_artifacts is None and MODEL_ARTIFACT_URL:
+        model_artifacts = ModelArtifacts(open_model_store(MODEL_ARTIFACT_URL))
+    return model_artifacts
+
+def train_and_predict_combinations(results: Union[DrawStore, List[Dict[str, Any]]], persist: bool = False) -> Dict[str, List[List[str]]]:
+    # Modelos por número (multi-rótulo) treinados com features dos concursos anteriores;
+    # o scikit-learn só é importado aqui. Com `persist`, os modelos são reaproveitados
+    # do último artefato e só retreinados quando há concursos novos
+    artifacts = get_model_artifacts() if persist else None
+    return ml_pipeline.train_and_predict(DrawStore.coerce(results), artifacts=artifacts)
+
+def get_ranking_cache() -> RankingCache:
+    # O ranking fica junto dos artefatos de modelo e vale até chegar um concurso novo
+    global ranking_cache
+    if ranking_cache is None:
+        ranking_cache = RankingCache(open_model_store(MODEL_ARTIFACT_URL) if MODEL_ARTIFACT_URL else None)
+    return ranking_cache
+
+def rank_all_combinations(results: Union[DrawStore, List[Dict[str, Any]]], frequency_stats: List[NumberCount],
+                          companion_stats: List[NumberWithCompanions], average_gap_stats: List[Dict[str, Any]],
+                          top_k: int = SCORING_TOP_K, persist: bool = False) -> List[Dict[str, Any]]:
+    # Pontua as 3.268.760 apostas possíveis contra o histórico (concursos com 11+ acertos)
+    # e pelos pesos das dezenas; com `persist`, o ranking é reaproveitado por watermark
+    try:
+        weights = number_weights(frequency_stats, companion_stats, average_gap_stats)
+        cache = get_ranking_cache() if persist else None
+        return top_combinations(DrawStore.coerce(results), weights, top_k, cache)
+    except Exception as e:
+        print(f"Erro ao ranquear combinações: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return []
+
+
+def get_http_session():
+    # Sessão única por container: reaproveita conexões (keep-alive) entre login e envio
+    # e entre invocações quentes
+    global http_session
+    if http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # Erro de leitura não é repetido: o POST pode já ter chegado à API e seria
+        # enviado de novo. Repetem-se só falhas de conexão e os status de API_RETRY_STATUSES
+        retry = Retry(
+            total=API_MAX_RETRIES,
+            read=0,
+            backoff_factor=API_RETRY_BACKOFF,
+            status_forcelist=API_RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'POST']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=API_POOL_SIZE)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        http_session = session
+    return http_session
+
+def _api_timeout() -> Tuple[float, float]:
+    return (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    # Lê apenas o 'exp' do payload; a assinatura é validada pela API
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp is not None else None
+    except Exception:
+        return None
+
+def invalidate_access_token() -> None:
+    global cached_access_token, cached_token_expires_at
+    cached_access_token = None
+    cached_token_expires_at = 0.0
+
+def get_access_token(force_login: bool = False) -> str:
+    global cached_access_token, cached_token_expires_at
+    if (not force_login and cached_access_token
+            and time.time() < cached_token_expires_at - API_TOKEN_REFRESH_MARGIN):
+        return cached_access_token
+
+    access_token = login_api()
+    expires_at = _jwt_expiry(access_token)
+    cached_access_token = access_token
+    cached_token_expires_at = expires_at if expires_at is not None else time.time() + API_TOKEN_DEFAULT_TTL
+    return access_token
 
 def login_api() -> str:
+    import requests
 
     api_url = os.environ.get('API_URL')
     if not api_url:
@@ -269,7 +648,9 @@ def login_api() -> str:
     }
     
     try:
-        response = requests.post(login_url, json=login_data)
+        with metrics.current().stage('api_login'):
+            response = get_http_session().post(login_url, json=login_data, timeout=_api_timeout())
+        metrics.current().increment('api_logins')
         response.raise_for_status()
         
         token_data = response.json()
@@ -283,80 +664,592 @@ def login_api() -> str:
     except requests.exceptions.RequestException as e:
         raise Exception(f"Failed to login: {str(e)}")
 
-def send_data_to_api(data: Dict[str, Any], api_url: str) -> None:
+def send_data_to_api(data: str, api_url: str) -> bool:
+    import requests
+
     try:
-        # Converter a string JSON para um dicionário
-        data_dict = json.loads(data)
-        access_token = login_api()
-        headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'Bearer {access_token}'
-    }
+        # O corpo já vem serializado pelo lambda_handler; só é codificado e comprimido
+        payload = data.encode('utf-8')
+        content_headers = {'Content-Type': 'application/json'}
+        if API_COMPRESSION == 'gzip':
+            payload = gzip.compress(payload, compresslevel=API_GZIP_LEVEL)
+            content_headers['Content-Encoding'] = 'gzip'
+        metrics.current().increment('api_bytes_sent', len(payload))
+        session = get_http_session()
+
+        for attempt in range(2):
+            headers = {
+                **content_headers,
+                'Authorization': f'Bearer {get_access_token(force_login=attempt > 0)}'
+            }
+            with metrics.current().stage('api_post'):
+                response = session.post(
+                    f"{api_url}/lotofacil/analisys", data=payload, headers=headers, timeout=_api_timeout()
+                )
+            if response.status_code != 401:
+                break
+            # Token revogado ou expirado antes do previsto: novo login e uma nova tentativa
+            print("Token recusado pela API, refazendo login...")
+            invalidate_access_token()
 
-        response = requests.post(f"{api_url}/lotofacil/analisys", json=data_dict, headers=headers)
         response.raise_for_status()
         print(f"Dados enviados com sucesso para a API: {response.status_code}")
-
-        # for key, value in data_dict.items():
-        #     payload = {key: value}
-        #     print(f"Enviando {key} para a API...")
-        #     response = requests.post(api_url, json=payload)
-        #     response.raise_for_status()
-        #     print(f"Dados de {key} enviados com sucesso para a API: {response.status_code}")
+        return True
     except requests.exceptions.RequestException as e:
         print(f"Erro ao enviar dados para a API: {e}")
+        return False
+
+DEFAULT_SECTIONS = (
+    'frequency_stats',
+    'companion_stats',
+    'last_result',
+    'average_gap_stats',
+    'simple_predictions',
+    'trained_predictions'
+)
+
+# Seções calculadas só quando pedidas explicitamente
+OPTIONAL_SECTIONS = (
+    'companion_matrix',
+    'rolling_frequency_stats',
+    'ranked_combinations',
+    'prediction_history',
+)
+
+ALL_SECTIONS = DEFAULT_SECTIONS + OPTIONAL_SECTIONS
+
+# Seções disponíveis para os demais jogos (games.py): só as estatísticas, que não
+# dependem de 25 dezenas; previsões, cache local e modo incremental são da Lotofácil
+GAME_DEFAULT_SECTIONS = ('frequency_stats', 'companion_stats', 'last_result', 'average_gap_stats')
+GAME_SECTIONS = GAME_DEFAULT_SECTIONS + ('companion_matrix', 'rolling_frequency_stats')
+
+# Jogos analisados em paralelo em um evento com 'games'
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '4'))
+
+# 'records' (listas de objetos, formato original) ou 'columnar' (uma lista por campo)
+OUTPUT_FORMATS = ('records', 'columnar')
+
+# Seções calculadas a partir de outras seções
+SECTION_DEPENDENCIES = {
+    'companion_stats': ('frequency_stats', 'companion_matrix'),
+    'simple_predictions': ('frequency_stats', 'companion_stats', 'average_gap_stats'),
+    'ranked_combinations': ('frequency_stats', 'companion_stats', 'average_gap_stats'),
+    'prediction_history': ('simple_predictions',),
+}
+
+@dataclass
+class AnalysisRequest:
+    sections: List[str]
+    push: bool
+    concurso_from: Optional[int] = None
+    concurso_to: Optional[int] = None
+    last_n: Optional[int] = None
+    date_from: Optional[int] = None
+    date_to: Optional[int] = None
+    rolling_window: int = DEFAULT_ROLLING_WINDOW
+    triple_top_k: int = 0
+    output_format: str = 'records'
+    combination_count: int = DEFAULT_COMBINATION_COUNT
+    seed: Optional[int] = None
+    top_k: int = SCORING_TOP_K
+
+    @property
+    def windowed(self) -> bool:
+        return any(value is not None for value in (
+            self.concurso_from, self.concurso_to, self.last_n, self.date_from, self.date_to
+        ))
+
+    @property
+    def is_full_analysis(self) -> bool:
+        return self.sections == list(DEFAULT_SECTIONS) and not self.windowed and self.output_format == 'records'
+
+    @property
+    def variant(self) -> str:
+        return (
+            f"{','.join(self.sections)}:{self.concurso_from}-{self.concurso_to}:"
+            f"{self.last_n}:{self.date_from}-{self.date_to}:{self.rolling_window}:{self.triple_top_k}:"
+            f"{self.output_format}:{self.combination_count}:{self.seed}:{self.top_k}"
+        )
+
+def resolve_sections(event: Optional[Dict[str, Any]]) -> List[str]:
+    requested = (event or {}).get('sections') or list(DEFAULT_SECTIONS)
+    unknown = [section for section in requested if section not in ALL_SECTIONS]
+    if unknown:
+        raise ValueError(f"Seções desconhecidas: {', '.join(unknown)}")
+    return [section for section in ALL_SECTIONS if section in requested]
+
+def _parse_range(value: Any, name: str, parse) -> Tuple[Optional[int], Optional[int]]:
+    value = value or {}
+    if isinstance(value, (list, tuple)):
+        if len(value) != 2:
+            raise ValueError(f"{name} deve ter dois valores: [inicio, fim]")
+        value = {'from': value[0], 'to': value[1]}
+    start = parse(value['from']) if value.get('from') is not None else None
+    end = parse(value['to']) if value.get('to') is not None else None
+    if start is not None and end is not None and start > end:
+        raise ValueError(f"{name} inválido: início maior que o fim")
+    return start, end
+
+def _parse_date(value: Any) -> int:
+    parsed = parse_draw_date(value)
+    if parsed == MISSING_DATE:
+        raise ValueError(f"Data inválida: {value}")
+    return parsed
+
+def parse_analysis_request(event: Optional[Dict[str, Any]]) -> AnalysisRequest:
+    event = event or {}
+    sections = resolve_sections(event)
+    concurso_from, concurso_to = _parse_range(event.get('concurso_range'), 'concurso_range', int)
+    date_from, date_to = _parse_range(event.get('date_range'), 'date_range', _parse_date)
+
+    last_n = event.get('last_n')
+    if last_n is not None and int(last_n) <= 0:
+        raise ValueError("last_n deve ser maior que zero")
+    rolling_window = int(event.get('rolling_window') or DEFAULT_ROLLING_WINDOW)
+    if rolling_window <= 0:
+        raise ValueError("rolling_window deve ser maior que zero")
+    triple_top_k = int(event.get('triple_top_k') or 0)
+    if not 0 <= triple_top_k <= 300:
+        raise ValueError("triple_top_k deve estar entre 0 e 300")
+    combination_count = int(event.get('combination_count') or DEFAULT_COMBINATION_COUNT)
+    if not 1 <= combination_count <= MAX_COMBINATION_COUNT:
+        raise ValueError(f"combination_count deve estar entre 1 e {MAX_COMBINATION_COUNT}")
+    seed = event.get('seed')
+    top_k = int(event.get('top_k') or SCORING_TOP_K)
+    if not 1 <= top_k <= SCORING_CACHE_SIZE:
+        raise ValueError(f"top_k deve estar entre 1 e {SCORING_CACHE_SIZE}")
+    output_format = (event.get('format') or 'records').lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato desconhecido: {output_format}")
+
+    request = AnalysisRequest(
+        sections=sections,
+        push=False,
+        concurso_from=concurso_from,
+        concurso_to=concurso_to,
+        last_n=int(last_n) if last_n is not None else None,
+        date_from=date_from,
+        date_to=date_to,
+        rolling_window=rolling_window,
+        triple_top_k=triple_top_k,
+        output_format=output_format,
+        combination_count=combination_count,
+        seed=int(seed) if seed is not None else None,
+        top_k=top_k
+    )
+    # Por padrão só a análise completa é enviada para a API
+    push = event.get('push')
+    request.push = bool(push) if push is not None else request.is_full_analysis
+    return request
+
+def expand_section_dependencies(sections: List[str]) -> set:
+    needed = set()
+    pending = list(sections)
+    while pending:
+        section = pending.pop()
+        if section not in needed:
+            needed.add(section)
+            pending.extend(SECTION_DEPENDENCIES.get(section, ()))
+    return needed
+
+def get_latest_concurso() -> Optional[int]:
+    global latest_concurso_hint
+    if latest_concurso_hint is None:
+        cached = warm_cache.latest(key=lambda k: k[0])
+        if cached is not None:
+            latest_concurso_hint = cached[0][0]
+
+    if latest_concurso_hint is None:
+        # Sem referência no container: scan projetando apenas a chave
+        items = get_lotofacil_results(projection=True, attributes=('concurso',))
+        if items:
+            latest_concurso_hint = max(int(item['concurso']) for item in items)
+        return latest_concurso_hint
+
+    new_results = get_lotofacil_results_after(latest_concurso_hint, projection=True)
+    if new_results:
+        latest_concurso_hint = max(int(item['concurso']) for item in new_results)
+    return latest_concurso_hint
+
+def get_warm_analysis(variant: str) -> Tuple[Optional[Dict[str, Any]], Optional[DrawStore]]:
+    # Descobre o último concurso consultando só as chaves seguintes às já conhecidas
+    cached = warm_cache.latest(key=lambda k: k[0])
+    if cached is None:
+        return None, None
+
+    (latest_concurso, _), entry = cached
+    new_results = get_lotofacil_results_after(latest_concurso, projection=True)
+    if new_results:
+        print(f"{len(new_results)} concursos novos desde a última execução em memória")
+        return None, entry['store'].merge(LotofacilResultsListEntity.from_items(new_results).store())
+
+    return warm_cache.get((latest_concurso, variant)), entry['store']
+
+def serialize_sections(computed: Dict[str, Any], sections: Sequence[str], output_format: str = 'records') -> Dict[str, str]:
+    # Cada seção é serializada uma única vez; o corpo da resposta e o envio
+    # (completo ou delta) são montados a partir desses trechos
+    if output_format == 'columnar':
+        return {section: dumps(to_columnar(computed[section])) for section in sections}
+    return {section: dumps(computed[section]) for section in sections}
+
+def join_sections(section_bodies: Dict[str, str]) -> str:
+    return join_objects(section_bodies)
+
+def _push_state_table():
+    return get_dynamodb().Table(PUSH_STATE_TABLE) if PUSH_STATE_TABLE else None
+
+def enqueue_analysis(section_bodies: Dict[str, str]) -> bool:
+    try:
+        with metrics.current().stage('outbox_enqueue'):
+            message = dumps({'enqueued_at': time.time(), 'sections': section_bodies})
+            message_id = open_outbox(OUTBOX_URL, OUTBOX_VISIBILITY_TIMEOUT).send_message(message)
+        print(f"Análise enfileirada para envio: {message_id}")
+        return True
+    except Exception as e:
+        print(f"Erro ao enfileirar análise: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def push_analysis(section_bodies: Dict[str, str], request: AnalysisRequest) -> bool:
+    if not request.push:
+        print("Envio para a API não solicitado.")
+        return False
+    if API_DISPATCH_MODE == 'outbox':
+        return enqueue_analysis(section_bodies)
+    return deliver_sections(section_bodies)
+
+def deliver_sections(section_bodies: Dict[str, str]) -> bool:
+    api_url = os.getenv('API_URL')
+    if not api_url:
+        print("API_URL não está definida nas variáveis de ambiente.")
+        return False
+
+    if API_PUSH_MODE != 'delta':
+        return send_data_to_api(join_sections(section_bodies), api_url)
+
+    state_table = _push_state_table()
+    state = load_push_state(PUSH_STATE_PATH, state_table)
+    hashes = {section: section_hash(body) for section, body in section_bodies.items()}
+    changed = {section: body for section, body in section_bodies.items() if state.get(section) != hashes[section]}
+    metrics.current().increment('api_sections_skipped', len(section_bodies) - len(changed))
+    if not changed:
+        print("Nenhuma seção mudou desde o último envio, nada a enviar.")
+        return True
+
+    print(f"Enviando seções alteradas: {', '.join(changed)}")
+    sent = send_data_to_api(join_sections(changed), api_url)
+    if sent:
+        state.update({section: hashes[section] for section in changed})
+        try:
+            save_push_state(state, PUSH_STATE_PATH, state_table)
+        except Exception as e:
+            print(f"Erro ao salvar estado de envio: {str(e)}")
+    return sent
 
 def lambda_handler(event, context):
+    event = event or {}
+    # Evento que não é objeto é recusado pelo dispatch_event; aqui só lemos as opções
+    options = event if isinstance(event, dict) else {}
+    invocation = metrics.start_invocation(
+        getattr(context, 'function_name', os.getenv('AWS_LAMBDA_FUNCTION_NAME', '')),
+        getattr(context, 'aws_request_id', ''),
+        track_memory=bool(options.get('trace_memory'))
+    )
+    try:
+        try:
+            with metrics.capture_profile(
+                invocation.request_id or str(int(invocation.started_at * 1000)),
+                cprofile=bool(options.get('profile')), trace_memory=bool(options.get('trace_memory'))
+            ):
+                response = dispatch_event(event)
+        except Exception as e:
+            # Nenhum erro sai do handler sem virar resposta 500
+            response = _error_response(e)
+        invocation.set_property('statusCode', response['statusCode'])
+        return response
+    finally:
+        # Um único registro de métricas por invocação
+        metrics.finish_invocation()
+
+def _error_response(e: Exception) -> Dict[str, Any]:
+    print(f"ERRO: {str(e)}")
+    import traceback
+    traceback.print_exc()
+    return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+
+def dispatch_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    # 'games' analisa vários jogos na mesma invocação; 'game' escolhe um jogo (padrão: Lotofácil)
+    try:
+        if not isinstance(event, dict):
+            raise ValueError("O evento deve ser um objeto JSON")
+        if 'games' in event:
+            jobs = parse_batch_event(event)
+        else:
+            jobs = [(get_game(event.get('game') or DEFAULT_GAME), event)]
+    except ValueError as e:
+        return _error_response(e)
+    if 'games' in event:
+        return handle_batch(jobs)
+    return analyze_game(*jobs[0])
+
+def analyze_game(game: Game, event: Dict[str, Any]) -> Dict[str, Any]:
+    if game.key == DEFAULT_GAME:
+        return handle_analysis(event)
+    return handle_game_analysis(game, event)
+
+def parse_batch_event(event: Dict[str, Any]) -> List[Tuple[Game, Dict[str, Any]]]:
+    # Cada item de 'games' é o nome do jogo ou um evento próprio ({"game": ..., "sections": ...});
+    # as demais chaves do evento valem para todos os jogos
+    entries = event.get('games')
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("games deve ser uma lista de jogos")
+    base = {key: value for key, value in event.items() if key not in ('games', 'game', 'profile', 'trace_memory')}
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            spec = {'game': entry}
+        elif isinstance(entry, dict):
+            spec = dict(entry)
+        else:
+            raise ValueError(f"Item inválido em games: {entry!r} (use o nome do jogo ou um objeto)")
+        game = get_game(spec.get('game') or DEFAULT_GAME)
+        if any(existing.key == game.key for existing, _ in jobs):
+            raise ValueError(f"Jogo repetido no lote: {game.key}")
+        jobs.append((game, {**base, **spec}))
+    return jobs
+
+def handle_batch(jobs: List[Tuple[Game, Dict[str, Any]]]) -> Dict[str, Any]:
+    invocation = metrics.current()
+    try:
+        invocation.set_property('games', [game.key for game, _ in jobs])
+        # Resource, client e sessão HTTP criados antes das threads e compartilhados
+        # por todos os jogos do lote
+        get_dynamodb()
+        if any(game.key == DEFAULT_GAME for game, _ in jobs):
+            get_table()
+            if os.getenv('API_URL'):
+                get_http_session()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), BATCH_MAX_WORKERS))) as executor:
+            responses = list(executor.map(lambda job: analyze_game(*job), jobs))
+
+        failed = [game.key for (game, _), response in zip(jobs, responses) if response['statusCode'] != 200]
+        if failed:
+            print(f"Jogos com erro no lote: {', '.join(failed)}")
+        return {
+            'statusCode': 500 if failed else 200,
+            'body': join_objects({game.key: response['body'] for (game, _), response in zip(jobs, responses)})
+        }
+    except Exception as e:
+        return _error_response(e)
+
+def handle_game_analysis(game: Game, event: Dict[str, Any]) -> Dict[str, Any]:
+    # Estatísticas de outro jogo: mesmo formato de resposta da Lotofácil, com o universo
+    # e a quantidade de dezenas sorteadas do jogo. Não há envio para a API
+    invocation = metrics.current()
+    try:
+        print(f"Iniciando análise da {game.name}...")
+        request = parse_analysis_request({**event, 'sections': event.get('sections') or list(GAME_DEFAULT_SECTIONS)})
+        needed = expand_section_dependencies(request.sections)
+        unsupported = sorted(needed - set(GAME_SECTIONS))
+        if unsupported:
+            raise ValueError(f"Seções não disponíveis para {game.name}: {', '.join(unsupported)}")
+
+        with invocation.stage(f'{game.key}_scan'):
+            results = get_lotofacil_results(projection=True, table_name=game.table_name)
+        with invocation.stage(f'{game.key}_normalization'):
+            store = DrawStore.from_results(results, game.universe)
+        print(f"Resultados obtidos ({game.name}): {len(store)} itens")
+        invocation.increment(f'{game.key}_draws', len(store))
+        if request.windowed:
+            store = store.window(
+                request.concurso_from, request.concurso_to,
+                last_n=request.last_n, date_from=request.date_from, date_to=request.date_to
+            )
+        if not len(store):
+            raise Exception(f"Nenhum resultado encontrado na tabela {game.table_name}")
+
+        computed = {}
+        with invocation.stage(f'{game.key}_analysis'):
+            if 'last_result' in needed:
+                computed['last_result'] = get_lotofacil_result(int(store.concursos[-1]), game.table_name)
+            if 'frequency_stats' in needed:
+                computed['frequency_stats'] = count_number_frequencies(store)
+            if 'companion_matrix' in needed:
+                computed['companion_matrix'] = calculate_companion_matrix(store, request.triple_top_k)
+            if 'companion_stats' in needed:
+                computed['companion_stats'] = companion_stats_from_pairs(
+                    computed['companion_matrix']['matrix'], computed['frequency_stats'], game.draw_size
+                )
+            if 'average_gap_stats' in needed:
+                computed['average_gap_stats'] = calculate_average_gap(store)
+            if 'rolling_frequency_stats' in needed:
+                computed['rolling_frequency_stats'] = calculate_rolling_frequencies(store, request.rolling_window)
+
+        with invocation.stage(f'{game.key}_serialization'):
+            section_bodies = serialize_sections(computed, request.sections, request.output_format)
+        return {'statusCode': 200, 'body': join_sections(section_bodies)}
+
+    except Exception as e:
+        return _error_response(e)
+
+def handle_analysis(event):
+    global latest_concurso_hint
+    invocation = metrics.current()
     try:
         print("Iniciando lambda_handler...")
-        results = get_lotofacil_results()
-        print(f"Resultados obtidos: {len(results)} itens")
+        request = parse_analysis_request(event)
+        needed = expand_section_dependencies(request.sections)
+        invocation.set_property('sections', request.sections)
+
+        if needed == {'last_result'} and not request.windowed:
+            # Consulta rápida: só descobre o último concurso e lê o item. Com janela,
+            # o último concurso da janela sai do caminho completo, como nas demais seções
+            latest = get_latest_concurso()
+            last_result = get_lotofacil_result(latest) if latest is not None else None
+            if last_result is None:
+                raise Exception("Nenhum resultado encontrado na tabela DynamoDB")
+            invocation.set_property('path', 'last_result')
+            with invocation.stage('serialization'):
+                section_bodies = serialize_sections({'last_result': last_result}, ['last_result'], request.output_format)
+                response = {'statusCode': 200, 'body': join_sections(section_bodies)}
+            push_analysis(section_bodies, request)
+            return response
+
+        analysis_mode = os.getenv('ANALYSIS_MODE', 'full').lower()
+        if analysis_mode not in ('incremental', 'streaming'):
+            analysis_mode = 'full'
+        variant = f"{analysis_mode}:{ANALYSIS_ENGINE}:{request.variant}"
+
+        warm_entry, store = get_warm_analysis(variant)
+        if warm_entry is not None:
+            print(f"Nenhum concurso novo, reaproveitando a análise em memória do concurso {warm_entry['concurso']}")
+            invocation.set_property('path', 'warm_cache')
+            response = {'statusCode': 200, 'body': warm_entry['body']}
+            if request.push and (WARM_CACHE_RESEND or not warm_entry['sent']):
+                warm_entry['sent'] = push_analysis(warm_entry['sections'], request)
+            return response
+
+        if analysis_mode == 'streaming' and store is not None:
+            # Concursos novos já somados ao histórico em memória: recalcula a partir dele
+            analysis_mode = 'full'
+        incremental = analysis_mode != 'full'
+        if analysis_mode == 'incremental':
+            aggregates = get_incremental_aggregates()
+            store = aggregates.store()
+        elif analysis_mode == 'streaming':
+            # Estatísticas somadas página a página durante o scan
+            aggregates = get_streaming_aggregates()
+            store = aggregates.store()
+        elif store is None:
+            # Normaliza as dezenas uma única vez para todas as análises
+            store = load_draw_store()
+        print(f"Resultados obtidos: {len(store)} itens")
+        invocation.set_property('path', analysis_mode)
+        invocation.increment('draws', len(store))
         
-        if not results:
+        if not len(store):
             raise Exception("Nenhum resultado encontrado na tabela DynamoDB")
-            
-        frequency_stats = count_number_frequencies(results)
-        
-        companion_stats = find_most_frequent_companions(results, frequency_stats)
-
-        average_gap_stats = calculate_average_gap(results)
-
-        simple_predictions = predict_next_combinations(frequency_stats, companion_stats, average_gap_stats)
-
-        trained_predictions = train_and_predict_combinations(results)
-
-        last_result = None
-        if results:
-            sorted_results = sorted(results, key=lambda x: x.get('concurso', 0), reverse=True)
-            last_result = sorted_results[0] if sorted_results else None
-                
-        response = {
-            'statusCode': 200,
-            'body': json.dumps({
-                'frequency_stats': frequency_stats,
-                'companion_stats': companion_stats,
-                'last_result': last_result,
-                'average_gap_stats': average_gap_stats,
-                'simple_predictions': simple_predictions,
-                'trained_predictions': trained_predictions
-            }, cls=DecimalEncoder)
-        }
 
-        api_url = os.getenv('API_URL')
-        if api_url:
-            send_data_to_api(response['body'], api_url)
-        else:
-            print("API_URL não está definida nas variáveis de ambiente.")
+        full_store = store
+        latest_concurso_hint = int(full_store.concursos[-1])
+        if request.windowed:
+            # Agregados incrementais cobrem o histórico inteiro; a janela usa o DrawStore
+            incremental = False
+            store = store.window(
+                request.concurso_from, request.concurso_to,
+                last_n=request.last_n, date_from=request.date_from, date_to=request.date_to
+            )
+            print(f"Janela de concursos: {len(store)} itens")
+            if not len(store):
+                raise Exception("Nenhum concurso na janela solicitada")
+
+        computed = {}
+
+        if 'last_result' in needed:
+            with invocation.stage('last_result'):
+                if incremental:
+                    computed['last_result'] = aggregates.last_result
+                else:
+                    computed['last_result'] = get_lotofacil_result(int(store.concursos[-1]))
+
+        if 'frequency_stats' in needed:
+            with invocation.stage('frequency_stats'):
+                if incremental:
+                    computed['frequency_stats'] = aggregates.frequency_stats()
+                else:
+                    computed['frequency_stats'] = count_number_frequencies(store)
+
+        if 'companion_matrix' in needed:
+            with invocation.stage('companion_matrix'):
+                # Matriz completa em uma passada; companion_stats é derivado dela
+                if incremental:
+                    triples = None
+                    if request.triple_top_k:
+                        triples = companion_triples(store, aggregates.pairs, request.triple_top_k)
+                    computed['companion_matrix'] = companion_matrix_from_pairs(aggregates.pairs, aggregates.counts, triples)
+                else:
+                    computed['companion_matrix'] = calculate_companion_matrix(store, request.triple_top_k)
+
+        if 'companion_stats' in needed:
+            with invocation.stage('companion_stats'):
+                computed['companion_stats'] = companion_stats_from_pairs(
+                    computed['companion_matrix']['matrix'], computed['frequency_stats']
+                )
+
+        if 'average_gap_stats' in needed:
+            with invocation.stage('average_gap_stats'):
+                if incremental:
+                    computed['average_gap_stats'] = aggregates.average_gap_stats()
+                else:
+                    computed['average_gap_stats'] = calculate_average_gap(store)
+
+        if 'simple_predictions' in needed:
+            with invocation.stage('simple_predictions'):
+                computed['simple_predictions'] = predict_next_combinations(
+                    computed['frequency_stats'], computed['companion_stats'], computed['average_gap_stats'],
+                    request.combination_count, request.seed,
+                    full_store.masks if EXCLUDE_DRAWN_COMBINATIONS else None
+                )
+
+        if 'ranked_combinations' in needed:
+            with invocation.stage('ranked_combinations'):
+                computed['ranked_combinations'] = rank_all_combinations(
+                    store, computed['frequency_stats'], computed['companion_stats'], computed['average_gap_stats'],
+                    request.top_k, persist=not request.windowed
+                )
+
+        if 'rolling_frequency_stats' in needed:
+            with invocation.stage('rolling_frequency_stats'):
+                computed['rolling_frequency_stats'] = calculate_rolling_frequencies(store, request.rolling_window)
+
+        if 'trained_predictions' in needed:
+            with invocation.stage('model_training'):
+                # Único caminho que importa o scikit-learn
+                # Artefatos são indexados pelo último concurso do histórico completo
+                computed['trained_predictions'] = train_and_predict_combinations(store, persist=not request.windowed)
+
+        if 'prediction_history' in needed:
+            with invocation.stage('prediction_history'):
+                computed['prediction_history'] = annotate_predictions(DrawIndex.from_store(full_store), computed)
+
+        with invocation.stage('serialization'):
+            section_bodies = serialize_sections(computed, request.sections, request.output_format)
+            response = {'statusCode': 200, 'body': join_sections(section_bodies)}
+
+        sent = push_analysis(section_bodies, request)
+
+        warm_cache.put((latest_concurso_hint, variant), {
+            'concurso': latest_concurso_hint,
+            'store': full_store,
+            'computed': computed,
+            'body': response['body'],
+            'sections': section_bodies,
+            'sent': sent
+        })
 
         return response
     
     except Exception as e:
-        print(f"ERRO: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return {
-            'statusCode': 500,
-            'body': json.dumps({
-                'error': str(e)
-            })
-        } 
\ No newline at end of file
+        return _error_response(e)
@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+def measure(module: str, runs: int):
+    """Mede o tempo de import de um módulo em processos novos (python -X importtime)"""
+    totals = []
+    last_report = {}
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if completed.returncode != 0:
+            raise Exception(f"Falha ao importar {module}: {completed.stderr.strip().splitlines()[-1]}")
+
+        report = {}
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            _, cumulative_us, name = line[len('import time:'):].split('|')
+            report[name.strip()] = int(cumulative_us)
+        totals.append(report.get(module, 0))
+        last_report = report
+
+    return sorted(totals)[len(totals) // 2], last_report
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o custo de import (cold start) do lambda_function")
+    parser.add_argument('--module', default='lambda_function')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-ms', type=float, default=None, help="Falha se a mediana passar deste limite")
+    parser.add_argument('--output', default=None, help="Grava o resultado em JSON")
+    args = parser.parse_args()
+
+    median_us, report = measure(args.module, args.runs)
+    heavy = ['boto3', 'botocore', 'requests', 'sklearn', 'scipy']
+    loaded_heavy = [name for name in heavy if name in report]
+
+    print(f"Import de {args.module}: {median_us / 1000:.1f} ms (mediana de {args.runs} execuções)")
+    print(f"\nTop {args.top} imports (tempo acumulado):")
+    top_modules = sorted(report.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    for name, cumulative_us in top_modules:
+        print(f"  {cumulative_us / 1000:>8.1f} ms  {name}")
+    if loaded_heavy:
+        print(f"\n⚠️ Dependências pesadas importadas no carregamento: {', '.join(loaded_heavy)}")
+    else:
+        print("\n✅ Nenhuma dependência pesada importada no carregamento")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'module': args.module,
+                'median_ms': median_us / 1000,
+                'heavy_modules': loaded_heavy,
+                'top_modules': [{'module': name, 'cumulative_ms': us / 1000} for name, us in top_modules]
+            }, f, indent=2)
+
+    if args.max_ms is not None and median_us / 1000 > args.max_ms:
+        print(f"❌ Import acima do limite de {args.max_ms} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'FezinhaiAnalysis')
+# Diretório dos perfis gerados quando o evento pede 'profile' ou 'trace_memory'
+PROFILE_OUTPUT_DIR = os.getenv('PROFILE_OUTPUT_DIR', '/tmp')
+
+
+class InvocationMetrics:
+    """Métricas de uma invocação, emitidas como um único registro no formato EMF do CloudWatch."""
+
+    def __init__(self, function_name: str = '', request_id: str = '', track_memory: bool = False):
+        self.function_name = function_name
+        self.request_id = request_id
+        self.track_memory = track_memory
+        self.started_at = time.time()
+        self.stages: Dict[str, float] = {}
+        self.stage_memory: Dict[str, int] = {}
+        self.counters: Dict[str, float] = {}
+        self.properties: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+            if self.track_memory and tracemalloc.is_tracing():
+                self.record_memory(name, tracemalloc.get_traced_memory()[1])
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_memory(self, name: str, peak_bytes: int) -> None:
+        with self._lock:
+            self.stage_memory[name] = max(self.stage_memory.get(name, 0), peak_bytes)
+
+    def set_property(self, name: str, value: Any) -> None:
+        self.properties[name] = value
+
+    def to_emf(self) -> Dict[str, Any]:
+        metric_definitions = []
+        values: Dict[str, Any] = {}
+
+        for name, elapsed_ms in self.stages.items():
+            key = f"{name}_ms"
+            metric_definitions.append({'Name': key, 'Unit': 'Milliseconds'})
+            values[key] = round(elapsed_ms, 3)
+        for name, peak in self.stage_memory.items():
+            key = f"{name}_peak_bytes"
+            metric_definitions.append({'Name': key, 'Unit': 'Bytes'})
+            values[key] = peak
+        for name, value in self.counters.items():
+            metric_definitions.append({'Name': name, 'Unit': 'Count'})
+            values[name] = value
+
+        total_ms = (time.time() - self.started_at) * 1000
+        metric_definitions.append({'Name': 'total_ms', 'Unit': 'Milliseconds'})
+        values['total_ms'] = round(total_ms, 3)
+
+        return {
+            '_aws': {
+                'Timestamp': int(self.started_at * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['FunctionName']],
+                    'Metrics': metric_definitions
+                }]
+            },
+            'FunctionName': self.function_name,
+            'RequestId': self.request_id,
+            **self.properties,
+            **values
+        }
+
+    def emit(self) -> None:
+        # Uma linha JSON por invocação; o CloudWatch extrai as métricas do registro EMF
+        print(json.dumps(self.to_emf(), default=str))
+
+
+class _NoopMetrics(InvocationMetrics):
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def increment(self, name: str, value: float = 1) -> None:
+        pass
+
+    def record_memory(self, name: str, peak_bytes: int) -> None:
+        pass
+
+    def set_property(self, name: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopMetrics()
+_current: Optional[InvocationMetrics] = None
+
+
+def start_invocation(function_name: str = '', request_id: str = '', track_memory: bool = False) -> InvocationMetrics:
+    global _current
+    _current = InvocationMetrics(function_name, request_id, track_memory)
+    return _current
+
+
+def finish_invocation() -> None:
+    global _current
+    if _current is not None:
+        _current.emit()
+    _current = None
+
+
+def current() -> InvocationMetrics:
+    # Fora de uma invocação (scripts, testes) as chamadas viram no-op
+    return _current if _current is not None else _NOOP
+
+
+def record_consumed_capacity(response: Dict[str, Any]) -> None:
+    consumed = response.get('ConsumedCapacity')
+    if not consumed:
+        return
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    current().increment('consumed_read_capacity', sum(c.get('CapacityUnits', 0) for c in consumed))
+
+
+@contextmanager
+def capture_profile(name: str, cprofile: bool = False, trace_memory: bool = False,
+                    output_dir: Optional[str] = None):
+    """Grava um perfil cProfile e/ou as maiores alocações do tracemalloc em `output_dir`."""
+    output_dir = output_dir or PROFILE_OUTPUT_DIR
+    profiler = cProfile.Profile() if cprofile else None
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            path = os.path.join(output_dir, f"profile-{name}.prof")
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                profiler.dump_stats(path)
+                with open(f"{path}.txt", 'w', encoding='utf-8') as f:
+                    pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(50)
+                current().set_property('profile_path', path)
+            except Exception as e:
+                print(f"Erro ao gravar perfil cProfile: {str(e)}")
+        if trace_memory and tracemalloc.is_tracing():
+            path = os.path.join(output_dir, f"tracemalloc-{name}.txt")
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                # As etapas zeram o pico do tracemalloc; o pico da invocação é o maior entre elas
+                peak = max([tracemalloc.get_traced_memory()[1], *current().stage_memory.values()])
+                os.makedirs(output_dir, exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(f"peak_bytes {peak}\n")
+                    for stat in snapshot.statistics('lineno')[:50]:
+                        f.write(f"{stat}\n")
+                current().set_property('tracemalloc_path', path)
+                current().record_memory('invocation', peak)
+            except Exception as e:
+                print(f"Erro ao gravar snapshot do tracemalloc: {str(e)}")
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
@@ -0,0 +1,226 @@
+import copy
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import metrics
+from draw_store import DrawStore, NUMBERS
+
+# Concursos anteriores usados nas features (frequência móvel, teto do intervalo)
+ML_LOOKBACK = int(os.getenv('ML_LOOKBACK', '50'))
+# Concursos anteriores usados no score de companheiros
+ML_COMPANION_LOOKBACK = int(os.getenv('ML_COMPANION_LOOKBACK', '20'))
+# Limite de concursos-alvo no treino, para manter tempo e memória constantes com o histórico crescendo
+ML_MAX_TRAINING_DRAWS = int(os.getenv('ML_MAX_TRAINING_DRAWS', '2000'))
+ML_COMBINATIONS = int(os.getenv('ML_COMBINATIONS', '5'))
+# Modelos de trained_predictions, uma chave por modelo na resposta; o SGD é opcional
+# (ML_MODELS=DecisionTree,KNN,SGD) para não mudar o formato consumido pela API
+MODEL_NAMES = ('DecisionTree', 'KNN', 'SGD')
+ML_MODELS = tuple(name.strip() for name in os.getenv('ML_MODELS', 'DecisionTree,KNN').split(',') if name.strip())
+
+FEATURES_PER_NUMBER = 4  # frequência móvel, intervalo atual, score de companheiros, saiu no último
+
+
+def build_features(matrix: np.ndarray, lookback: int = ML_LOOKBACK,
+                   companion_lookback: int = ML_COMPANION_LOOKBACK) -> np.ndarray:
+    """Features (T + 1, 25, 4) para prever o concurso t usando apenas os concursos anteriores a t;
+    a linha T corresponde ao próximo concurso"""
+    m = matrix.astype(np.int16)
+    total = len(m)
+    targets = np.arange(total + 1)
+
+    # Frequência nos últimos `lookback` concursos via soma prefixada
+    cumulative = np.zeros((total + 1, 25), dtype=np.int32)
+    np.cumsum(m, axis=0, out=cumulative[1:])
+    start = np.maximum(targets - lookback, 0)
+    frequency = (cumulative[targets] - cumulative[start]) / lookback
+
+    # Intervalo desde a última aparição antes de t, limitado a `lookback`
+    appearances = np.where(matrix, np.arange(total)[:, None], -lookback - 1)
+    last_seen = np.full((total + 1, 25), -lookback - 1, dtype=np.int64)
+    np.maximum.accumulate(appearances, axis=0, out=last_seen[1:])
+    gap = np.minimum(targets[:, None] - last_seen, lookback) / lookback
+
+    # Companheiros: concursos recentes que coincidem com o último concurso pesam mais
+    companion = np.zeros((total + 1, 25), dtype=np.float64)
+    for k in range(1, min(companion_lookback, total) + 1):
+        previous = m[k - 1:total]
+        earlier = m[0:total - k + 1]
+        overlap = (earlier * previous).sum(axis=1)
+        companion[k:] += earlier * overlap[:, None]
+    companion /= companion_lookback * 15
+
+    last_draw = np.zeros((total + 1, 25), dtype=np.float64)
+    last_draw[1:] = m
+
+    return np.stack([frequency, gap, companion, last_draw], axis=2)
+
+
+def long_format(features: np.ndarray) -> np.ndarray:
+    # Uma linha por (concurso, número): features do número + one-hot do número,
+    # de forma que um único modelo dá a probabilidade de cada número sair
+    rows = features.shape[0]
+    identity = np.broadcast_to(np.eye(25), (rows, 25, 25))
+    long = np.concatenate([features, identity], axis=2).reshape(rows * 25, FEATURES_PER_NUMBER + 25)
+    return long.astype(np.float32)
+
+
+def training_data(store: DrawStore, lookback: int = ML_LOOKBACK,
+                  companion_lookback: int = ML_COMPANION_LOOKBACK,
+                  max_training_draws: int = ML_MAX_TRAINING_DRAWS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(X, y, X do próximo concurso), com alvo multi-rótulo das 25 dezenas do concurso seguinte"""
+    valid = store.window(concurso_from=0)
+    matrix = valid.matrix()
+    total = len(matrix)
+    if total < 2:
+        raise ValueError("São necessários ao menos 2 concursos para treinar o modelo")
+
+    # Só os últimos concursos-alvo entram no treino; o histórico anterior a eles
+    # só é necessário até `lookback`, já que as features são limitadas a essa janela
+    first_target = max(1, total - max_training_draws)
+    offset = max(0, first_target - max(lookback, companion_lookback))
+    features = build_features(matrix[offset:], lookback, companion_lookback)[first_target - offset:]
+
+    X = long_format(features[:-1])
+    y = matrix[first_target:].reshape(-1).astype(np.int8)
+    return X, y, long_format(features[-1:])
+
+
+def combinations_from_probabilities(probabilities: np.ndarray, count: int = ML_COMBINATIONS,
+                                    tiebreak: Optional[np.ndarray] = None) -> List[List[str]]:
+    """A primeira combinação são as 15 dezenas mais prováveis; as seguintes trocam as
+    k dezenas mais fracas dela pelas k seguintes no ranking. Probabilidades empatadas
+    (comuns nas folhas da árvore e nos vizinhos do KNN) são desempatadas pelo maior
+    `tiebreak` (a frequência no histórico), e não pela dezena menor"""
+    probabilities = np.asarray(probabilities, dtype=float)
+    tiebreak = np.zeros(len(probabilities)) if tiebreak is None else np.asarray(tiebreak, dtype=float)
+    ranking = np.lexsort((-tiebreak, -probabilities))
+    base, rest = list(ranking[:15]), list(ranking[15:])
+    combinations = []
+    for k in range(min(count, len(rest) + 1)):
+        numbers = base[:15 - k] + rest[:k]
+        combinations.append(sorted(NUMBERS[i] for i in numbers))
+    return combinations
+
+
+# Modelos com partial_fit são atualizados só com os concursos novos; os demais são
+# retreinados na janela de treino quando chegam concursos novos
+INCREMENTAL_MODELS = ('SGD',)
+
+
+def make_models(names: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.neighbors import KNeighborsClassifier
+
+    names = ML_MODELS if names is None else names
+    unknown = [name for name in names if name not in MODEL_NAMES]
+    if unknown:
+        raise ValueError(f"Modelos desconhecidos: {', '.join(unknown)}")
+    factories = {
+        'DecisionTree': lambda: DecisionTreeClassifier(max_depth=8, min_samples_leaf=50, random_state=42),
+        'KNN': lambda: KNeighborsClassifier(n_neighbors=50),
+        'SGD': lambda: SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42),
+    }
+    return {name: factories[name]() for name in names}
+
+
+def positive_probability(model, X: np.ndarray) -> np.ndarray:
+    probabilities = model.predict_proba(X)
+    classes = list(model.classes_)
+    if 1 not in classes:
+        return np.zeros(len(X))
+    return probabilities[:, classes.index(1)]
+
+
+def _params() -> Dict[str, int]:
+    return {
+        'lookback': ML_LOOKBACK,
+        'companion_lookback': ML_COMPANION_LOOKBACK,
+        'max_training_draws': ML_MAX_TRAINING_DRAWS,
+        'models': list(ML_MODELS),
+    }
+
+
+def _history_tail(valid: DrawStore) -> List[List[int]]:
+    # Estado do construtor de features: os concursos que alimentam as features dos próximos alvos
+    size = max(ML_LOOKBACK, ML_COMPANION_LOOKBACK)
+    return [[int(c), int(m)] for c, m in zip(valid.concursos[-size:], valid.masks[-size:])]
+
+
+def _history_matches(valid: DrawStore, artifact: Dict[str, Any]) -> bool:
+    tail = artifact.get('tail') or []
+    if not tail:
+        return False
+    concursos = np.array([c for c, _ in tail])
+    index = np.searchsorted(valid.concursos, concursos)
+    if (index >= len(valid)).any() or (valid.concursos[np.minimum(index, len(valid) - 1)] != concursos).any():
+        return False
+    return bool((valid.masks[index] == np.array([m for _, m in tail], dtype=np.uint32)).all())
+
+
+def _fit_models(valid: DrawStore) -> Dict[str, Any]:
+    X, y, _ = training_data(valid)
+    models = make_models()
+    for model in models.values():
+        model.fit(X, y)
+    return models
+
+
+def _update_models(valid: DrawStore, artifact: Dict[str, Any], new_targets: int) -> Dict[str, Any]:
+    models = make_models()
+    # Só monta os dados que algum modelo configurado vai usar: sem SGD em ML_MODELS
+    # não há atualização incremental e todos são retreinados na janela
+    incremental = [name for name in models if name in INCREMENTAL_MODELS and name in artifact['models']]
+    if incremental:
+        X_new, y_new, _ = training_data(valid, max_training_draws=new_targets)
+    if len(incremental) < len(models):
+        X, y, _ = training_data(valid)
+    for name, model in models.items():
+        if name in incremental:
+            # Cópia para não alterar o artefato em memória se a gravação falhar
+            models[name] = copy.deepcopy(artifact['models'][name])
+            models[name].partial_fit(X_new, y_new)
+        else:
+            model.fit(X, y)
+    return models
+
+
+def train_and_predict(store: DrawStore, count: int = ML_COMBINATIONS,
+                      artifacts: Optional[Any] = None) -> Dict[str, List[List[str]]]:
+    """Treina (ou carrega de `artifacts`) os modelos e monta as combinações do próximo concurso"""
+    valid = store.window(concurso_from=0)
+    if len(valid) < 2:
+        raise ValueError("São necessários ao menos 2 concursos para treinar o modelo")
+    watermark = int(valid.concursos[-1])
+
+    artifact = artifacts.load() if artifacts is not None else None
+    models = None
+    source = 'trained'
+    if artifact is not None and artifact.get('params') == _params() and _history_matches(valid, artifact):
+        new_targets = int((valid.concursos > artifact['watermark']).sum())
+        if new_targets == 0 and artifact['watermark'] == watermark:
+            models, source = artifact['models'], 'loaded'
+        elif 0 < new_targets <= ML_MAX_TRAINING_DRAWS:
+            models, source = _update_models(valid, artifact, new_targets), 'updated'
+
+    if models is None:
+        models = _fit_models(valid)
+    metrics.current().set_property('model_source', source)
+
+    if artifacts is not None and source != 'loaded':
+        try:
+            artifacts.save({
+                'watermark': watermark,
+                'params': _params(),
+                'tail': _history_tail(valid),
+                'models': models
+            })
+        except Exception as e:
+            print(f"Erro ao salvar artefato de modelo: {str(e)}")
+
+    _, _, next_draw = training_data(valid, max_training_draws=1)
+    frequencies = np.array(valid.frequencies())
+    return {
+        name: combinations_from_probabilities(positive_probability(model, next_draw), count, frequencies)
+        for name, model in models.items()
+    }
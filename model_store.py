@@ -0,0 +1,119 @@
+import json
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+ARTIFACT_VERSION = 1
+LATEST_KEY = 'latest.json'
+
+
+def artifact_key(watermark: int) -> str:
+    return f"model-{watermark}.pkl"
+
+
+class LocalModelStore:
+    """Artefatos de modelo em um diretório local (por exemplo /tmp no container)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = os.path.join(self.directory, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def write(self, key: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def prune(self, keep_key: str) -> None:
+        # Só o artefato mais recente é mantido no disco
+        for name in os.listdir(self.directory):
+            if name.startswith('model-') and name.endswith('.pkl') and name != keep_key:
+                os.remove(os.path.join(self.directory, name))
+
+
+class S3ModelStore:
+    """Artefatos de modelo no S3 ou em um serviço compatível (S3_ENDPOINT_URL)."""
+
+    def __init__(self, bucket: str, prefix: str = '', client: Optional[Any] = None):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        if client is None:
+            import boto3
+            client = boto3.client(
+                's3', region_name=os.getenv('AWS_REGION', 'us-east-1'),
+                endpoint_url=os.getenv('S3_ENDPOINT_URL') or None
+            )
+        self.client = client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def read(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def write(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def prune(self, keep_key: str) -> None:
+        # Artefatos antigos ficam a cargo da política de ciclo de vida do bucket
+        pass
+
+
+def open_model_store(url: str):
+    """Diretório local ou s3://bucket/prefixo"""
+    if url.startswith('s3://'):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        return S3ModelStore(bucket, prefix)
+    return LocalModelStore(url)
+
+
+class ModelArtifacts:
+    """Lê e grava o artefato mais recente, mantendo em memória o último carregado."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.cached: Optional[Dict[str, Any]] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if self.cached is not None:
+            return self.cached
+        try:
+            pointer = self.backend.read(LATEST_KEY)
+            if pointer is None:
+                return None
+            key = json.loads(pointer)['key']
+            data = self.backend.read(key)
+            if data is None:
+                return None
+            artifact = pickle.loads(data)
+            if artifact.get('version') != ARTIFACT_VERSION:
+                print(f"Artefato de modelo com versão {artifact.get('version')}, ignorando")
+                return None
+            self.cached = artifact
+            return artifact
+        except Exception as e:
+            print(f"Erro ao carregar artefato de modelo: {str(e)}")
+            return None
+
+    def save(self, artifact: Dict[str, Any]) -> None:
+        artifact = {**artifact, 'version': ARTIFACT_VERSION}
+        key = artifact_key(artifact['watermark'])
+        self.backend.write(key, pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL))
+        # O ponteiro é gravado por último: um leitor nunca vê um artefato incompleto
+        self.backend.write(LATEST_KEY, json.dumps({'key': key, 'watermark': artifact['watermark']}).encode('utf-8'))
+        self.cached = artifact
+        try:
+            self.backend.prune(key)
+        except Exception as e:
+            print(f"Erro ao remover artefatos antigos: {str(e)}")
@@ -0,0 +1,48 @@
+from typing import List, Optional, Tuple
+import numpy as np
+from draw_store import DrawStore, MISSING_CONCURSO
+
+
+def frequencies(store: DrawStore) -> List[int]:
+    return store.matrix().sum(axis=0).tolist()
+
+
+def pair_counts(store: DrawStore) -> List[List[int]]:
+    m = store.matrix().astype(np.int32)
+    return (m.T @ m).tolist()
+
+
+def gaps(store: DrawStore) -> Tuple[List[List[int]], List[Optional[int]]]:
+    valid = store.concursos != MISSING_CONCURSO
+    concursos = store.concursos[valid].astype(np.int64)
+    matrix = store.matrix()[valid]
+
+    number_gaps = []
+    last_appearance = []
+    for i in range(matrix.shape[1]):
+        appearances = concursos[np.flatnonzero(matrix[:, i])]
+        number_gaps.append(np.diff(appearances).tolist())
+        last_appearance.append(int(appearances[-1]) if len(appearances) else None)
+    return number_gaps, last_appearance
+
+
+def triple_counts(store: DrawStore, pairs: List[Tuple[int, int]]) -> List[List[int]]:
+    matrix = store.matrix()
+    triples = []
+    for i, j in pairs:
+        row = matrix[matrix[:, i] & matrix[:, j]].sum(axis=0)
+        row[[i, j]] = 0
+        triples.append(row.tolist())
+    return triples
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Quantidade de bits ligados em cada máscara (acertos de uma aposta em um concurso)"""
+    values = np.ascontiguousarray(values, dtype=np.uint32)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    # NumPy < 2.0: tabela por byte
+    return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(values.shape + (4,)).sum(axis=-1, dtype=np.uint8)
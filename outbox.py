@@ -0,0 +1,148 @@
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+
+@dataclass
+class OutboxMessage:
+    message_id: str
+    body: str
+    attempts: int
+    receipt: str
+
+
+class FileOutbox:
+    """Fila em diretório local com a mesma interface da SqsOutbox (pending/, inflight/ e failed/)."""
+
+    def __init__(self, directory: str, visibility_timeout: float = 300, clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self.visibility_timeout = visibility_timeout
+        self.clock = clock
+        for folder in ('pending', 'inflight', 'failed'):
+            os.makedirs(os.path.join(directory, folder), exist_ok=True)
+
+    def _path(self, folder: str, name: str) -> str:
+        return os.path.join(self.directory, folder, name)
+
+    def _write(self, path: str, record: dict) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+
+    def send_message(self, body: str) -> str:
+        message_id = uuid.uuid4().hex
+        # O prefixo com o horário mantém a ordem de chegada na listagem
+        name = f"{time.time_ns():020d}-{message_id}.json"
+        self._write(self._path('pending', name), {'id': message_id, 'body': body, 'attempts': 0, 'not_before': 0})
+        return message_id
+
+    def _recover_expired(self) -> None:
+        # Mensagens de um worker que morreu no meio do envio voltam para a fila
+        now = self.clock()
+        for name in os.listdir(os.path.join(self.directory, 'inflight')):
+            path = self._path('inflight', name)
+            try:
+                if now - os.path.getmtime(path) > self.visibility_timeout:
+                    os.replace(path, self._path('pending', name))
+            except FileNotFoundError:
+                pass
+
+    def receive_messages(self, max_messages: int = 10) -> List[OutboxMessage]:
+        self._recover_expired()
+        now = self.clock()
+        messages = []
+        for name in sorted(os.listdir(os.path.join(self.directory, 'pending'))):
+            if len(messages) >= max_messages:
+                break
+            if not name.endswith('.json'):
+                continue
+            pending_path = self._path('pending', name)
+            try:
+                with open(pending_path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+                if record.get('not_before', 0) > now:
+                    continue
+                inflight_path = self._path('inflight', name)
+                # O rename é atômico: só um worker consegue reservar a mensagem
+                os.replace(pending_path, inflight_path)
+                os.utime(inflight_path)
+            except (FileNotFoundError, ValueError):
+                continue
+            messages.append(OutboxMessage(record['id'], record['body'], record['attempts'], inflight_path))
+        return messages
+
+    def delete_message(self, receipt: str) -> None:
+        try:
+            os.remove(receipt)
+        except FileNotFoundError:
+            pass
+
+    def retry_message(self, receipt: str, delay_seconds: float) -> None:
+        with open(receipt, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        record['attempts'] += 1
+        record['not_before'] = self.clock() + delay_seconds
+        self._write(self._path('pending', os.path.basename(receipt)), record)
+        os.remove(receipt)
+
+    def dead_letter(self, receipt: str) -> None:
+        os.replace(receipt, self._path('failed', os.path.basename(receipt)))
+
+    def __len__(self) -> int:
+        return sum(
+            1 for folder in ('pending', 'inflight')
+            for name in os.listdir(os.path.join(self.directory, folder)) if name.endswith('.json')
+        )
+
+
+class SqsOutbox:
+    """Outbox em uma fila SQS; a fila de mensagens mortas fica a cargo da redrive policy."""
+
+    def __init__(self, queue_url: str, client: Optional[Any] = None):
+        self.queue_url = queue_url
+        if client is None:
+            import boto3
+            client = boto3.client('sqs', region_name=os.getenv('AWS_REGION', 'us-east-1'))
+        self.client = client
+
+    def send_message(self, body: str) -> str:
+        return self.client.send_message(QueueUrl=self.queue_url, MessageBody=body)['MessageId']
+
+    def receive_messages(self, max_messages: int = 10) -> List[OutboxMessage]:
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=max(1, min(max_messages, 10)),
+            AttributeNames=['ApproximateReceiveCount'],
+            WaitTimeSeconds=0
+        )
+        return [
+            OutboxMessage(
+                message['MessageId'], message['Body'],
+                int(message.get('Attributes', {}).get('ApproximateReceiveCount', 1)) - 1,
+                message['ReceiptHandle']
+            )
+            for message in response.get('Messages', [])
+        ]
+
+    def delete_message(self, receipt: str) -> None:
+        self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt)
+
+    def retry_message(self, receipt: str, delay_seconds: float) -> None:
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=receipt, VisibilityTimeout=int(min(delay_seconds, 43200))
+        )
+
+    def dead_letter(self, receipt: str) -> None:
+        print("Mensagem excedeu o número de tentativas; removendo da fila")
+        self.delete_message(receipt)
+
+
+def open_outbox(url: str, visibility_timeout: float = 300):
+    """URL de uma fila SQS ou diretório local"""
+    if url.startswith('https://sqs.') or url.startswith('https://queue.'):
+        return SqsOutbox(url)
+    return FileOutbox(url, visibility_timeout)
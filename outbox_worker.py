@@ -0,0 +1,90 @@
+import json
+import os
+from typing import Any, Dict, List
+import lambda_function
+import metrics
+from outbox import OutboxMessage, open_outbox
+
+# Mensagens drenadas por lote; as seções do lote são combinadas em um único envio
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '10'))
+OUTBOX_MAX_BATCHES = int(os.getenv('OUTBOX_MAX_BATCHES', '10'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv('OUTBOX_RETRY_BASE_DELAY', '30'))
+
+
+def merge_sections(messages: List[OutboxMessage]) -> Dict[str, str]:
+    # A análise mais recente de cada seção prevalece
+    payloads = sorted((json.loads(message.body) for message in messages), key=lambda p: p.get('enqueued_at', 0))
+    merged: Dict[str, str] = {}
+    for payload in payloads:
+        merged.update(payload['sections'])
+    return merged
+
+
+def drain_outbox(outbox=None) -> Dict[str, int]:
+    outbox = outbox or open_outbox(lambda_function.OUTBOX_URL, lambda_function.OUTBOX_VISIBILITY_TIMEOUT)
+    summary = {'delivered': 0, 'uploads': 0, 'retried': 0, 'dead_lettered': 0}
+
+    for _ in range(OUTBOX_MAX_BATCHES):
+        messages = outbox.receive_messages(OUTBOX_BATCH_SIZE)
+        if not messages:
+            break
+
+        try:
+            sent = lambda_function.deliver_sections(merge_sections(messages))
+        except Exception as e:
+            print(f"Erro ao enviar lote do outbox: {str(e)}")
+            sent = False
+        summary['uploads'] += 1
+
+        for message in messages:
+            if sent:
+                outbox.delete_message(message.receipt)
+                summary['delivered'] += 1
+            elif message.attempts + 1 >= OUTBOX_MAX_ATTEMPTS:
+                outbox.dead_letter(message.receipt)
+                summary['dead_lettered'] += 1
+            else:
+                # Backoff exponencial entre as tentativas
+                outbox.retry_message(message.receipt, OUTBOX_RETRY_BASE_DELAY * 2 ** message.attempts)
+                summary['retried'] += 1
+
+        if not sent:
+            break
+
+    print(f"Outbox drenado: {summary}")
+    return summary
+
+
+def deliver_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Acionado pela fila SQS: o lote já vem no evento e as falhas voltam para a fila
+    messages = [OutboxMessage(record['messageId'], record['body'], 0, '') for record in records]
+    try:
+        sent = lambda_function.deliver_sections(merge_sections(messages))
+    except Exception as e:
+        print(f"Erro ao enviar lote da fila: {str(e)}")
+        sent = False
+    return {'batchItemFailures': [] if sent else [{'itemIdentifier': m.message_id} for m in messages]}
+
+
+def lambda_handler(event, context):
+    """Entry point do worker (agendado ou acionado pela fila)"""
+    metrics.start_invocation(getattr(context, 'function_name', 'outbox_worker'), getattr(context, 'aws_request_id', ''))
+    try:
+        if (event or {}).get('Records'):
+            return deliver_records(event['Records'])
+        summary = drain_outbox()
+        for key, value in summary.items():
+            metrics.current().increment(f"outbox_{key}", value)
+        return {'statusCode': 200, 'body': json.dumps(summary)}
+    except Exception as e:
+        print(f"ERRO: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+    finally:
+        metrics.finish_invocation()
+
+
+if __name__ == "__main__":
+    print(json.dumps(drain_outbox(), indent=2))
@@ -0,0 +1,39 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+# Chave do item de estado quando o estado fica em uma tabela DynamoDB (chave de partição 'id')
+PUSH_STATE_ID = 'lotofacil_push_state'
+
+
+def section_hash(body: str) -> str:
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def load_push_state(path: str, table: Optional[Any] = None) -> Dict[str, str]:
+    """Hashes das seções no último envio bem-sucedido"""
+    try:
+        if table is not None:
+            item = table.get_item(Key={'id': PUSH_STATE_ID}).get('Item')
+            return dict(item.get('hashes', {})) if item else {}
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Erro ao ler estado de envio, enviando todas as seções: {str(e)}")
+        return {}
+
+
+def save_push_state(hashes: Dict[str, str], path: str, table: Optional[Any] = None) -> None:
+    if table is not None:
+        table.put_item(Item={'id': PUSH_STATE_ID, 'hashes': hashes})
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f)
+    os.replace(tmp_path, path)
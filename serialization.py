@@ -0,0 +1,66 @@
+import json
+from decimal import Decimal
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+# Nomes das colunas no formato colunar
+COLUMN_NAMES = {'number': 'numbers'}
+
+
+def to_plain(value: Any) -> Any:
+    """Converte os tipos do DynamoDB (Decimal, set) para tipos JSON nativos"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_plain(item) for item in value)
+    return value
+
+
+def _default(obj: Any) -> Any:
+    # Só é chamado para valores que escaparam da conversão feita na leitura
+    if isinstance(obj, (Decimal, set, frozenset)):
+        return to_plain(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> str:
+    """JSON compacto, com orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default).decode('utf-8')
+    return json.dumps(value, default=_default, separators=(',', ':'), ensure_ascii=False)
+
+
+def join_objects(parts: Dict[str, str]) -> str:
+    """Monta um objeto JSON a partir de valores já serializados"""
+    return '{' + ','.join(f'{dumps(key)}:{body}' for key, body in parts.items()) + '}'
+
+
+def _is_records(value: Any) -> bool:
+    if not isinstance(value, list) or not value or not all(isinstance(item, dict) for item in value):
+        return False
+    keys = value[0].keys()
+    return all(item.keys() == keys for item in value)
+
+
+def to_columnar(value: Any) -> Any:
+    """Troca listas de registros com as mesmas chaves por um objeto com uma lista por chave"""
+    if _is_records(value):
+        return {
+            COLUMN_NAMES.get(key, key): to_columnar([item[key] for item in value])
+            for key in value[0]
+        }
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(_is_records(item) for item in value):
+        return [to_columnar(item) for item in value]
+    return value
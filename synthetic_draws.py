@@ -0,0 +1,48 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+ENCODINGS = ('str', 'int', 'decimal')
+
+FIRST_DRAW_DATE = date(2003, 9, 29)
+
+
+def _encode(number: int, encoding: str, rng: random.Random) -> Any:
+    if encoding == 'int':
+        return number
+    if encoding == 'decimal':
+        return Decimal(number)
+    # Tanto '01' quanto '1' aparecem em dados antigos
+    return str(number).zfill(2) if rng.random() < 0.9 else str(number)
+
+
+def generate_draw(concurso: int, rng: random.Random) -> Dict[str, Any]:
+    """Gera um item no formato devolvido pelo DynamoDB para um concurso"""
+    encoding = rng.choice(ENCODINGS)
+    numbers = sorted(rng.sample(range(1, 26), 15))
+    winners_15 = rng.choice((0, 0, 1, 1, 2, 3))
+    return {
+        'concurso': Decimal(concurso),
+        'data': (FIRST_DRAW_DATE + timedelta(days=2 * (concurso - 1))).strftime('%d/%m/%Y'),
+        'dezenas': [_encode(n, encoding, rng) for n in numbers],
+        'premiacoes': {
+            'quinze': {'vencedores': Decimal(winners_15), 'premio': Decimal(rng.randint(500000, 3000000)) if winners_15 else Decimal(0)},
+            'quatorze': {'vencedores': Decimal(rng.randint(150, 600)), 'premio': Decimal(rng.randint(900, 2500))},
+            'treze': {'vencedores': Decimal(rng.randint(5000, 20000)), 'premio': Decimal(30)},
+            'doze': {'vencedores': Decimal(rng.randint(60000, 250000)), 'premio': Decimal(12)},
+            'onze': {'vencedores': Decimal(rng.randint(300000, 1200000)), 'premio': Decimal(6)},
+        },
+        'acumulou': winners_15 == 0,
+        'acumuladaProxConcurso': Decimal(rng.randint(0, 5000000)),
+        'dataProxConcurso': (FIRST_DRAW_DATE + timedelta(days=2 * concurso)).strftime('%d/%m/%Y'),
+        'proxConcurso': Decimal(concurso + 1),
+        'timeCoracao': '',
+        'mesSorte': ''
+    }
+
+
+def generate_draws(count: int, seed: int = 42, start_concurso: int = 1) -> List[Dict[str, Any]]:
+    """Gera `count` concursos sintéticos reprodutíveis a partir de `seed`"""
+    rng = random.Random(seed)
+    return [generate_draw(concurso, rng) for concurso in range(start_concurso, start_concurso + count)]
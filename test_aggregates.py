@@ -0,0 +1,140 @@
+import json
+import os
+import random
+import tempfile
+from decimal import Decimal
+import numpy as np
+from moto import mock_aws
+import lambda_function
+from aggregates import LotofacilAggregates, StreamingAggregates, load_snapshot, save_snapshot
+from draw_store import DrawStore
+from lambda_function import count_number_frequencies, find_most_frequent_companions, calculate_average_gap
+from synthetic_draws import generate_draws
+from conftest import synthetic_lambda_table
+
+def build_sample_results(count=300, seed=7):
+    """Gera concursos sintéticos no formato devolvido pelo DynamoDB"""
+    rng = random.Random(seed)
+    return [
+        {
+            'concurso': Decimal(concurso),
+            'dezenas': sorted(str(n).zfill(2) for n in rng.sample(range(1, 26), 15))
+        }
+        for concurso in range(1, count + 1)
+    ]
+
+def test_incremental_matches_full_recompute():
+    """Test that folding draws in batches gives the same stats as a full recompute"""
+    results = build_sample_results()
+
+    aggregates = LotofacilAggregates()
+    aggregates.fold(results[:200])
+    aggregates.fold(results[150:])  # sobreposição deve ser ignorada
+
+    frequency_stats = count_number_frequencies(results)
+    assert aggregates.watermark == 300
+    assert aggregates.frequency_stats() == frequency_stats
+    assert aggregates.companion_stats(frequency_stats) == find_most_frequent_companions(results, frequency_stats)
+    assert json.loads(json.dumps(aggregates.average_gap_stats())) == \
+        json.loads(json.dumps(calculate_average_gap(results), default=float))
+
+    print("✅ Incremental aggregates test passed!")
+
+@mock_aws
+def test_results_after_skips_missing_concurso():
+    """Test that a missing concurso does not end the key lookup"""
+    with synthetic_lambda_table(200) as (resource, test_table):
+        test_table.delete_item(Key={'concurso': 101})
+        results = lambda_function.get_lotofacil_results_after(90)
+
+    concursos = sorted(int(item['concurso']) for item in results)
+    assert concursos == [n for n in range(91, 201) if n != 101]
+
+    print("✅ Results after gap test passed!")
+
+def test_snapshot_round_trip():
+    """Test that a saved snapshot can be loaded and keeps folding"""
+    results = build_sample_results()
+
+    aggregates = LotofacilAggregates()
+    aggregates.fold(results[:250])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'snapshot.json')
+        save_snapshot(aggregates, path)
+        restored = load_snapshot(path)
+
+    assert restored.watermark == 250
+    assert restored.fold(results) == 50
+
+    full = LotofacilAggregates()
+    full.fold(results)
+    assert restored.to_dict() == json.loads(json.dumps(full.to_dict(), default=float))
+
+    print("✅ Snapshot round trip test passed!")
+
+def test_streaming_matches_full_recompute():
+    """Test that pages folded out of order give the same stats as a full recompute"""
+    results = generate_draws(500, seed=21)
+    # Concurso repetido na mesma página (20) e em outra página (10): fica a última versão
+    pages = [
+        results[400:],
+        results[:150] + [dict(results[19], dezenas=results[21]['dezenas'])],
+        results[150:400] + [dict(results[9], dezenas=results[11]['dezenas'])],
+        [{'dezenas': results[0]['dezenas']}]
+    ]
+
+    aggregates = StreamingAggregates()
+    folded = [aggregates.fold_page(page) for page in pages]
+    assert folded == [100, 151, 251, 1]
+
+    expected = DrawStore.from_results([item for page in pages for item in page])
+    assert expected.masks[20] != DrawStore.from_results(results).masks[19]
+    store = aggregates.store()
+    assert np.array_equal(store.concursos, expected.concursos)
+    assert np.array_equal(store.masks, expected.masks)
+    assert np.array_equal(store.dates, expected.dates)
+
+    frequency_stats = count_number_frequencies(expected)
+    assert aggregates.watermark == 500
+    assert aggregates.frequency_stats() == frequency_stats
+    assert aggregates.companion_stats(frequency_stats) == find_most_frequent_companions(expected, frequency_stats)
+    assert aggregates.average_gap_stats() == calculate_average_gap(expected)
+
+    print("✅ Streaming aggregates test passed!")
+
+@mock_aws
+def test_streaming_handler():
+    """Test that the streaming mode returns the same analysis as the full mode"""
+    with synthetic_lambda_table(1500) as (resource, test_table):
+        event = {'sections': ['last_result', 'frequency_stats', 'companion_stats', 'average_gap_stats', 'companion_matrix']}
+
+        pages = list(lambda_function.iter_lotofacil_pages(segments=3, projection=True))
+        assert len(pages) >= 3 and sum(len(page) for page in pages) == 1500
+
+        bodies = {}
+        previous = os.environ.get('ANALYSIS_MODE')
+        try:
+            for mode in ('full', 'streaming'):
+                os.environ['ANALYSIS_MODE'] = mode
+                lambda_function.warm_cache.clear()
+                response = lambda_function.lambda_handler(event, None)
+                assert response['statusCode'] == 200
+                bodies[mode] = json.loads(response['body'])
+        finally:
+            if previous is None:
+                os.environ.pop('ANALYSIS_MODE', None)
+            else:
+                os.environ['ANALYSIS_MODE'] = previous
+
+        assert bodies['streaming'] == bodies['full']
+        assert bodies['streaming']['last_result']['concurso'] == 1500
+
+        print("✅ Streaming handler test passed!")
+
+if __name__ == "__main__":
+    test_incremental_matches_full_recompute()
+    test_results_after_skips_missing_concurso()
+    test_snapshot_round_trip()
+    test_streaming_matches_full_recompute()
+    test_streaming_handler()
@@ -0,0 +1,207 @@
+import base64
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import lambda_function
+
+def _make_token(exp: float) -> str:
+    def encode(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b'=').decode()
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'sub': 'lambda', 'exp': int(exp)})}.assinatura"
+
+class StubApi:
+    """Servidor HTTP local que conta logins, envios e conexões abertas"""
+
+    def __init__(self, token_ttl: float = 3600):
+        self.token_ttl = token_ttl
+        self.logins = 0
+        self.posts = 0
+        self.connections = 0
+        self.reject_next_posts = 0
+        self.received = []
+        self.encodings = []
+        self.valid_tokens = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                stub.connections += 1
+                super().setup()
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+                if self.path == '/auth/login':
+                    stub.logins += 1
+                    token = _make_token(time.time() + stub.token_ttl) + str(stub.logins)
+                    stub.valid_tokens.add(token)
+                    self._reply(200, {'accessToken': token})
+                elif self.path == '/lotofacil/analisys':
+                    stub.posts += 1
+                    token = self.headers.get('Authorization', '').replace('Bearer ', '')
+                    if stub.reject_next_posts or token not in stub.valid_tokens:
+                        stub.reject_next_posts = max(0, stub.reject_next_posts - 1)
+                        stub.valid_tokens.discard(token)
+                        self._reply(401, {'message': 'Unauthorized'})
+                    else:
+                        stub.received.append(json.loads(body))
+                        stub.encodings.append(self.headers.get('Content-Encoding'))
+                        self._reply(201, {'ok': True})
+                else:
+                    self._reply(404, {})
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        os.environ['API_URL'] = self.url
+        os.environ['API_EMAIL'] = 'lambda@fezinhai.test'
+        os.environ['API_PASSWORD'] = 'senha'
+        lambda_function.http_session = None
+        lambda_function.invalidate_access_token()
+        return self
+
+    def __exit__(self, *exc):
+        if lambda_function.http_session is not None:
+            lambda_function.http_session.close()
+        lambda_function.http_session = None
+        lambda_function.invalidate_access_token()
+        self.server.shutdown()
+        self.server.server_close()
+        for key in ('API_URL', 'API_EMAIL', 'API_PASSWORD'):
+            os.environ.pop(key, None)
+
+def test_token_and_connection_reuse():
+    """Test that repeated pushes reuse the token and a single keep-alive connection"""
+    with StubApi() as api:
+        body = json.dumps({'frequency_stats': []})
+        for _ in range(3):
+            assert lambda_function.send_data_to_api(body, api.url)
+
+        assert api.logins == 1
+        assert api.posts == 3
+        assert api.connections == 1
+
+    print("✅ Token and connection reuse test passed!")
+
+def test_retry_policy():
+    """Test that POSTs are retried on connection errors and listed statuses, never on read errors"""
+    lambda_function.http_session = None
+    try:
+        retry = lambda_function.get_http_session().get_adapter('https://api.test').max_retries
+        assert retry.read == 0
+        assert retry.total == lambda_function.API_MAX_RETRIES
+        assert retry.connect is None  # limitado por total
+        assert set(retry.status_forcelist) == set(lambda_function.API_RETRY_STATUSES)
+        assert retry.is_retry('POST', 503) and not retry.is_retry('POST', 500)
+    finally:
+        lambda_function.http_session.close()
+        lambda_function.http_session = None
+
+    print("✅ Retry policy test passed!")
+
+def test_relogin_near_expiry_and_on_401():
+    """Test that the token is renewed near its exp and after a 401"""
+    # Tokens que expiram dentro da margem de renovação são descartados
+    with StubApi(token_ttl=lambda_function.API_TOKEN_REFRESH_MARGIN / 2) as api:
+        body = json.dumps({'last_result': {}})
+        assert lambda_function.send_data_to_api(body, api.url)
+        assert lambda_function.send_data_to_api(body, api.url)
+        assert api.logins == 2
+
+    with StubApi() as api:
+        body = json.dumps({'last_result': {}})
+        assert lambda_function.send_data_to_api(body, api.url)
+        api.reject_next_posts = 1
+        assert lambda_function.send_data_to_api(body, api.url)
+        assert api.logins == 2
+        assert api.posts == 3
+
+        # Um 401 persistente não vira laço de logins
+        api.reject_next_posts = 5
+        assert not lambda_function.send_data_to_api(body, api.url)
+        assert api.logins == 3
+
+    print("✅ Token renewal test passed!")
+
+def test_jwt_expiry():
+    """Test decoding exp from a JWT payload"""
+    assert lambda_function._jwt_expiry(_make_token(1700000000)) == 1700000000
+    assert lambda_function._jwt_expiry('opaque-token') is None
+
+    print("✅ JWT exp test passed!")
+
+def test_gzip_body():
+    """Test that the serialized body is sent gzip-compressed without being re-parsed"""
+    with StubApi() as api:
+        computed = {'frequency_stats': [{'number': '01', 'quantity': 10}], 'last_result': {'concurso': 3}}
+        sections = lambda_function.serialize_sections(computed, list(computed))
+        body = lambda_function.join_sections(sections)
+        assert json.loads(body) == computed
+
+        assert lambda_function.send_data_to_api(body, api.url)
+        assert api.encodings == ['gzip']
+        assert api.received == [computed]
+
+    print("✅ Gzip body test passed!")
+
+def test_delta_push():
+    """Test that delta mode only sends sections whose hash changed since the last push"""
+    request = lambda_function.parse_analysis_request({'sections': ['frequency_stats', 'last_result'], 'push': True})
+    original_mode = lambda_function.API_PUSH_MODE
+    original_path = lambda_function.PUSH_STATE_PATH
+    with tempfile.TemporaryDirectory() as tmp, StubApi() as api:
+        lambda_function.API_PUSH_MODE = 'delta'
+        lambda_function.PUSH_STATE_PATH = os.path.join(tmp, 'push_state.json')
+        try:
+            computed = {'frequency_stats': [{'number': '01', 'quantity': 10}], 'last_result': {'concurso': 3}}
+            assert lambda_function.push_analysis(lambda_function.serialize_sections(computed, request.sections), request)
+            assert api.received == [computed]
+
+            # Nada mudou: nenhum envio
+            assert lambda_function.push_analysis(lambda_function.serialize_sections(computed, request.sections), request)
+            assert len(api.received) == 1
+
+            computed['last_result'] = {'concurso': 4}
+            assert lambda_function.push_analysis(lambda_function.serialize_sections(computed, request.sections), request)
+            assert api.received[-1] == {'last_result': {'concurso': 4}}
+
+            # Envio recusado não atualiza o estado
+            api.reject_next_posts = 2
+            computed['frequency_stats'] = []
+            assert not lambda_function.push_analysis(lambda_function.serialize_sections(computed, request.sections), request)
+            assert lambda_function.push_analysis(lambda_function.serialize_sections(computed, request.sections), request)
+            assert api.received[-1] == {'frequency_stats': []}
+        finally:
+            lambda_function.API_PUSH_MODE = original_mode
+            lambda_function.PUSH_STATE_PATH = original_path
+
+    print("✅ Delta push test passed!")
+
+if __name__ == "__main__":
+    test_token_and_connection_reuse()
+    test_retry_policy()
+    test_relogin_near_expiry_and_on_401()
+    test_jwt_expiry()
+    test_gzip_body()
+    test_delta_push()
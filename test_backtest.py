@@ -0,0 +1,89 @@
+import numpy as np
+import backtest
+from draw_store import encode_dezenas, mask_to_numbers
+from synthetic_draws import generate_draws
+
+def test_score_matches_naive():
+    """Test vectorized hit counting and prize lookup against a loop"""
+    draws = generate_draws(60, seed=11)
+    rng = np.random.default_rng(1)
+    predictions = np.array([
+        [encode_dezenas(sorted(rng.choice(np.arange(1, 26), 15, replace=False).tolist())) for _ in range(4)]
+        for _ in draws
+    ], dtype=np.uint32)
+    masks = np.array([encode_dezenas(d['dezenas']) for d in draws], dtype=np.uint32)
+    # Um acerto de 15 garantido para exercitar a faixa principal
+    predictions[0, 0] = masks[0]
+    prizes = backtest.prize_table(draws, np.array([int(d['concurso']) for d in draws]))
+
+    summary = backtest.score(predictions, masks, prizes, ticket_price=3.0)
+
+    total_prize = 0.0
+    distribution = {h: 0 for h in range(11, 16)}
+    for draw, row, mask in zip(draws, predictions, masks):
+        drawn = set(mask_to_numbers(int(mask)))
+        for combination in row:
+            hits = len(drawn & set(mask_to_numbers(int(combination))))
+            if hits >= 11:
+                distribution[hits] += 1
+                tier = {15: 'quinze', 14: 'quatorze', 13: 'treze', 12: 'doze', 11: 'onze'}[hits]
+                total_prize += float(draw['premiacoes'][tier]['premio'])
+
+    assert summary['hit_distribution'] == {str(h): n for h, n in distribution.items()}
+    assert summary['hit_distribution']['15'] >= 1
+    assert summary['total_prize'] == round(total_prize, 2)
+    assert summary['combinations'] == 240
+
+    print("✅ Backtest scoring test passed!")
+
+def test_no_look_ahead():
+    """Test that predictions for a concurso only depend on earlier draws"""
+    draws = generate_draws(260, seed=12)
+    altered = [dict(d) for d in draws]
+    for d in altered[200:]:
+        d['dezenas'] = [str(n).zfill(2) for n in range(11, 26)]
+
+    strategies = ['simple', 'frequency', 'random', 'ml_SGD']
+    options = {'seed': 3, 'count': 5, 'retrain_every': 50, 'max_training_draws': 150, 'ticket_price': 3.0}
+    for name in strategies:
+        function = backtest.STRATEGIES.get(name)
+        args = [np.array([int(d['concurso']) for d in draws], dtype=np.int32)]
+        original = np.array([encode_dezenas(d['dezenas']) for d in draws], dtype=np.uint32)
+        changed = np.array([encode_dezenas(d['dezenas']) for d in altered], dtype=np.uint32)
+        if function is None:
+            first = backtest._ml_predictions(args[0], original, 100, model='SGD', **options)
+            second = backtest._ml_predictions(args[0], changed, 100, model='SGD', **options)
+        else:
+            first = function(args[0], original, 100, **options)
+            second = function(args[0], changed, 100, **options)
+        # Concursos 101..200 (índices 100..199) só veem concursos inalterados
+        assert first[:100] == second[:100], name
+
+    print("✅ No look-ahead test passed!")
+
+def test_run_backtest_process_pool():
+    """Test that fanning strategies out to processes gives the same report"""
+    draws = generate_draws(300, seed=13)
+    options = {'start_concurso': 120, 'strategies': ['simple', 'frequency', 'ml_SGD'], 'retrain_every': 60}
+    inline = backtest.run_backtest(draws, workers=1, **options)
+    pooled = backtest.run_backtest(draws, workers=2, **options)
+
+    for name in options['strategies']:
+        a, b = dict(inline['strategies'][name]), dict(pooled['strategies'][name])
+        a.pop('elapsed_s'), b.pop('elapsed_s')
+        assert a == b, name
+        assert a['draws'] == 181
+    assert inline['strategies']['simple']['combinations'] == 181 * 5
+
+    try:
+        backtest.run_backtest(draws, strategies=['astrology'])
+        assert False, "estratégia desconhecida deveria falhar"
+    except ValueError:
+        pass
+
+    print("✅ Backtest process pool test passed!")
+
+if __name__ == "__main__":
+    test_score_matches_naive()
+    test_no_look_ahead()
+    test_run_backtest_process_pool()
@@ -0,0 +1,108 @@
+import json
+import numpy as np
+from moto import mock_aws
+import combinadic
+import lambda_function
+from combinadic import DrawIndex, TOTAL_COMBINATIONS
+from combination_generator import iter_combinations
+from draw_store import DrawStore, mask_to_dezenas, mask_to_numbers
+from synthetic_draws import generate_draws
+from conftest import synthetic_lambda_table
+
+def test_draw_index_lookup():
+    """Test drawn/not drawn lookup and concursos by combination"""
+    draws = generate_draws(400, seed=41)
+    # O mesmo resultado em dois concursos
+    draws[10] = dict(draws[10], dezenas=draws[3]['dezenas'])
+    store = DrawStore.from_results(draws)
+    index = DrawIndex.from_store(store)
+
+    assert len(index) == 400
+    assert index.bitset.nbytes == (TOTAL_COMBINATIONS + 7) // 8 < 410 * 1024
+    assert index.contains(store.masks).all()
+
+    # Trocar uma dezena sorteada por uma não sorteada gera combinações (quase sempre) inéditas
+    drawn = set(store.masks.tolist())
+    others = np.array([m ^ 0b11 for m in store.masks.tolist() if bin(m & 0b11).count('1') == 1 and m ^ 0b11 not in drawn],
+                      dtype=np.uint32)
+    assert len(others)
+    assert not index.contains(others).any()
+    # Máscaras que não têm 15 dezenas nunca foram sorteadas
+    assert not index.contains(np.array([0, 0b111, (1 << 25) - 1], dtype=np.uint32)).any()
+
+    assert index.concursos_for(int(store.masks[3])) == sorted([int(store.concursos[3]), int(store.concursos[10])])
+    assert index.concursos_for(int(others[0])) == []
+
+    print("✅ Draw index lookup test passed!")
+
+def test_closest_matches():
+    """Test nearest historical draws by hit count against a loop"""
+    store = DrawStore.from_results(generate_draws(300, seed=42))
+    index = DrawIndex.from_store(store)
+    masks = np.array([int(m) for m in store.masks[:5]] + [0b1111111111111110000000000], dtype=np.uint32)
+
+    for mask, match in zip(masks, index.closest(masks, limit=3)):
+        numbers = set(mask_to_numbers(int(mask)))
+        hits = {int(c): len(numbers & set(mask_to_numbers(int(m)))) for c, m in zip(store.concursos, store.masks)}
+        best = max(hits.values())
+        assert match['hits'] == best
+        assert match['concursos'] == sorted((c for c, h in hits.items() if h == best), reverse=True)[:3]
+
+    # Blocos de duas combinações dão o mesmo resultado
+    block_size = combinadic.CLOSEST_BLOCK_SIZE
+    combinadic.CLOSEST_BLOCK_SIZE = 2 * len(index)
+    try:
+        assert index.closest(masks, limit=3) == index.closest(masks[:4], limit=3) + index.closest(masks[4:], limit=3)
+        assert [m['concursos'] for m in index.closest(masks, limit=0)] == [[]] * len(masks)
+    finally:
+        combinadic.CLOSEST_BLOCK_SIZE = block_size
+
+    annotated = index.annotate([mask_to_dezenas(int(m)) for m in masks[[0, 5]]])
+    assert annotated[0]['drawn'] and annotated[0]['closest_hits'] == 15
+    assert annotated[0]['drawn_concursos'] == index.concursos_for(int(masks[0])) == [int(store.concursos[0])]
+    assert annotated[1]['drawn_concursos'] == []
+    assert not annotated[1]['drawn'] and annotated[1]['closest_hits'] < 15
+
+    print("✅ Closest matches test passed!")
+
+def test_generator_excludes_drawn():
+    """Test that excluded masks are never generated"""
+    # Pesos concentrados em 16 dezenas: só 16 combinações possíveis, 5 delas excluídas
+    weights = np.full(25, 1e-9)
+    weights[:16] = 1.0
+    possible = [((1 << 16) - 1) ^ (1 << i) for i in range(16)]
+    exclude = np.array(possible[:5], dtype=np.uint32)
+
+    masks = np.concatenate(list(iter_combinations(weights, 100, seed=1, exclude=exclude)))
+    assert sorted(masks.tolist()) == sorted(possible[5:])
+
+    print("✅ Generator exclusion test passed!")
+
+@mock_aws
+def test_prediction_history_section():
+    """Test that predictions come back annotated against the history"""
+    with synthetic_lambda_table(300) as (resource, test_table):
+        response = lambda_function.lambda_handler({'sections': ['prediction_history'], 'seed': 5}, None)
+
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert list(body) == ['prediction_history']
+        history = body['prediction_history']['simple_predictions']
+        assert len(history) == lambda_function.DEFAULT_COMBINATION_COUNT
+        assert not any(item['drawn'] for item in history)
+        assert all(11 <= item['closest_hits'] < 15 and item['closest_concursos'] for item in history)
+
+        store = lambda_function.load_draw_store()
+        annotated = lambda_function.annotate_predictions(
+            DrawIndex.from_store(store), {'simple_predictions': [mask_to_dezenas(int(store.masks[-1]))]}
+        )
+        assert annotated['simple_predictions'][0]['drawn']
+        assert annotated['simple_predictions'][0]['closest_concursos'][0] == int(store.concursos[-1])
+
+        print("✅ Prediction history test passed!")
+
+if __name__ == "__main__":
+    test_draw_index_lookup()
+    test_closest_matches()
+    test_generator_excludes_drawn()
+    test_prediction_history_section()
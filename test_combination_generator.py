@@ -0,0 +1,83 @@
+import numpy as np
+import lambda_function
+from combination_generator import (
+    TOTAL_COMBINATIONS, iter_combinations, number_weights, sample_masks
+)
+from draw_store import DrawStore, NUMBERS
+from numpy_engine import popcount
+from synthetic_draws import generate_draws
+
+def _stats(size=500, seed=21):
+    store = DrawStore.from_results(generate_draws(size, seed=seed))
+    frequency_stats = lambda_function.count_number_frequencies(store)
+    companion_stats = lambda_function.find_most_frequent_companions(store, frequency_stats)
+    average_gap_stats = lambda_function.calculate_average_gap(store)
+    return frequency_stats, companion_stats, average_gap_stats
+
+def test_seeded_predictions():
+    """Test reproducible, distinct 15-number combinations"""
+    frequency_stats, companion_stats, average_gap_stats = _stats()
+    first = lambda_function.predict_next_combinations(frequency_stats, companion_stats, average_gap_stats, 50, seed=7)
+    second = lambda_function.predict_next_combinations(frequency_stats, companion_stats, average_gap_stats, 50, seed=7)
+    other = lambda_function.predict_next_combinations(frequency_stats, companion_stats, average_gap_stats, 50, seed=8)
+
+    assert first == second and first != other
+    assert len(first) == 50 and len({tuple(c) for c in first}) == 50
+    for combination in first:
+        assert len(set(combination)) == 15 and set(combination) <= set(NUMBERS)
+        assert combination == sorted(combination)
+
+    print("✅ Seeded predictions test passed!")
+
+def test_weighted_sampling():
+    """Test that heavier numbers are picked more often and every mask has 15 bits"""
+    weights = np.full(25, 0.1)
+    weights[:5] = 10.0
+    masks = sample_masks(np.random.default_rng(1), weights, 20000)
+    assert (popcount(masks) == 15).all()
+
+    picks = ((masks[:, None] >> np.arange(25, dtype=np.uint32)) & 1).mean(axis=0)
+    assert picks[:5].min() > 0.99
+    assert picks[5:].max() < 0.6
+
+    frequency_stats, companion_stats, average_gap_stats = _stats()
+    weights = number_weights(frequency_stats, companion_stats, average_gap_stats)
+    assert weights.shape == (25,) and (weights > 0).all()
+
+    print("✅ Weighted sampling test passed!")
+
+def test_streaming_dedup():
+    """Test chunked generation of many unique combinations"""
+    weights = np.ones(25)
+    chunks = list(iter_combinations(weights, 200000, seed=3, chunk_size=50000))
+    assert len(chunks) >= 4
+    masks = np.concatenate(chunks)
+    assert len(masks) == 200000 and len(np.unique(masks)) == 200000
+
+    # Pesos concentrados esgotam as combinações possíveis sem laço infinito
+    skewed = np.full(25, 1e-9)
+    skewed[:16] = 1.0
+    assert sum(len(c) for c in iter_combinations(skewed, 100, seed=3)) == 16
+
+    assert TOTAL_COMBINATIONS == 3268760
+
+    print("✅ Streaming dedup test passed!")
+
+def test_request_seed_and_count():
+    """Test seed and combination_count in the request spec"""
+    request = lambda_function.parse_analysis_request({'seed': 11, 'combination_count': 1000})
+    assert (request.seed, request.combination_count) == (11, 1000)
+    assert lambda_function.parse_analysis_request({}).combination_count == lambda_function.DEFAULT_COMBINATION_COUNT
+    try:
+        lambda_function.parse_analysis_request({'combination_count': lambda_function.MAX_COMBINATION_COUNT + 1})
+        assert False, "combination_count acima do máximo deveria falhar"
+    except ValueError:
+        pass
+
+    print("✅ Request seed test passed!")
+
+if __name__ == "__main__":
+    test_seeded_predictions()
+    test_weighted_sampling()
+    test_streaming_dedup()
+    test_request_seed_and_count()
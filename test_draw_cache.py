@@ -0,0 +1,57 @@
+import os
+import tempfile
+import numpy as np
+from moto import mock_aws
+import lambda_function
+from draw_cache import load_draw_cache, save_draw_cache
+from draw_store import DrawStore
+from conftest import synthetic_lambda_table
+
+@mock_aws
+def test_cache_delta_sync_and_validation():
+    """Test that the local cache only fetches new concursos and reloads when it diverges"""
+    with synthetic_lambda_table(300) as (resource, test_table):
+        original_path = lambda_function.DRAW_CACHE_PATH
+        original_validate = lambda_function.DRAW_CACHE_VALIDATE
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                lambda_function.DRAW_CACHE_PATH = os.path.join(tmp_dir, 'draws.npy')
+                lambda_function.DRAW_CACHE_VALIDATE = 'off'
+
+                first = lambda_function.load_draw_store()
+                assert len(first) == 300
+                assert len(load_draw_cache(lambda_function.DRAW_CACHE_PATH)) == 300
+
+                # Só os concursos novos devem ser buscados
+                for concurso in (301, 302):
+                    test_table.put_item(Item={'concurso': concurso, 'dezenas': [str(n).zfill(2) for n in range(1, 16)]})
+                scans = []
+                original_scan = lambda_function._scan_segment
+                lambda_function._scan_segment = lambda *args: scans.append(args) or original_scan(*args)
+                try:
+                    synced = lambda_function.load_draw_store()
+                finally:
+                    lambda_function._scan_segment = original_scan
+                assert not scans
+                assert synced.concursos.tolist() == list(range(1, 303))
+                assert synced.masks[-1] == (1 << 15) - 1
+
+                # Cache corrompido: checksum e contagem detectam e recarregam tudo
+                corrupted = DrawStore(synced.concursos.copy(), synced.masks.copy())
+                corrupted.masks[10] = np.uint32(1)
+                save_draw_cache(corrupted, lambda_function.DRAW_CACHE_PATH)
+                lambda_function.DRAW_CACHE_VALIDATE = 'checksum'
+                assert lambda_function.load_draw_store().masks.tolist() == synced.masks.tolist()
+
+                truncated = DrawStore(synced.concursos[5:].copy(), synced.masks[5:].copy())
+                save_draw_cache(truncated, lambda_function.DRAW_CACHE_PATH)
+                lambda_function.DRAW_CACHE_VALIDATE = 'count'
+                assert len(lambda_function.load_draw_store()) == 302
+        finally:
+            lambda_function.DRAW_CACHE_PATH = original_path
+            lambda_function.DRAW_CACHE_VALIDATE = original_validate
+
+        print("✅ Draw cache test passed!")
+
+if __name__ == "__main__":
+    test_cache_delta_sync_and_validation()
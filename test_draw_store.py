@@ -0,0 +1,130 @@
+import random
+from decimal import Decimal
+from draw_store import DrawStore, encode_dezenas, mask_to_dezenas
+from datetime import date
+import numpy_engine
+import lambda_function
+from draw_store import companion_stats_from_pairs
+from lambda_function import count_number_frequencies, find_most_frequent_companions, calculate_average_gap, calculate_rolling_frequencies, calculate_companion_matrix
+
+def test_mask_round_trip():
+    """Test encoding dezenas in every DynamoDB representation"""
+    mask = encode_dezenas(['01', 3, Decimal('25'), '7', 3])
+    assert mask == (1 << 0) | (1 << 2) | (1 << 6) | (1 << 24)
+    assert mask_to_dezenas(mask) == ['01', '03', '07', '25']
+
+    print("✅ Mask round trip test passed!")
+
+def test_mixed_encodings_give_same_stats():
+    """Test that int/str/Decimal dezenas produce the same statistics"""
+    as_strings = [
+        {'concurso': Decimal(1), 'dezenas': ['01', '03', '05', '07', '09']},
+        {'concurso': Decimal(2), 'dezenas': ['01', '03', '06', '08', '09']},
+        {'concurso': Decimal(3), 'dezenas': ['02', '04', '06', '08', '10']}
+    ]
+    mixed = [
+        {'concurso': Decimal(3), 'dezenas': [2, '4', Decimal(6), 8, '10']},
+        {'concurso': Decimal(1), 'dezenas': [Decimal(1), 3, '5', '07', 9]},
+        {'concurso': Decimal(2), 'dezenas': ['1', '03', 6, Decimal('8'), '09']},
+        {'concurso': Decimal(2), 'dezenas': ['1', '03', 6, Decimal('8'), '09']}
+    ]
+
+    store = DrawStore.from_results(mixed)
+    assert len(store) == 3
+    assert store.concursos.tolist() == [1, 2, 3]
+    assert mask_to_dezenas(int(store.masks[-1])) == ['02', '04', '06', '08', '10']
+
+    frequencies = count_number_frequencies(as_strings)
+    assert count_number_frequencies(store) == frequencies
+    assert find_most_frequent_companions(store, frequencies) == find_most_frequent_companions(as_strings, frequencies)
+    assert calculate_average_gap(store) == calculate_average_gap(as_strings)
+
+    number_01 = next(item for item in calculate_average_gap(store) if item['number'] == '01')
+    assert number_01['avg_gap'] == 1 and number_01['total_appearances'] == 2
+
+    print("✅ Mixed encodings test passed!")
+
+def test_numpy_engine_matches_python_engine():
+    """Test the vectorized engine against the bit-loop engine"""
+    rng = random.Random(11)
+    results = [
+        {'concurso': Decimal(concurso), 'dezenas': rng.sample(range(1, 26), 15)}
+        for concurso in range(1, 501)
+    ]
+    results.append({'dezenas': ['01', '02', '03']})  # sem concurso: só entra nas contagens
+    store = DrawStore.from_results(results)
+
+    assert numpy_engine.frequencies(store) == store.frequencies()
+    assert numpy_engine.pair_counts(store) == store.pair_counts()
+    assert numpy_engine.gaps(store) == store.gaps()
+
+    print("✅ NumPy engine test passed!")
+
+def test_windows_and_rolling_series():
+    """Test last N, concurso and date windows and the prefix-sum rolling series"""
+    rng = random.Random(5)
+    results = [
+        {
+            'concurso': Decimal(concurso),
+            'data': date.fromordinal(date(2020, 1, 1).toordinal() + 3 * concurso).strftime('%d/%m/%Y'),
+            'dezenas': rng.sample(range(1, 26), 15)
+        }
+        for concurso in range(1, 401)
+    ]
+    last_100 = results[-100:]
+
+    assert count_number_frequencies(results, last_n=100) == count_number_frequencies(last_100)
+    assert count_number_frequencies(results, concurso_range=(301, None)) == count_number_frequencies(last_100)
+    assert count_number_frequencies(results, date_range=(last_100[0]['data'], '2099-12-31')) == count_number_frequencies(last_100)
+    frequencies = count_number_frequencies(last_100)
+    assert find_most_frequent_companions(results, frequencies, last_n=100) == find_most_frequent_companions(last_100, frequencies)
+    assert calculate_average_gap(results, concurso_range=(301, 400)) == calculate_average_gap(last_100)
+
+    rolling = calculate_rolling_frequencies(results, window=50)
+    assert rolling['concursos'] == list(range(1, 401))
+    for t in (0, 10, 49, 50, 399):
+        expected = count_number_frequencies(results[max(0, t - 49):t + 1])
+        for item in expected:
+            assert rolling['frequencies'][item['number']][t] == item['quantity']
+
+    print("✅ Windows and rolling series test passed!")
+
+def test_companion_matrix_and_triples():
+    """Test the full companion matrix, triples and the derived companion_stats"""
+    rng = random.Random(9)
+    draws = [set(rng.sample(range(1, 26), 15)) for _ in range(300)]
+    results = [{'concurso': Decimal(c + 1), 'dezenas': sorted(d)} for c, d in enumerate(draws)]
+
+    section = calculate_companion_matrix(results, triple_top_k=5)
+    matrix = section['matrix']
+    for i in range(1, 26):
+        for j in range(1, 26):
+            assert matrix[i - 1][j - 1] == sum(1 for d in draws if i in d and j in d)
+
+    assert len(section['triples']) == 5
+    pair_quantities = sorted((matrix[a][b] for a in range(25) for b in range(a + 1, 25)), reverse=True)
+    assert [triple['quantity'] for triple in section['triples']] == pair_quantities[:5]
+    for triple in section['triples']:
+        i, j = (int(n) for n in triple['pair'])
+        assert triple['quantity'] == matrix[i - 1][j - 1]
+        for companion in triple['most_frequent']:
+            k = int(companion['number'])
+            assert companion['quantity'] == sum(1 for d in draws if {i, j, k} <= d)
+
+    frequencies = count_number_frequencies(results)
+    assert companion_stats_from_pairs(matrix, frequencies) == find_most_frequent_companions(results, frequencies)
+
+    lambda_function.ANALYSIS_ENGINE = 'numpy'
+    try:
+        assert calculate_companion_matrix(results, triple_top_k=5) == section
+    finally:
+        lambda_function.ANALYSIS_ENGINE = 'python'
+
+    print("✅ Companion matrix test passed!")
+
+if __name__ == "__main__":
+    test_mask_round_trip()
+    test_mixed_encodings_give_same_stats()
+    test_numpy_engine_matches_python_engine()
+    test_windows_and_rolling_series()
+    test_companion_matrix_and_triples()
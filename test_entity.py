@@ -0,0 +1,91 @@
+import gc
+import tracemalloc
+from datetime import date
+import numpy as np
+from draw_store import DrawStore, MISSING_CONCURSO, mask_to_dezenas
+from entity import LotofacilResultEntity, LotofacilResultsListEntity, PRIZE_TIERS
+from synthetic_draws import generate_draws
+
+def _allocated(build):
+    # Bytes ainda alocados depois de construir o objeto (o objeto fica vivo até a medição)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del obj
+    return current
+
+def test_entity_from_item():
+    """Test conversion of a DynamoDB item into a slotted entity"""
+    item = generate_draws(5, seed=31)[4]
+    entity = LotofacilResultEntity.from_item(item)
+
+    assert not hasattr(entity, '__dict__')
+    assert entity.concurso == 5 and isinstance(entity.concurso, int)
+    assert entity.data == date(2003, 10, 7)
+    assert entity.dezenas == sorted(str(int(n)).zfill(2) for n in item['dezenas'])
+    assert entity.numbers == tuple(int(n) for n in entity.dezenas)
+    assert entity.premiacoes.onze.premio == 6.0 and isinstance(entity.premiacoes.onze.premio, float)
+    assert entity.premiacoes.quatorze.vencedores == int(item['premiacoes']['quatorze']['vencedores'])
+    assert entity.proxConcurso == 6 and entity.dataProxConcurso == date(2003, 10, 9)
+
+    # Itens da projeção só trazem concurso, data e dezenas
+    projected = LotofacilResultEntity.from_item({'dezenas': ['01', '02'], 'data': 'inválida'})
+    assert projected.concurso == MISSING_CONCURSO and projected.data is None
+    assert projected.premiacoes.quinze.premio == 0.0 and not projected.acumulou
+
+    print("✅ Entity from item test passed!")
+
+def test_columnar_history():
+    """Test that the columnar history matches DrawStore and the prize columns"""
+    draws = generate_draws(300, seed=32)
+    # Concurso repetido (fica o último), item sem concurso e item sem dezenas
+    items = draws + [dict(draws[7], dezenas=draws[8]['dezenas']), {'dezenas': draws[0]['dezenas']}, {'concurso': 999}]
+    history = LotofacilResultsListEntity.from_items(items)
+    expected = DrawStore.from_results(items)
+
+    store = history.store()
+    assert np.array_equal(store.concursos, expected.concursos)
+    assert np.array_equal(store.masks, expected.masks)
+    assert np.array_equal(store.dates, expected.dates)
+    assert np.shares_memory(store.masks, history.masks)
+    assert store.frequencies() == expected.frequencies()
+
+    assert len(history) == 301
+    entity = history[8]
+    assert entity.concurso == 8 and entity.dezenas == mask_to_dezenas(int(expected.masks[8]))
+    assert [e.concurso for e in history.results[:3]] == [MISSING_CONCURSO, 1, 2]
+
+    concursos = np.array([1, 250, 5000])
+    prizes = history.prize_table(concursos)
+    assert prizes.shape == (3, 16) and not prizes[2].any()
+    for tier, hits in zip(PRIZE_TIERS, range(15, 10, -1)):
+        assert prizes[1, hits] == float(draws[249]['premiacoes'][tier]['premio'])
+    assert history.vencedores[history.concursos == 250, 0][0] == int(draws[249]['premiacoes']['quinze']['vencedores'])
+
+    print("✅ Columnar history test passed!")
+
+def test_memory_comparison():
+    """Test memory per draw of DynamoDB dicts vs slotted entities vs columns"""
+    draws = generate_draws(2000, seed=33)
+
+    dict_bytes = _allocated(lambda: generate_draws(2000, seed=33))
+    entity_bytes = _allocated(lambda: [LotofacilResultEntity.from_item(d) for d in draws])
+    columnar_bytes = _allocated(lambda: LotofacilResultsListEntity.from_items(draws))
+
+    per_draw = {name: size / len(draws) for name, size in
+                (('dict', dict_bytes), ('entity', entity_bytes), ('columnar', columnar_bytes))}
+    print(f"Bytes por concurso: {', '.join(f'{k} {v:.0f}' for k, v in per_draw.items())}")
+
+    assert entity_bytes * 3 < dict_bytes
+    assert columnar_bytes * 10 < dict_bytes
+
+    print("✅ Memory comparison test passed!")
+
+if __name__ == "__main__":
+    test_entity_from_item()
+    test_columnar_history()
+    test_memory_comparison()
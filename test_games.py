@@ -0,0 +1,135 @@
+import json
+import random
+import numpy as np
+from moto import mock_aws
+import lambda_function
+import numpy_engine
+from draw_store import DrawStore, mask_to_numbers
+from games import GAMES, get_game
+from conftest import synthetic_lambda_table
+
+def _game_draws(game, count, seed):
+    rng = random.Random(seed)
+    return [
+        {
+            'concurso': concurso,
+            'dezenas': sorted(str(n).zfill(2) for n in rng.sample(range(1, game.universe + 1), game.draw_size)),
+            'data': f"{concurso % 28 + 1:02d}/02/2021"
+        }
+        for concurso in range(1, count + 1)
+    ]
+
+def _create_game_table(resource, game, count, seed):
+    game_table = resource.create_table(
+        TableName=game.table_name,
+        KeySchema=[{'AttributeName': 'concurso', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'concurso', 'AttributeType': 'N'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    draws = _game_draws(game, count, seed)
+    with game_table.batch_writer() as batch:
+        for draw in draws:
+            batch.put_item(Item=draw)
+    return draws
+
+def test_draw_store_universe():
+    """Test masks, counts and gaps for games with more than 32 numbers"""
+    for key, dtype in (('megasena', np.uint64), ('quina', object)):
+        game = get_game(key)
+        draws = _game_draws(game, 150, seed=7)
+        store = DrawStore.from_results(draws, game.universe)
+        assert store.masks.dtype == dtype
+        assert store.window(last_n=10).universe == game.universe
+
+        counts = [0] * game.universe
+        for draw in draws:
+            for n in draw['dezenas']:
+                counts[int(n) - 1] += 1
+        assert store.frequencies() == counts == numpy_engine.frequencies(store)
+        assert store.matrix().shape == (150, game.universe)
+        assert store.matrix().sum(axis=1).tolist() == [game.draw_size] * 150
+        assert store.pair_counts() == numpy_engine.pair_counts(store)
+        assert store.gaps() == numpy_engine.gaps(store)
+        assert int(store.concursos[-1]) == 150 and mask_to_numbers(int(store.masks[-1])) == [int(n) for n in draws[-1]['dezenas']]
+
+    print("✅ Draw store universe test passed!")
+
+def test_statistics_for_other_games():
+    """Test that the analyses use the game's numbers and draw size"""
+    game = GAMES['quina']
+    store = DrawStore.from_results(_game_draws(game, 300, seed=8), game.universe)
+
+    frequency_stats = lambda_function.count_number_frequencies(store)
+    assert sorted(item['number'] for item in frequency_stats) == game.numbers
+    companion_stats = lambda_function.find_most_frequent_companions(store, frequency_stats, game.draw_size)
+    assert len(companion_stats) == 5
+    assert all(len(item['most_frequent']) == 4 for item in companion_stats)
+    gaps = lambda_function.calculate_average_gap(store)
+    assert sorted(item['number'] for item in gaps) == game.numbers
+    matrix = lambda_function.calculate_companion_matrix(store, triple_top_k=3)
+    assert len(matrix['matrix']) == 80 and len(matrix['triples']) == 3
+    rolling = lambda_function.calculate_rolling_frequencies(store, 20)
+    assert len(rolling['frequencies']) == 80
+
+    print("✅ Other games statistics test passed!")
+
+@mock_aws
+def test_batch_event():
+    """Test several games analysed concurrently in one invocation"""
+    with synthetic_lambda_table(200) as (resource, test_table):
+        megasena = _create_game_table(resource, GAMES['megasena'], 120, seed=9)
+        _create_game_table(resource, GAMES['quina'], 90, seed=10)
+
+        response = lambda_function.lambda_handler({
+            'sections': ['frequency_stats', 'companion_stats', 'last_result'],
+            'games': ['lotofacil', 'megasena', {'game': 'quina', 'sections': ['average_gap_stats', 'companion_matrix']}]
+        }, None)
+        single = lambda_function.lambda_handler({'game': 'megasena'}, None)
+        unsupported = lambda_function.lambda_handler({'games': ['lotofacil', {'game': 'quina', 'sections': ['simple_predictions']}],
+                                                      'sections': ['last_result']}, None)
+        unknown = lambda_function.lambda_handler({'games': ['lotofacil', 'lotomania']}, None)
+
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert list(body) == ['lotofacil', 'megasena', 'quina']
+        assert len(body['lotofacil']['frequency_stats']) == 25
+        assert body['lotofacil']['last_result']['concurso'] == 200
+        assert len(body['megasena']['frequency_stats']) == 60
+        assert len(body['megasena']['companion_stats']) == 6
+        assert body['megasena']['last_result']['dezenas'] == megasena[-1]['dezenas']
+        assert list(body['quina']) == ['average_gap_stats', 'companion_matrix']
+        assert len(body['quina']['companion_matrix']['numbers']) == 80
+        assert sum(body['quina']['companion_matrix']['matrix'][i][i] for i in range(80)) == 90 * 5
+
+        assert single['statusCode'] == 200
+        assert list(json.loads(single['body'])) == list(lambda_function.GAME_DEFAULT_SECTIONS)
+
+        assert unsupported['statusCode'] == 500
+        failed = json.loads(unsupported['body'])
+        assert 'last_result' in failed['lotofacil'] and 'error' in failed['quina']
+        assert unknown['statusCode'] == 500 and 'lotomania' in json.loads(unknown['body'])['error']
+
+        print("✅ Batch event test passed!")
+
+def test_invalid_events():
+    """Test that malformed events come back as 500 responses instead of raising"""
+    for event in ({'games': [5]}, {'games': ['lotofacil', ['megasena']]}, ['lotofacil'], 'lotofacil'):
+        response = lambda_function.lambda_handler(event, None)
+        assert response['statusCode'] == 500
+        assert 'error' in json.loads(response['body'])
+
+    original_dispatch = lambda_function.dispatch_event
+    lambda_function.dispatch_event = lambda event: {}['statusCode']
+    try:
+        response = lambda_function.lambda_handler({}, None)
+    finally:
+        lambda_function.dispatch_event = original_dispatch
+    assert response['statusCode'] == 500 and 'statusCode' in json.loads(response['body'])['error']
+
+    print("✅ Invalid events test passed!")
+
+if __name__ == "__main__":
+    test_draw_store_universe()
+    test_statistics_for_other_games()
+    test_batch_event()
+    test_invalid_events()
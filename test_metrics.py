@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from moto import mock_aws
+import lambda_function
+import metrics
+from conftest import synthetic_lambda_table
+
+def _metrics_records(output: str):
+    records = []
+    for line in output.splitlines():
+        if line.startswith('{') and '"_aws"' in line:
+            records.append(json.loads(line))
+    return records
+
+def test_emf_record():
+    """Test that stages and counters become an Embedded Metric Format record"""
+    invocation = metrics.InvocationMetrics('fezinhai', 'req-1')
+    with invocation.stage('scan'):
+        invocation.increment('scan_pages')
+        invocation.increment('items_read', 10)
+    with invocation.stage('scan'):
+        invocation.increment('scan_pages')
+
+    record = invocation.to_emf()
+    definitions = {m['Name']: m['Unit'] for m in record['_aws']['CloudWatchMetrics'][0]['Metrics']}
+    assert definitions['scan_ms'] == 'Milliseconds'
+    assert definitions['scan_pages'] == 'Count'
+    assert record['scan_pages'] == 2 and record['items_read'] == 10
+    assert record['FunctionName'] == 'fezinhai'
+    assert record['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['FunctionName']]
+
+    # Fora de uma invocação as chamadas não fazem nada
+    with metrics.current().stage('scan'):
+        metrics.current().increment('scan_pages')
+    assert metrics.current().counters == {}
+
+    print("✅ EMF record test passed!")
+
+@mock_aws
+def test_handler_emits_single_metrics_record():
+    """Test one metrics record per invocation with scan, analysis and serialization stages"""
+    with synthetic_lambda_table(300) as (resource, test_table):
+        with tempfile.TemporaryDirectory() as tmp:
+            original_dir = metrics.PROFILE_OUTPUT_DIR
+            metrics.PROFILE_OUTPUT_DIR = tmp
+            output = io.StringIO()
+            try:
+                with redirect_stdout(output):
+                    response = lambda_function.lambda_handler({
+                        'sections': ['frequency_stats', 'average_gap_stats'],
+                        'profile': True,
+                        'trace_memory': True
+                    }, None)
+            finally:
+                metrics.PROFILE_OUTPUT_DIR = original_dir
+
+            assert response['statusCode'] == 200
+            records = _metrics_records(output.getvalue())
+            assert len(records) == 1
+            record = records[0]
+            for key in ('scan_ms', 'normalization_ms', 'frequency_stats_ms', 'average_gap_stats_ms', 'serialization_ms'):
+                assert key in record, key
+            assert record['items_read'] == 300
+            assert record['scan_pages'] >= 1
+            assert record['draws'] == 300
+            assert record['statusCode'] == 200
+            assert record['invocation_peak_bytes'] > 0
+            assert os.path.exists(record['profile_path'])
+            assert os.path.exists(record['tracemalloc_path'])
+
+        print("✅ Handler metrics test passed!")
+
+if __name__ == "__main__":
+    test_emf_record()
+    test_handler_emits_single_metrics_record()
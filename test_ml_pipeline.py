@@ -0,0 +1,175 @@
+import os
+import tempfile
+import time
+import boto3
+import numpy as np
+from moto import mock_aws
+import ml_pipeline
+from draw_store import DrawStore, NUMBERS
+from model_store import LocalModelStore, ModelArtifacts, S3ModelStore
+from synthetic_draws import generate_draws
+
+def _naive_features(matrix, t, lookback, companion_lookback):
+    """Features do concurso t calculadas com laços, só com os concursos anteriores a t"""
+    history = matrix[:t].astype(int)
+    features = np.zeros((25, 4))
+    for i in range(25):
+        features[i, 0] = history[max(0, t - lookback):, i].sum() / lookback
+        seen = np.flatnonzero(history[:, i])
+        features[i, 1] = min(t - seen[-1] if len(seen) else lookback, lookback) / lookback
+        score = 0
+        for k in range(1, companion_lookback + 1):
+            if t - k >= 0:
+                score += history[t - k, i] * (history[t - k] * history[t - 1]).sum()
+        features[i, 2] = score / (companion_lookback * 15)
+        features[i, 3] = history[t - 1, i] if t else 0
+    return features
+
+def test_feature_builder_matches_naive():
+    """Test the vectorized feature builder against a loop over the previous draws"""
+    matrix = DrawStore.from_results(generate_draws(120, seed=5)).matrix()
+    features = ml_pipeline.build_features(matrix, lookback=30, companion_lookback=10)
+    assert features.shape == (121, 25, ml_pipeline.FEATURES_PER_NUMBER)
+    for t in (1, 5, 29, 30, 31, 77, 120):
+        assert np.allclose(features[t], _naive_features(matrix, t, 30, 10)), t
+
+    print("✅ Feature builder test passed!")
+
+def test_training_window_is_exact():
+    """Test that trimming the history to the training window keeps the same features"""
+    store = DrawStore.from_results(generate_draws(400, seed=6))
+    X_full, y_full, next_full = ml_pipeline.training_data(store, 30, 10, max_training_draws=1000)
+    X, y, next_draw = ml_pipeline.training_data(store, 30, 10, max_training_draws=100)
+    assert len(y) == 100 * 25
+    assert np.allclose(X, X_full[-len(X):]) and (y == y_full[-len(y):]).all()
+    assert np.allclose(next_draw, next_full)
+
+    print("✅ Training window test passed!")
+
+def test_train_and_predict():
+    """Test combinations built from per-number probabilities in bounded time"""
+    store = DrawStore.from_results(generate_draws(30000, seed=7))
+    start = time.perf_counter()
+    predictions = ml_pipeline.train_and_predict(store)
+    elapsed = time.perf_counter() - start
+
+    assert set(predictions) == {'DecisionTree', 'KNN'}
+    for combinations in predictions.values():
+        assert len(combinations) == ml_pipeline.ML_COMBINATIONS
+        assert len({tuple(c) for c in combinations}) == len(combinations)
+        for combination in combinations:
+            assert len(set(combination)) == 15 and set(combination) <= set(NUMBERS)
+    assert elapsed < 30, elapsed
+
+    probabilities = np.linspace(1, 0, 25)
+    combinations = ml_pipeline.combinations_from_probabilities(probabilities, 2)
+    assert combinations[0] == NUMBERS[:15]
+    assert combinations[1] == NUMBERS[:14] + [NUMBERS[15]]
+
+    # Empate nas probabilidades: vence a dezena mais frequente, não a menor
+    tied = np.r_[np.ones(20), np.zeros(5)]
+    frequencies = np.arange(25)
+    assert ml_pipeline.combinations_from_probabilities(tied, 1)[0] == NUMBERS[:15]
+    assert ml_pipeline.combinations_from_probabilities(tied, 1, frequencies)[0] == NUMBERS[5:20]
+
+    print("✅ Train and predict test passed!")
+
+def test_model_artifacts_and_incremental_update():
+    """Test that models are loaded when nothing changed and updated with only the new draws"""
+    draws = generate_draws(600, seed=8)
+    original_fit = ml_pipeline._fit_models
+    original_models = ml_pipeline.ML_MODELS
+    # SGD ligado para exercitar o partial_fit
+    ml_pipeline.ML_MODELS = ml_pipeline.MODEL_NAMES
+    try:
+        _check_model_artifacts(draws, original_fit)
+    finally:
+        ml_pipeline.ML_MODELS = original_models
+
+    print("✅ Model artifacts test passed!")
+
+def _check_model_artifacts(draws, original_fit):
+
+    def fail(*args, **kwargs):
+        raise AssertionError("os modelos não deveriam ser treinados do zero")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DrawStore.from_results(draws[:500])
+        first = ml_pipeline.train_and_predict(store, artifacts=ModelArtifacts(LocalModelStore(tmp)))
+        assert os.path.exists(os.path.join(tmp, 'model-500.pkl'))
+
+        ml_pipeline._fit_models = fail
+        try:
+            # Container novo: o artefato é lido do disco
+            assert ml_pipeline.train_and_predict(store, artifacts=ModelArtifacts(LocalModelStore(tmp))) == first
+
+            artifacts = ModelArtifacts(LocalModelStore(tmp))
+            previous_sgd = artifacts.load()['models']['SGD']
+            updated = ml_pipeline.train_and_predict(DrawStore.from_results(draws), artifacts=artifacts)
+            assert set(updated) == {'DecisionTree', 'KNN', 'SGD'}
+            assert artifacts.load()['watermark'] == 600
+            assert artifacts.load()['models']['SGD'] is not previous_sgd
+            assert sorted(os.listdir(tmp)) == ['latest.json', 'model-600.pkl']
+        finally:
+            ml_pipeline._fit_models = original_fit
+
+        # Histórico divergente do artefato: treino do zero
+        changed = DrawStore.from_results(draws)
+        changed.masks[-10] ^= 0b11
+        calls = []
+        ml_pipeline._fit_models = lambda valid: calls.append(len(valid)) or original_fit(valid)
+        try:
+            ml_pipeline.train_and_predict(changed, artifacts=ModelArtifacts(LocalModelStore(tmp)))
+        finally:
+            ml_pipeline._fit_models = original_fit
+        assert calls == [600]
+
+def test_update_without_incremental_models():
+    """Test that the new-draws training set is only built when an incremental model is configured"""
+    valid = DrawStore.from_results(generate_draws(300, seed=10))
+    original_training_data = ml_pipeline.training_data
+    original_models = ml_pipeline.ML_MODELS
+    windows = []
+    ml_pipeline.training_data = lambda store, **kwargs: \
+        windows.append(kwargs.get('max_training_draws')) or original_training_data(store, **kwargs)
+    try:
+        ml_pipeline.ML_MODELS = ('DecisionTree', 'KNN')
+        models = ml_pipeline._update_models(valid, {'models': {}}, 5)
+        assert set(models) == {'DecisionTree', 'KNN'} and windows == [None]
+
+        windows.clear()
+        ml_pipeline.ML_MODELS = ('SGD',)
+        sgd = ml_pipeline.make_models(['SGD'])['SGD']
+        X, y, _ = original_training_data(valid)
+        sgd.partial_fit(X, y, classes=[0, 1])
+        ml_pipeline._update_models(valid, {'models': {'SGD': sgd}}, 5)
+        assert windows == [5]
+    finally:
+        ml_pipeline.training_data = original_training_data
+        ml_pipeline.ML_MODELS = original_models
+
+    print("✅ Update without incremental models test passed!")
+
+@mock_aws
+def test_s3_model_store():
+    """Test the S3-compatible artifact store"""
+    client = boto3.client('s3', region_name='us-east-1')
+    client.create_bucket(Bucket='fezinhai-models')
+    backend = S3ModelStore('fezinhai-models', 'lotofacil', client=client)
+    assert backend.read('latest.json') is None
+
+    store = DrawStore.from_results(generate_draws(200, seed=9))
+    first = ml_pipeline.train_and_predict(store, artifacts=ModelArtifacts(backend))
+    assert ModelArtifacts(backend).load()['watermark'] == 200
+    assert client.head_object(Bucket='fezinhai-models', Key='lotofacil/model-200.pkl')
+    assert ml_pipeline.train_and_predict(store, artifacts=ModelArtifacts(backend)) == first
+
+    print("✅ S3 model store test passed!")
+
+if __name__ == "__main__":
+    test_feature_builder_matches_naive()
+    test_training_window_is_exact()
+    test_train_and_predict()
+    test_model_artifacts_and_incremental_update()
+    test_update_without_incremental_models()
+    test_s3_model_store()
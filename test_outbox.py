@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+from moto import mock_aws
+import lambda_function
+import outbox_worker
+from outbox import FileOutbox
+from test_api_client import StubApi
+from conftest import synthetic_lambda_table
+
+def test_file_outbox():
+    """Test claim, retry with delay, dead-letter and visibility timeout recovery"""
+    now = [1000.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = FileOutbox(tmp, visibility_timeout=60, clock=lambda: now[0])
+        first = outbox.send_message('{"a": 1}')
+        outbox.send_message('{"b": 2}')
+        assert len(outbox) == 2
+
+        messages = outbox.receive_messages(10)
+        assert [m.message_id for m in messages][0] == first
+        assert outbox.receive_messages(10) == []
+
+        outbox.delete_message(messages[0].receipt)
+        outbox.retry_message(messages[1].receipt, 30)
+        assert outbox.receive_messages(10) == []
+        now[0] += 31
+        retried = outbox.receive_messages(10)
+        assert len(retried) == 1 and retried[0].attempts == 1
+
+        outbox.dead_letter(retried[0].receipt)
+        assert len(outbox) == 0
+        assert len(os.listdir(os.path.join(tmp, 'failed'))) == 1
+
+        # Mensagem reservada por um worker que não terminou volta para a fila
+        outbox.send_message('{"c": 3}')
+        claimed = outbox.receive_messages(10)
+        os.utime(claimed[0].receipt, (0, 0))
+        assert [m.body for m in outbox.receive_messages(10)] == ['{"c": 3}']
+
+    print("✅ File outbox test passed!")
+
+@mock_aws
+def test_handler_enqueues_and_worker_drains():
+    """Test that outbox mode returns without calling the API and the worker uploads in one batch"""
+    with synthetic_lambda_table(200) as (resource, test_table):
+        original_mode = lambda_function.API_DISPATCH_MODE
+        original_url = lambda_function.OUTBOX_URL
+        original_send = lambda_function.send_data_to_api
+
+        def fail(*args, **kwargs):
+            raise AssertionError("o handler não deveria chamar a API no modo outbox")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            lambda_function.API_DISPATCH_MODE = 'outbox'
+            lambda_function.OUTBOX_URL = tmp
+            try:
+                lambda_function.send_data_to_api = fail
+                os.environ['API_URL'] = 'http://127.0.0.1:9'
+                for sections in (['frequency_stats', 'last_result'], ['last_result']):
+                    response = lambda_function.lambda_handler({'sections': sections, 'push': True}, None)
+                    assert response['statusCode'] == 200
+                    lambda_function.warm_cache.clear()
+                lambda_function.send_data_to_api = original_send
+
+                with StubApi() as api:
+                    summary = outbox_worker.drain_outbox()
+                    assert summary == {'delivered': 2, 'uploads': 1, 'retried': 0, 'dead_lettered': 0}
+                    assert len(api.received) == 1
+                    assert set(api.received[0]) == {'frequency_stats', 'last_result'}
+                    assert api.received[0]['last_result']['concurso'] == 200
+            finally:
+                lambda_function.send_data_to_api = original_send
+                lambda_function.API_DISPATCH_MODE = original_mode
+                lambda_function.OUTBOX_URL = original_url
+
+        print("✅ Outbox dispatch test passed!")
+
+def test_worker_retries_failed_batch():
+    """Test that a failed upload is retried with backoff and dead-lettered after the last attempt"""
+    original_attempts = outbox_worker.OUTBOX_MAX_ATTEMPTS
+    original_deliver = lambda_function.deliver_sections
+    with tempfile.TemporaryDirectory() as tmp:
+        now = [0.0]
+        outbox = FileOutbox(tmp, clock=lambda: now[0])
+        outbox.send_message(json.dumps({'enqueued_at': 1, 'sections': {'last_result': '{}'}}))
+        outbox_worker.OUTBOX_MAX_ATTEMPTS = 2
+        lambda_function.deliver_sections = lambda sections: False
+        try:
+            assert outbox_worker.drain_outbox(outbox)['retried'] == 1
+            assert outbox_worker.drain_outbox(outbox)['uploads'] == 0
+            now[0] += outbox_worker.OUTBOX_RETRY_BASE_DELAY + 1
+            assert outbox_worker.drain_outbox(outbox)['dead_lettered'] == 1
+            assert len(outbox) == 0
+        finally:
+            outbox_worker.OUTBOX_MAX_ATTEMPTS = original_attempts
+            lambda_function.deliver_sections = original_deliver
+
+    print("✅ Outbox retry test passed!")
+
+if __name__ == "__main__":
+    test_file_outbox()
+    test_handler_enqueues_and_worker_drains()
+    test_worker_retries_failed_batch()
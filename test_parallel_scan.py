@@ -0,0 +1,34 @@
+import time
+from moto import mock_aws
+import lambda_function
+from conftest import synthetic_lambda_table
+
+ITEM_COUNT = 20000
+
+@mock_aws
+def test_parallel_scan_matches_sequential_scan():
+    """Test the segmented scan against a synthetic table of tens of thousands of items"""
+    with synthetic_lambda_table(ITEM_COUNT) as (resource, test_table):
+        start = time.perf_counter()
+        sequential = lambda_function.get_lotofacil_results(segments=1)
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = lambda_function.get_lotofacil_results(segments=8, projection=True)
+        parallel_time = time.perf_counter() - start
+
+        assert len(sequential) == ITEM_COUNT
+        assert len(parallel) == ITEM_COUNT
+        assert {item['concurso'] for item in parallel} == set(range(1, ITEM_COUNT + 1))
+        assert all(set(item) == {'concurso', 'dezenas', 'data'} for item in parallel)
+
+        by_concurso = {item['concurso']: item['dezenas'] for item in sequential}
+        assert all(by_concurso[item['concurso']] == item['dezenas'] for item in parallel)
+
+        last = lambda_function.get_lotofacil_result(ITEM_COUNT)
+        assert last['timeCoracao'] == 'FLAMENGO/RJ'
+
+        print(f"✅ Parallel scan test passed! (sequencial {sequential_time:.2f}s, paralelo {parallel_time:.2f}s)")
+
+if __name__ == "__main__":
+    test_parallel_scan_matches_sequential_scan()
@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+from moto import mock_aws
+import lambda_function
+from conftest import synthetic_lambda_table
+
+def test_import_is_lazy():
+    """Test that importing lambda_function does not load boto3, requests or scikit-learn"""
+    code = (
+        "import sys, lambda_function; "
+        "print(','.join(m for m in ('boto3', 'requests', 'sklearn') if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == ''
+
+    print("✅ Lazy import test passed!")
+
+@mock_aws
+def test_only_requested_sections_are_computed():
+    """Test that a subset of sections skips the ML path"""
+    with synthetic_lambda_table(200) as (resource, test_table):
+        def fail(*args, **kwargs):
+            raise AssertionError("trained_predictions não deveria ser calculado")
+
+        original_train = lambda_function.train_and_predict_combinations
+        lambda_function.train_and_predict_combinations = fail
+        try:
+            response = lambda_function.lambda_handler({'sections': ['average_gap_stats', 'frequency_stats']}, None)
+            assert response['statusCode'] == 200
+            assert list(json.loads(response['body'])) == ['frequency_stats', 'average_gap_stats']
+
+            response = lambda_function.lambda_handler({'sections': ['frequency_stats', 'unknown']}, None)
+            assert response['statusCode'] == 500
+        finally:
+            lambda_function.train_and_predict_combinations = original_train
+
+        print("✅ Sections test passed!")
+
+def test_parse_analysis_request():
+    """Test request spec defaults and validation"""
+    full = lambda_function.parse_analysis_request({})
+    assert full.sections == list(lambda_function.DEFAULT_SECTIONS) and full.push
+
+    partial = lambda_function.parse_analysis_request({'sections': ['last_result'], 'concurso_range': [10, 20]})
+    assert not partial.push
+    assert (partial.concurso_from, partial.concurso_to) == (10, 20)
+
+    forced = lambda_function.parse_analysis_request({'sections': ['frequency_stats'], 'push': True})
+    assert forced.push
+
+    try:
+        lambda_function.parse_analysis_request({'concurso_range': {'from': 20, 'to': 10}})
+        assert False, "concurso_range invertido deveria falhar"
+    except ValueError:
+        pass
+
+    print("✅ Request spec test passed!")
+
+@mock_aws
+def test_concurso_window_and_last_result_fast_path():
+    """Test windowed stats and the last_result-only request"""
+    with synthetic_lambda_table(200) as (resource, test_table):
+        scans = []
+        original_scan = lambda_function._scan_segment
+        lambda_function._scan_segment = lambda *args: scans.append(args) or original_scan(*args)
+        try:
+            response = lambda_function.lambda_handler({'sections': ['last_result']}, None)
+            assert json.loads(response['body'])['last_result']['concurso'] == 200
+            assert all(args[3] == ('concurso',) for args in scans)
+
+            scans.clear()
+            test_table.put_item(Item={'concurso': 201, 'dezenas': [str(n).zfill(2) for n in range(1, 16)]})
+            response = lambda_function.lambda_handler({'sections': ['last_result']}, None)
+            assert json.loads(response['body'])['last_result']['concurso'] == 201
+            assert not scans
+
+            response = lambda_function.lambda_handler(
+                {'sections': ['frequency_stats', 'last_result'], 'concurso_range': {'from': 201}}, None
+            )
+            body = json.loads(response['body'])
+            assert body['last_result']['concurso'] == 201
+            assert sum(item['quantity'] for item in body['frequency_stats']) == 15
+            assert {item['number'] for item in body['frequency_stats'] if item['quantity']} == \
+                {str(n).zfill(2) for n in range(1, 16)}
+
+            # last_result sozinho também respeita a janela
+            response = lambda_function.lambda_handler({'sections': ['last_result'], 'concurso_range': {'to': 150}}, None)
+            assert json.loads(response['body'])['last_result']['concurso'] == 150
+            response = lambda_function.lambda_handler({'sections': ['last_result'], 'concurso_range': {'from': 300}}, None)
+            assert response['statusCode'] == 500
+        finally:
+            lambda_function._scan_segment = original_scan
+
+        print("✅ Window and last_result test passed!")
+
+if __name__ == "__main__":
+    test_import_is_lazy()
+    test_only_requested_sections_are_computed()
+    test_parse_analysis_request()
+    test_concurso_window_and_last_result_fast_path()
@@ -0,0 +1,65 @@
+import json
+from decimal import Decimal
+from moto import mock_aws
+import lambda_function
+import serialization
+from conftest import synthetic_lambda_table
+
+def test_to_plain_and_dumps():
+    """Test DynamoDB type conversion and that orjson and the stdlib fallback agree"""
+    item = {'concurso': Decimal(3000), 'premio': Decimal('1234.56'), 'dezenas': ['01', Decimal(2)], 'tags': {'b', 'a'}}
+    plain = serialization.to_plain(item)
+    assert plain == {'concurso': 3000, 'premio': 1234.56, 'dezenas': ['01', 2], 'tags': ['a', 'b']}
+    assert isinstance(plain['concurso'], int)
+
+    original = serialization.orjson
+    try:
+        fast = serialization.dumps(item)
+        serialization.orjson = None
+        fallback = serialization.dumps(item)
+    finally:
+        serialization.orjson = original
+    assert json.loads(fast) == json.loads(fallback) == plain
+    assert json.loads(serialization.join_objects({'a': fast, 'b': '[]'})) == {'a': plain, 'b': []}
+
+    print("✅ Serialization test passed!")
+
+def test_to_columnar():
+    """Test that lists of records become one list per field"""
+    frequency_stats = [{'number': '01', 'quantity': 10}, {'number': '02', 'quantity': 9}]
+    assert serialization.to_columnar(frequency_stats) == {'numbers': ['01', '02'], 'quantity': [10, 9]}
+
+    companion_stats = [{'number': '01', 'most_frequent': [{'number': '02', 'quantity': 5}]}]
+    assert serialization.to_columnar(companion_stats) == {
+        'numbers': ['01'], 'most_frequent': [{'numbers': ['02'], 'quantity': [5]}]
+    }
+    # Listas que não são registros ficam como estão
+    assert serialization.to_columnar([['01', '02']]) == [['01', '02']]
+
+    print("✅ Columnar test passed!")
+
+@mock_aws
+def test_columnar_request():
+    """Test that format=columnar returns the same data in a smaller body"""
+    with synthetic_lambda_table(300) as (resource, test_table):
+        sections = ['frequency_stats', 'companion_stats', 'average_gap_stats', 'last_result']
+        records = lambda_function.lambda_handler({'sections': sections}, None)
+        columnar = lambda_function.lambda_handler({'sections': sections, 'format': 'columnar'}, None)
+
+        assert records['statusCode'] == columnar['statusCode'] == 200
+        assert len(columnar['body']) < len(records['body'])
+        records_body = json.loads(records['body'])
+        columnar_body = json.loads(columnar['body'])
+        assert columnar_body['frequency_stats']['numbers'] == [item['number'] for item in records_body['frequency_stats']]
+        assert columnar_body['frequency_stats']['quantity'] == [item['quantity'] for item in records_body['frequency_stats']]
+        assert columnar_body['last_result'] == records_body['last_result']
+        assert isinstance(records_body['last_result']['concurso'], int)
+
+        assert lambda_function.lambda_handler({'format': 'xml'}, None)['statusCode'] == 500
+
+        print("✅ Columnar request test passed!")
+
+if __name__ == "__main__":
+    test_to_plain_and_dumps()
+    test_to_columnar()
+    test_columnar_request()
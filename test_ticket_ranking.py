@@ -0,0 +1,106 @@
+import itertools
+import tempfile
+import numpy as np
+import combinadic
+import lambda_function
+import ticket_ranking
+from draw_store import DrawStore, encode_dezenas, mask_to_numbers
+from model_store import LocalModelStore
+from synthetic_draws import generate_draws
+
+def _naive_score(mask, draws, weights):
+    numbers = mask_to_numbers(mask)
+    prizes = sum(1 for d in draws if len(set(numbers) & set(mask_to_numbers(int(d)))) >= 11)
+    return prizes / len(draws) + ticket_ranking.SCORING_FEATURE_WEIGHT * sum(weights[n - 1] for n in numbers) / 15
+
+def test_combinadic_rank_unrank():
+    """Test rank/unrank against itertools order and round trips"""
+    # As C(20, 15) primeiras combinações só usam as dezenas 01..20
+    expected = [encode_dezenas(c) for c in sorted(itertools.combinations(range(1, 21), 15), key=lambda c: c[::-1])]
+    assert combinadic.mask_range(0, len(expected)).tolist() == expected
+    assert combinadic.unrank_masks(np.array([0, combinadic.TOTAL_COMBINATIONS - 1])).tolist() == [
+        encode_dezenas(range(1, 16)), encode_dezenas(range(11, 26))
+    ]
+
+    ranks = np.random.default_rng(5).integers(0, combinadic.TOTAL_COMBINATIONS, 20000)
+    masks = combinadic.unrank_masks(ranks)
+    assert (combinadic.rank_masks(masks) == ranks).all()
+    # Em ordem colex o posto cresce junto com a máscara
+    assert (np.diff(combinadic.mask_range(1000000, 1100000).astype(np.int64)) > 0).all()
+    assert combinadic.rank_masks(np.array([encode_dezenas(list(range(1, 15)) + [25])]))[0] == combinadic.BINOMIAL[24, 15]
+
+    print("✅ Combinadic test passed!")
+
+def test_score_range_matches_naive():
+    """Test vectorized chunk scoring against a loop"""
+    store = DrawStore.from_results(generate_draws(80, seed=31))
+    weights = np.random.default_rng(2).random(25)
+    start, stop = 1234567, 1234567 + 700
+
+    ranks, scores = ticket_ranking.score_range(start, stop, store.masks, weights, 20)
+    naive = sorted(
+        ((_naive_score(int(mask), store.masks, weights), start + i)
+         for i, mask in enumerate(combinadic.mask_range(start, stop))),
+        key=lambda item: (-item[0], item[1])
+    )[:20]
+    assert ranks.tolist() == [r for _, r in naive]
+    assert np.allclose(scores, [s for s, _ in naive])
+
+    print("✅ Chunk scoring test passed!")
+
+def test_rank_tickets_full_space():
+    """Test that every ticket is scored and processes agree with the inline run"""
+    store = DrawStore.from_results(generate_draws(60, seed=32))
+    # Um peso dominante: a melhor aposta precisa conter as 15 dezenas mais pesadas
+    weights = np.zeros(25)
+    weights[5:20] = 100.0
+
+    inline_ranks, inline_scores = ticket_ranking.rank_tickets(store.masks, weights, 50, workers=1)
+    pooled_ranks, pooled_scores = ticket_ranking.rank_tickets(store.masks, weights, 50, workers=3)
+    assert inline_ranks.tolist() == pooled_ranks.tolist()
+    assert np.allclose(inline_scores, pooled_scores)
+    assert combinadic.unrank_masks(inline_ranks[:1])[0] == encode_dezenas(range(6, 21))
+    assert (np.diff(inline_scores) <= 0).all()
+
+    print("✅ Full ticket space test passed!")
+
+def test_ranking_cache_per_watermark():
+    """Test that the ranking is reused until a new draw arrives"""
+    draws = generate_draws(61, seed=33)
+    weights = np.linspace(0.1, 1.0, 25)
+    calls = []
+    original = ticket_ranking.rank_tickets
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    ticket_ranking.rank_tickets = counting
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = DrawStore.from_results(draws[:60])
+            first = ticket_ranking.top_combinations(store, weights, 5, ticket_ranking.RankingCache(LocalModelStore(tmp)))
+            # Novo container: o ranking vem do disco
+            second = ticket_ranking.top_combinations(store, weights, 3, ticket_ranking.RankingCache(LocalModelStore(tmp)))
+            assert len(calls) == 1
+            assert second == first[:3]
+            assert sum(first[0]['hits'].values()) == sum(
+                1 for m in store.masks if len(set(first[0]['dezenas']) & set(str(n).zfill(2) for n in mask_to_numbers(int(m)))) >= 11
+            )
+
+            ticket_ranking.top_combinations(DrawStore.from_results(draws), weights, 3, ticket_ranking.RankingCache(LocalModelStore(tmp)))
+            assert len(calls) == 2
+    finally:
+        ticket_ranking.rank_tickets = original
+
+    request = lambda_function.parse_analysis_request({'sections': ['ranked_combinations'], 'top_k': 25})
+    assert request.top_k == 25 and not request.push
+    assert 'average_gap_stats' in lambda_function.expand_section_dependencies(request.sections)
+
+    print("✅ Ranking cache test passed!")
+
+if __name__ == "__main__":
+    test_combinadic_rank_unrank()
+    test_score_range_matches_naive()
+    test_rank_tickets_full_space()
+    test_ranking_cache_per_watermark()
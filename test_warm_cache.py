@@ -0,0 +1,55 @@
+import json
+import os
+from moto import mock_aws
+import lambda_function
+from warm_cache import WarmCache
+from conftest import synthetic_lambda_table
+
+def test_ttl_and_eviction():
+    """Test TTL expiry and size-bounded eviction"""
+    now = [0.0]
+    cache = WarmCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+
+    cache.put((1, 'a'), 'um')
+    cache.put((2, 'a'), 'dois')
+    assert cache.get((1, 'a')) == 'um'  # (1, 'a') passa a ser o mais recente
+    cache.put((3, 'a'), 'tres')
+    assert cache.get((2, 'a')) is None
+    assert cache.latest(key=lambda k: k[0]) == ((3, 'a'), 'tres')
+
+    now[0] = 11
+    assert cache.get((3, 'a')) is None
+    assert cache.latest(key=lambda k: k[0]) is None
+
+    print("✅ Warm cache TTL/eviction test passed!")
+
+@mock_aws
+def test_warm_invocation_skips_scan():
+    """Test that a warm invocation without new concursos skips the scan and recompute"""
+    os.environ.pop('API_URL', None)
+    with synthetic_lambda_table(300) as (resource, test_table):
+        scans = []
+        original_scan = lambda_function._scan_segment
+        lambda_function._scan_segment = lambda *args: scans.append(args) or original_scan(*args)
+        try:
+            first = lambda_function.lambda_handler({}, None)
+            assert first['statusCode'] == 200
+            scans_after_cold = len(scans)
+            assert scans_after_cold > 0
+
+            second = lambda_function.lambda_handler({}, None)
+            assert second['body'] == first['body']
+            assert len(scans) == scans_after_cold
+
+            test_table.put_item(Item={'concurso': 301, 'dezenas': [str(n).zfill(2) for n in range(1, 16)]})
+            third = lambda_function.lambda_handler({}, None)
+            assert len(scans) == scans_after_cold
+            assert json.loads(third['body'])['last_result']['concurso'] == 301
+        finally:
+            lambda_function._scan_segment = original_scan
+
+        print("✅ Warm invocation test passed!")
+
+if __name__ == "__main__":
+    test_ttl_and_eviction()
+    test_warm_invocation_skips_scan()
@@ -0,0 +1,201 @@
+import hashlib
+import io
+import multiprocessing
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import metrics
+from combinadic import TOTAL_COMBINATIONS, mask_range, unrank_masks
+from draw_store import DrawStore, mask_to_dezenas
+from numpy_engine import popcount
+
+# Concursos mais recentes contra os quais cada aposta é pontuada (0 = histórico inteiro)
+SCORING_LOOKBACK = int(os.getenv('SCORING_LOOKBACK', '0'))
+# Apostas x concursos por bloco: a matriz de acertos (uint8) do bloco fica em cerca de 1 MiB,
+# dentro do cache do processador
+SCORING_BLOCK_SIZE = int(os.getenv('SCORING_BLOCK_SIZE', str(1 << 20)))
+MIN_CHUNK_SIZE = 256
+SCORING_WORKERS = int(os.getenv('SCORING_WORKERS', '0')) or os.cpu_count() or 1
+SCORING_TOP_K = int(os.getenv('SCORING_TOP_K', '10'))
+# Tamanho do ranking guardado por watermark; top_k maiores não são aceitos
+SCORING_CACHE_SIZE = int(os.getenv('SCORING_CACHE_SIZE', '1000'))
+# Peso do score das dezenas (média dos pesos de combination_generator.number_weights)
+# em relação à fração de concursos premiados
+SCORING_FEATURE_WEIGHT = float(os.getenv('SCORING_FEATURE_WEIGHT', '0.1'))
+
+PRIZE_HITS = 11
+RANKING_KEY = 'ranking.npz'
+
+
+def feature_scores(masks: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Média dos pesos das 15 dezenas de cada aposta"""
+    scores = np.zeros(len(masks), dtype=np.float64)
+    for position in range(25):
+        scores += ((masks >> np.uint32(position)) & np.uint32(1)) * weights[position]
+    return scores / 15
+
+
+def prize_draws(masks: np.ndarray, draws: np.ndarray) -> np.ndarray:
+    """Quantos concursos cada aposta teria acertado com 11 ou mais dezenas"""
+    return np.count_nonzero(popcount(masks[:, None] & draws[None, :]) >= PRIZE_HITS, axis=1)
+
+
+def hit_distribution(masks: np.ndarray, draws: np.ndarray) -> np.ndarray:
+    """Concursos com 11, 12, ..., 15 acertos de cada aposta (linhas x 5)"""
+    hits = popcount(masks[:, None] & draws[None, :])
+    return np.stack([np.count_nonzero(hits == h, axis=1) for h in range(PRIZE_HITS, 16)], axis=1)
+
+
+def _top(ranks: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Maiores scores; empates pelo menor posto, para o resultado não depender dos blocos
+    if len(scores) > k:
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = scores >= threshold
+        ranks, scores = ranks[keep], scores[keep]
+    order = np.lexsort((ranks, -scores))[:k]
+    return ranks[order], scores[order]
+
+
+def chunk_size_for(draws: int) -> int:
+    return max(MIN_CHUNK_SIZE, SCORING_BLOCK_SIZE // max(draws, 1))
+
+
+def score_range(start: int, stop: int, draws: np.ndarray, weights: np.ndarray, k: int,
+                feature_weight: float = SCORING_FEATURE_WEIGHT) -> Tuple[np.ndarray, np.ndarray]:
+    """Melhores k postos (e scores) entre os postos start..stop-1"""
+    chunk_size = chunk_size_for(len(draws))
+    best_ranks = np.zeros(0, dtype=np.int64)
+    best_scores = np.zeros(0, dtype=np.float64)
+    for chunk_start in range(start, stop, chunk_size):
+        chunk_stop = min(stop, chunk_start + chunk_size)
+        masks = mask_range(chunk_start, chunk_stop)
+        scores = prize_draws(masks, draws) / max(len(draws), 1) + feature_weight * feature_scores(masks, weights)
+        best_ranks, best_scores = _top(
+            np.concatenate([best_ranks, np.arange(chunk_start, chunk_stop, dtype=np.int64)]),
+            np.concatenate([best_scores, scores]), k
+        )
+    return best_ranks, best_scores
+
+
+def _score_worker(connection, *args) -> None:
+    try:
+        connection.send(score_range(*args))
+    except Exception as e:
+        connection.send(e)
+    finally:
+        connection.close()
+
+
+def rank_tickets(draws: np.ndarray, weights: np.ndarray, k: int = SCORING_CACHE_SIZE,
+                 workers: int = SCORING_WORKERS) -> Tuple[np.ndarray, np.ndarray]:
+    """Pontua as C(25, 15) apostas e devolve os k melhores postos e scores, em ordem"""
+    draws = np.ascontiguousarray(draws, dtype=np.uint32)
+    weights = np.asarray(weights, dtype=np.float64)
+    workers = max(1, workers)
+    if workers == 1:
+        return score_range(0, TOTAL_COMBINATIONS, draws, weights, k)
+
+    # Processos com Pipe em vez de Pool/Queue: o Lambda não tem /dev/shm para os semáforos.
+    # 'spawn' em vez de 'fork': o ranking pode rodar com outras threads vivas (lote de jogos,
+    # scan em streaming, pool do boto3) e um fork poderia herdar um lock travado
+    context = multiprocessing.get_context('spawn')
+    bounds = np.linspace(0, TOTAL_COMBINATIONS, workers + 1).astype(np.int64)
+    processes = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_score_worker, args=(sender, int(start), int(stop), draws, weights, k))
+        process.start()
+        sender.close()
+        processes.append((process, receiver))
+
+    parts = []
+    for process, receiver in processes:
+        parts.append(receiver.recv())
+        process.join()
+    for part in parts:
+        if isinstance(part, Exception):
+            raise part
+    return _top(np.concatenate([r for r, _ in parts]), np.concatenate([s for _, s in parts]), k)
+
+
+def ranking_params(store: DrawStore, weights: np.ndarray) -> Dict[str, Any]:
+    return {
+        'lookback': SCORING_LOOKBACK,
+        'cache_size': SCORING_CACHE_SIZE,
+        'feature_weight': SCORING_FEATURE_WEIGHT,
+        'draws': len(store),
+        'weights': hashlib.sha1(np.round(weights, 9).tobytes()).hexdigest(),
+    }
+
+
+class RankingCache:
+    """Ranking do último watermark, em memória e no backend dos artefatos de modelo."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.cached: Optional[Dict[str, Any]] = None
+
+    def load(self, watermark: int, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ranking = self.cached
+        if ranking is None and self.backend is not None:
+            try:
+                data = self.backend.read(RANKING_KEY)
+                if data is not None:
+                    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+                        ranking = {
+                            'watermark': int(archive['watermark']),
+                            'params': archive['params'].item(),
+                            'ranks': archive['ranks'],
+                            'scores': archive['scores'],
+                        }
+            except Exception as e:
+                print(f"Erro ao carregar ranking de apostas: {str(e)}")
+                ranking = None
+        if ranking is None or ranking['watermark'] != watermark or ranking['params'] != repr(params):
+            return None
+        self.cached = ranking
+        return ranking
+
+    def save(self, watermark: int, params: Dict[str, Any], ranks: np.ndarray, scores: np.ndarray) -> None:
+        self.cached = {'watermark': watermark, 'params': repr(params), 'ranks': ranks, 'scores': scores}
+        if self.backend is None:
+            return
+        buffer = io.BytesIO()
+        np.savez(buffer, watermark=watermark, params=repr(params), ranks=ranks, scores=scores)
+        try:
+            self.backend.write(RANKING_KEY, buffer.getvalue())
+        except Exception as e:
+            print(f"Erro ao salvar ranking de apostas: {str(e)}")
+
+
+def top_combinations(store: DrawStore, weights: np.ndarray, top_k: int = SCORING_TOP_K,
+                     cache: Optional[RankingCache] = None) -> List[Dict[str, Any]]:
+    """As top_k apostas, com o posto, o score e quantos concursos teriam dado 11..15 acertos"""
+    valid = store.window(concurso_from=0, last_n=SCORING_LOOKBACK or None)
+    if len(valid) == 0:
+        return []
+    watermark = int(valid.concursos[-1])
+    params = ranking_params(valid, weights)
+
+    ranking = cache.load(watermark, params) if cache is not None else None
+    source = 'cached'
+    if ranking is None:
+        ranks, scores = rank_tickets(valid.masks, weights, max(top_k, SCORING_CACHE_SIZE) if cache is not None else top_k)
+        if cache is not None:
+            cache.save(watermark, params, ranks, scores)
+        ranking = {'ranks': ranks, 'scores': scores}
+        source = 'computed'
+    metrics.current().set_property('ranking_source', source)
+
+    ranks = ranking['ranks'][:top_k]
+    masks = unrank_masks(ranks)
+    distribution = hit_distribution(masks, valid.masks)
+    return [
+        {
+            'rank': int(r),
+            'dezenas': mask_to_dezenas(int(mask)),
+            'score': round(float(score), 6),
+            'hits': {str(h): int(n) for h, n in zip(range(PRIZE_HITS, 16), row)},
+        }
+        for r, mask, score, row in zip(ranks, masks, ranking['scores'][:top_k], distribution)
+    ]
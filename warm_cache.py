@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class WarmCache:
+    """Cache em memória com TTL e limite de entradas (LRU), mantido entre invocações quentes."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and self.clock() - created_at > self.ttl_seconds
+
+    def _purge(self) -> None:
+        for key in [k for k, (created_at, _) in self._entries.items() if self._expired(created_at)]:
+            del self._entries[key]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        self._purge()
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self.clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def latest(self, key: Callable[[Hashable], Any]) -> Optional[Tuple[Hashable, Any]]:
+        self._purge()
+        if not self._entries:
+            return None
+        newest = max(self._entries, key=key)
+        return newest, self._entries[newest][1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)